@@ -6,11 +6,9 @@ Versão FINAL corrigida (execução manual protegida + fallback automático)
 from __future__ import annotations
 
 import uuid
-import csv
 import os
 import threading
 import sys
-import json
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
@@ -30,7 +28,7 @@ def log_info(msg):
     print(f"[{datetime.now()}] {msg}", flush=True)
 
 
-log_info("🚀 SERVIDOR INICIADO (Lendo resultados_v2.csv)")
+log_info("🚀 SERVIDOR INICIADO (banco SQLite)")
 
 if not os.getenv('TELEGRAM_TOKEN'):
     log_info("⚠️ AVISO: TELEGRAM_TOKEN não encontrado.")
@@ -39,9 +37,10 @@ if not os.getenv('TELEGRAM_TOKEN'):
 # 2. IMPORTAÇÕES
 # ------------------------------------------------------
 try:
-    from backend.core_milhas.orquestrador_voos import executar_fluxo_voos, carregar_destinos_csv
+    from backend.core_milhas.orquestrador_voos import executar_fluxo_voos, carregar_destinos_csv, ORIGEM_PADRAO
+    from backend.core_milhas.progresso import execucao_em_andamento, progresso_atual
     from backend.agendador_front.notificacoes import enviar_mensagem_telegram, enviar_oferta_telegram
-    from backend.core_amadeus.rotator import AmadeusRotator
+    from backend.core_amadeus.rotator import AmadeusRotator, amadeus_client
     from backend.agendador_front import scheduler
     from backend.agendador_front.scheduler import executar_agora
     from backend.core_milhas.processador_texto import processar_texto_promocional
@@ -55,17 +54,25 @@ except ImportError as e:
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
-RESULTADOS_CSV = os.path.join(DATA_DIR, "resultados_v2.csv")
-ALERTAS_CSV_PATH = os.path.join(DATA_DIR, "alertas_fixos.csv")
-DESTINOS_CSV_PATH = os.path.join(DATA_DIR, "coletas_filtrado_iata.csv")
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 from backend.api.log_buffer import add_log
+from backend.armazenamento.banco import banco
+from backend.armazenamento.importar_csv import importar_legado
 from backend.api.logs_execucao import bp_logs
+from backend.api.amadeus_status import bp_amadeus
+from backend.api.checkpoint_auto import bp_checkpoint
+from backend.api.resultados import bp_resultados
+from backend.api.destinos import bp_destinos
+from backend.api.respostas import responder_json
 
 app.register_blueprint(bp_logs)
+app.register_blueprint(bp_amadeus)
+app.register_blueprint(bp_checkpoint)
+app.register_blueprint(bp_resultados)
+app.register_blueprint(bp_destinos)
 
 
 # ------------------------------------------------------
@@ -82,66 +89,31 @@ def start_scheduler():
 
 if os.environ.get("WERKZEUG_RUN_MAIN") == "true" or not app.debug:
     threading.Thread(target=start_scheduler, daemon=True).start()
+    # tokens Amadeus renovados antes de expirar, fora do caminho das buscas
+    amadeus_client.iniciar_renovacao()
 
 # Flag de execução manual protegida
 EXECUCAO_EM_ANDAMENTO = False
 
+# CSVs/JSON antigos entram no banco uma única vez
+try:
+    importar_legado(log=log_info)
+except Exception as e:
+    log_info(f"🚨 Erro importando CSVs antigos: {e}")
+
 # ------------------------------------------------------
 # 5. FUNÇÕES UTILITÁRIAS
 # ------------------------------------------------------
-def _ler_resultados() -> List[Dict[str, Any]]:
-    if os.path.exists(RESULTADOS_CSV):
-        try:
-            with open(RESULTADOS_CSV, "r", encoding="utf-8") as f:
-                return list(csv.DictReader(f))
-        except Exception as e:
-            log_info(f"⚠️ Erro ao ler CSV de resultados: {e}")
-    return []
-
-
 def _ler_alertas() -> List[Dict[str, Any]]:
-    if not os.path.exists(ALERTAS_CSV_PATH):
-        return []
     try:
-        with open(ALERTAS_CSV_PATH, mode='r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
+        return banco.listar_alertas()
     except Exception:
         return []
 
 
-def _salvar_alertas(alertas: List[Dict[str, Any]]):
-    colunas = ['id', 'origem', 'destino', 'data_ida', 'data_volta', 'preco_alvo']
-    try:
-        with open(ALERTAS_CSV_PATH, mode='w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=colunas)
-            writer.writeheader()
-            writer.writerows(alertas)
-    except Exception as e:
-        log_info(f"Erro salvar alertas: {e}")
-
-
 def _resumo_status_radar() -> Dict[str, Any]:
-    caminho_json = os.path.join(DATA_DIR, "resultados.json")
-
-    if not os.path.exists(caminho_json):
-        return {"total_registros": 0, "ultima_atualizacao": None}
-
     try:
-        with open(caminho_json, "r", encoding="utf-8") as f:
-            dados = json.load(f)
-
-        lista = (
-            dados.get("results")
-            or dados.get("resultados")
-            or dados.get("lista")
-            or dados.get("ofertas")
-            or []
-        )
-
-        ultima = lista[-1].get("timestamp") if lista else None
-
-        return {"total_registros": len(lista), "ultima_atualizacao": ultima}
-
+        return banco.resumo_resultados()
     except Exception as e:
         log_info(f"Erro lendo status do radar: {e}")
         return {"total_registros": 0, "ultima_atualizacao": None}
@@ -151,33 +123,6 @@ def _resumo_status_radar() -> Dict[str, Any]:
 # 6. ROTAS DA API
 # ------------------------------------------------------
 
-@app.route("/api/destinos", methods=["GET"])
-def api_destinos():
-    caminho = DESTINOS_CSV_PATH
-
-    if not os.path.exists(caminho):
-        return jsonify({"success": False, "destinos": []})
-
-    destinos = []
-    with open(caminho, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            destinos.append(
-                {
-                    "iata": row.get("iata", "").upper(),
-                    "cidade": row.get("cidade", ""),
-                    "pais": row.get("pais", ""),
-                }
-            )
-
-    return jsonify({"success": True, "destinos": destinos})
-
-
-@app.route("/destinos", methods=["GET"])
-def destinos_sem_prefixo():
-    return api_destinos()
-
-
 @app.route("/")
 def raiz():
     return jsonify({"status": "online", "app": "Partiu085 V2"})
@@ -201,6 +146,8 @@ def api_executar():
     destinos = data.get("destinos") or []
     data_ida = data.get("data_ida")
     data_volta = data.get("data_volta")
+    # "origens": ["FOR", "REC"] ou "origem": "REC" (sem nada: ORIGEM_PADRAO / AUTO_ORIGENS)
+    origens = data.get("origens") or data.get("origem")
 
     # 🟢 FALLBACK — nenhum destino enviado → usa CSV e vira AUTO
     if not destinos:
@@ -226,8 +173,9 @@ def api_executar():
                 destinos_personalizados=destinos,
                 data_ida=data_ida,
                 data_volta=data_volta,
+                origens=origens,
             )
-            log_info("✅ Busca finalizada e salva no CSV")
+            log_info("✅ Busca finalizada e salva no banco")
         except Exception as exc:
             log_info(f"🚨 Erro fatal: {exc}")
         finally:
@@ -240,35 +188,9 @@ def api_executar():
 
 @app.route("/api/status_execucao", methods=["GET"])
 def api_status_execucao():
-    return jsonify({"em_andamento": EXECUCAO_EM_ANDAMENTO})
-
-
-@app.route("/api/resultados", methods=["GET"])
-def api_resultados():
-    caminho_json = os.path.join(DATA_DIR, "resultados.json")
-    if os.path.exists(caminho_json):
-        try:
-            with open(caminho_json, "r", encoding="utf-8") as f:
-                dados = json.load(f)
-
-            lista = (
-                dados.get("results")
-                or dados.get("resultados")
-                or dados.get("lista")
-                or dados.get("ofertas")
-                or []
-            )
-
-            return jsonify({"success": True, "results": lista})
-        except Exception as e:
-            log_info(f"⚠️ Erro lendo resultados.json: {e}")
-
-    try:
-        linhas = _ler_resultados()
-        return jsonify({"success": True, "results": linhas})
-    except Exception as e:
-        log_info(f"🚨 Erro /api/resultados (CSV): {e}")
-        return jsonify({"success": False, "results": [], "error": str(e)}), 500
+    # execuções do agendador/scripts também contam (não passam pelo flag do painel)
+    em_andamento = EXECUCAO_EM_ANDAMENTO or execucao_em_andamento()
+    return jsonify({"em_andamento": em_andamento, "progresso": progresso_atual()})
 
 
 @app.route("/api/status_radar", methods=["GET"])
@@ -286,25 +208,28 @@ def api_status_radar():
 def api_alertas():
     if request.method == "POST":
         data = request.get_json()
-        alertas = _ler_alertas()
         novo = {
             "id": str(uuid.uuid4())[:8],
-            "origem": "FOR",
+            "origem": (data.get("origem") or ORIGEM_PADRAO).strip().upper(),
             "destino": data["destino"],
             "data_ida": data["data_ida"],
             "data_volta": data.get("data_volta", ""),
             "preco_alvo": data["preco_alvo"],
         }
-        alertas.append(novo)
-        _salvar_alertas(alertas)
+        banco.criar_alerta(novo)
         return jsonify({"success": True})
 
-    return jsonify({"success": True, "alertas": _ler_alertas()})
+    try:
+        versao = banco.versao("alertas")
+    except Exception as e:
+        log_info(f"Erro lendo versão dos alertas: {e}")
+        return jsonify({"success": True, "alertas": _ler_alertas()})
+    return responder_json("alertas", versao, lambda: {"success": True, "alertas": _ler_alertas()})
 
 
 @app.route("/api/alertas/<id>", methods=["DELETE"])
 def api_del_alerta(id):
-    _salvar_alertas([a for a in _ler_alertas() if a["id"] != id])
+    banco.remover_alerta(id)
     return jsonify({"success": True})
 
 
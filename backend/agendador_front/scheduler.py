@@ -1,4 +1,5 @@
 from apscheduler.schedulers.background import BackgroundScheduler
+from backend.armazenamento.banco import banco
 from backend.core_milhas.orquestrador_voos import executar_fluxo_voos
 import atexit
 from datetime import datetime, timedelta
@@ -6,22 +7,12 @@ from datetime import datetime, timedelta
 # 🔕 Telegram agora é manual pelo ResultsPage
 # from backend.agendador_front.notificacoes import enviar_mensagem_telegram
 
-# --- Imports para o antigo Robô Sniper ---
-import csv
-import os
-
 _scheduler = None
 
-DIRETORIO_BASE = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-ALERTAS_CSV_PATH = os.path.join(DIRETORIO_BASE, 'data', "alertas_fixos.csv")
-
 
 def _ler_alertas_job():
-    if not os.path.exists(ALERTAS_CSV_PATH):
-        return []
     try:
-        with open(ALERTAS_CSV_PATH, mode='r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
+        return banco.listar_alertas()
     except Exception:
         return []
 
@@ -54,7 +45,7 @@ def job_robo_agora():
         return {
             "success": True,
             "message": "Execução manual concluída.",
-            "resultado": resultado
+            "resultado": [oferta.to_dict() for oferta in resultado or []]
         }
     except Exception as e:
         print(f"❌ Erro na execução manual: {e}")
@@ -0,0 +1,39 @@
+# backend/api/amadeus_status.py
+from flask import Blueprint, jsonify
+from backend.core_amadeus.rotator import amadeus_client
+
+bp_amadeus = Blueprint("amadeus_status", __name__)
+
+@bp_amadeus.route("/api/amadeus/status", methods=["GET"])
+def obter_status_amadeus():
+    """
+    Saúde de cada chave Amadeus (circuit breaker, latência, erros),
+    taxa do governador, cache de respostas e chamadas coalescidas
+    """
+    try:
+        cache = amadeus_client.cache.estatisticas()
+    except Exception as e:
+        cache = {"erro": str(e)}
+
+    return jsonify({
+        "success": True,
+        "credenciais": amadeus_client.status_saude(),
+        "taxa": amadeus_client.governador.status([c["name"] for c in amadeus_client.credentials]),
+        "cache": cache,
+        "single_flight": amadeus_client.single_flight.estatisticas()
+    })
+
+
+@bp_amadeus.route("/api/amadeus/cota", methods=["GET"])
+def obter_cota_amadeus():
+    """
+    Chamadas usadas por chave (hoje / no mês) e orçamento
+    diário que a varredura AUTO ainda pode gastar
+    """
+    try:
+        return jsonify({
+            "success": True,
+            **amadeus_client.cota.resumo(amadeus_client.credentials)
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
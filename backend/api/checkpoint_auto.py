@@ -0,0 +1,34 @@
+# backend/api/checkpoint_auto.py
+from flask import Blueprint, jsonify
+from backend.core_milhas.checkpoint import (
+    checkpoint_em_uso,
+    descartar_checkpoint,
+    ler_checkpoint,
+    resumo_checkpoint,
+)
+
+bp_checkpoint = Blueprint("checkpoint_auto", __name__)
+
+@bp_checkpoint.route("/api/auto/checkpoint", methods=["GET"])
+def obter_checkpoint():
+    """
+    Progresso salvo da varredura AUTO: rotas concluídas, datas já
+    buscadas e ofertas por rota (null quando não há nada a retomar)
+    """
+    return jsonify({
+        "success": True,
+        "em_execucao": checkpoint_em_uso(),
+        "checkpoint": resumo_checkpoint(ler_checkpoint())
+    })
+
+
+@bp_checkpoint.route("/api/auto/checkpoint", methods=["DELETE"])
+def apagar_checkpoint():
+    """Descarta o checkpoint: a próxima execução AUTO começa do zero"""
+    if checkpoint_em_uso():
+        return jsonify({
+            "success": False,
+            "error": "Execução AUTO em andamento — aguarde terminar para descartar"
+        }), 409
+
+    return jsonify({"success": True, "descartado": descartar_checkpoint()})
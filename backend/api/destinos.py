@@ -0,0 +1,54 @@
+# backend/api/destinos.py
+from datetime import datetime, timezone
+
+from flask import Blueprint, jsonify, request
+
+from backend.api.respostas import responder_json
+from backend.core_milhas.indice_destinos import indice_destinos, normalizar
+
+bp_destinos = Blueprint("destinos", __name__)
+
+LIMITE_PADRAO = 12
+LIMITE_MAXIMO = 50
+
+
+@bp_destinos.route("/api/destinos", methods=["GET"])
+def api_destinos():
+    versao = indice_destinos.versao_atual()
+    destinos = indice_destinos.todos()
+    if versao is None:
+        return jsonify({"success": False, "destinos": []})
+
+    # o CSV só é relido quando muda (mtime/tamanho = versão)
+    return responder_json(
+        "destinos",
+        versao,
+        lambda: {"success": True, "destinos": destinos},
+        modificado_em=datetime.fromtimestamp(versao[0] / 1e9, timezone.utc),
+    )
+
+
+@bp_destinos.route("/destinos", methods=["GET"])
+def destinos_sem_prefixo():
+    return api_destinos()
+
+
+@bp_destinos.route("/api/destinos/search", methods=["GET"])
+def api_destinos_busca():
+    """
+    Autocomplete: ?q= (cidade, IATA ou país, sem ligar para acento e com
+    tolerância a erro de digitação) e limite (padrão 12, máx. 50).
+    """
+    consulta = request.args.get("q", "")
+    try:
+        limite = int(request.args.get("limite") or LIMITE_PADRAO)
+    except ValueError:
+        return jsonify({"success": False, "destinos": [], "error": "limite inválido"}), 400
+    limite = min(max(limite, 1), LIMITE_MAXIMO)
+
+    # a resposta só depende da consulta normalizada e da versão do CSV
+    return responder_json(
+        ("destinos/search", normalizar(consulta), limite),
+        indice_destinos.versao_atual(),
+        lambda: {"success": True, "destinos": indice_destinos.buscar(consulta, limite)},
+    )
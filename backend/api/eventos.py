@@ -0,0 +1,59 @@
+# backend/api/eventos.py
+"""
+Canal de eventos da execução (linhas do add_log, início/fim da busca e
+progresso por origem) para o stream SSE do /api/eventos_execucao.
+
+Cada evento recebe um id crescente; os últimos ficam num buffer circular
+para quem reconecta com Last-Event-ID receber só o que perdeu. Quem
+espera fica parado numa Condition, sem polling.
+"""
+
+import os
+import threading
+from collections import deque
+
+EVENTOS_MAXIMO = int(os.getenv("SSE_EVENTOS_MAXIMO", "1000"))   # eventos guardados para reconexão
+
+
+class CanalEventos:
+    def __init__(self, maximo=EVENTOS_MAXIMO):
+        self._eventos = deque(maxlen=maximo)   # (id, tipo, dados)
+        self._cond = threading.Condition()
+        self.ultimo = 0
+        self.estado = {"em_andamento": False}   # último evento "estado"
+
+    def publicar(self, tipo, dados):
+        with self._cond:
+            self.ultimo += 1
+            self._eventos.append((self.ultimo, tipo, dados))
+            if tipo == "estado":
+                self.estado = dados
+            self._cond.notify_all()
+            return self.ultimo
+
+    def desde(self, ultimo_id):
+        """
+        (eventos com id > ultimo_id, completo). `completo` é False quando
+        parte do intervalo já saiu do buffer (o cliente precisa de um retrato novo).
+        """
+        with self._cond:
+            return self._desde(ultimo_id)
+
+    def _desde(self, ultimo_id):
+        if ultimo_id > self.ultimo:
+            return [], False          # id de outra vida do processo
+        if not self._eventos or ultimo_id >= self.ultimo:
+            return [], True
+        primeiro = self._eventos[0][0]
+        if ultimo_id < primeiro - 1:
+            return [], False
+        return list(self._eventos)[ultimo_id - primeiro + 1:], True
+
+    def aguardar(self, ultimo_id, timeout):
+        """Como desde(), mas espera até `timeout` segundos por algo novo."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.ultimo != ultimo_id, timeout)
+            return self._desde(ultimo_id)
+
+
+canal_execucao = CanalEventos()
@@ -1,14 +1,30 @@
+import threading
+import uuid
 from datetime import datetime
 
+from backend.api.eventos import canal_execucao
+
 EXEC_LOGS = []
+_LOCK = threading.Lock()  # várias threads da varredura escrevem aqui
+_SEQUENCIA = 0            # total de linhas já escritas (versão do buffer)
+_PROCESSO = uuid.uuid4().hex[:8]   # cada worker tem o seu buffer
 
 def add_log(msg):
     ts = datetime.now().strftime("%H:%M:%S")
     line = f"[{ts}] {msg}"
 
-    print(line)        # continua aparecendo no console
-    EXEC_LOGS.append(line)
+    global _SEQUENCIA
+    with _LOCK:
+        print(line)        # continua aparecendo no console
+        EXEC_LOGS.append(line)
+        _SEQUENCIA += 1
+        canal_execucao.publicar("log", line)   # stream SSE
+
+        # impede crescimento infinito
+        if len(EXEC_LOGS) > 500:
+            EXEC_LOGS.pop(0)
+
 
-    # impede crescimento infinito
-    if len(EXEC_LOGS) > 500:
-        EXEC_LOGS.pop(0)
+def versao_logs():
+    """Muda a cada add_log (ETag do /api/logs_execucao)."""
+    return _PROCESSO, _SEQUENCIA
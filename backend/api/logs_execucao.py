@@ -1,16 +1,120 @@
 # backend/api/logs_execucao.py
-from flask import Blueprint, jsonify
-from backend.api.log_buffer import EXEC_LOGS
+import json
+import os
+import threading
+import time
+
+from flask import Blueprint, Response, jsonify, request
+from backend.api.eventos import canal_execucao
+from backend.api.log_buffer import EXEC_LOGS, _LOCK, _PROCESSO, versao_logs
+from backend.api.respostas import responder_json
+from backend.core_milhas.progresso import progresso_atual
 
 bp_logs = Blueprint("logs_execucao", __name__)
 
+# Cada cliente SSE ocupa uma thread (gunicorn gthread), não um worker
+SSE_MAX_CLIENTES = int(os.getenv("SSE_MAX_CLIENTES", "16"))
+SSE_DURACAO_MAXIMA = int(os.getenv("SSE_DURACAO_MAXIMA", "300"))   # s; o navegador reconecta sozinho
+SSE_HEARTBEAT = 15        # s sem eventos até mandar um comentário (detecta cliente que caiu)
+SSE_RECONEXAO_MS = 3000
+
+_clientes = 0
+_clientes_lock = threading.Lock()
+
+
 @bp_logs.route("/api/logs_execucao", methods=["GET"])
 def obter_logs_execucao():
     """
     Retorna os últimos logs da execução
     (mesmos logs gerados pelo add_log)
     """
-    return jsonify({
-        "success": True,
-        "logs": EXEC_LOGS
-    })
+    def montar():
+        with _LOCK:
+            return {"success": True, "logs": list(EXEC_LOGS)}
+
+    return responder_json("logs_execucao", versao_logs(), montar)
+
+
+def _evento(tipo, dados, id_evento=None):
+    linhas = []
+    if id_evento is not None:
+        linhas.append(f"id: {_PROCESSO}-{id_evento}")
+    linhas.append(f"event: {tipo}")
+    linhas.append("data: " + json.dumps(dados, ensure_ascii=False))
+    return "\n".join(linhas) + "\n\n"
+
+
+def _ultimo_id(valor):
+    """Id do canal a partir do Last-Event-ID; None se é de outro processo ou inválido."""
+    processo, _, numero = (valor or "").partition("-")
+    if processo != _PROCESSO or not numero.isdigit():
+        return None
+    return int(numero)
+
+
+def _retrato():
+    """(evento "retrato" com logs, estado e progresso atuais, id do canal refletido nele)."""
+    with _LOCK:   # add_log publica segurando este lock: logs e id ficam coerentes
+        ultimo = canal_execucao.ultimo
+        logs = list(EXEC_LOGS)
+    dados = {
+        "logs": logs,
+        "em_andamento": canal_execucao.estado.get("em_andamento", False),
+        "progresso": progresso_atual(),
+    }
+    return _evento("retrato", dados, ultimo), ultimo
+
+
+def _stream(ultimo):
+    yield f"retry: {SSE_RECONEXAO_MS}\n\n"
+    eventos, completo = canal_execucao.desde(ultimo) if ultimo is not None else ([], False)
+    fim = time.monotonic() + SSE_DURACAO_MAXIMA
+
+    while True:
+        if not completo:
+            # conexão nova ou perdeu eventos demais: manda tudo de novo
+            texto, ultimo = _retrato()
+            yield texto
+        for id_evento, tipo, dados in eventos:
+            yield _evento(tipo, dados, id_evento)
+            ultimo = id_evento
+
+        restante = fim - time.monotonic()
+        if restante <= 0:
+            return
+        eventos, completo = canal_execucao.aguardar(ultimo, min(SSE_HEARTBEAT, restante))
+        if completo and not eventos:
+            yield ": ping\n\n"   # escrever num cliente que caiu encerra o gerador
+
+
+def _liberar_cliente():
+    global _clientes
+    with _clientes_lock:
+        _clientes -= 1
+
+
+@bp_logs.route("/api/eventos_execucao", methods=["GET"])
+def eventos_execucao():
+    """
+    Server-Sent Events da execução: "log" (linha do add_log), "estado"
+    (início/fim), "progresso" (rotas por origem) e "retrato" (tudo de uma
+    vez, na conexão ou quando a reconexão chega tarde demais). Reconexão
+    pelo Last-Event-ID (ou ?ultimo=).
+    """
+    global _clientes
+    with _clientes_lock:
+        if _clientes >= SSE_MAX_CLIENTES:
+            resposta = jsonify({"success": False, "error": "muitos clientes conectados"})
+            resposta.status_code = 503
+            resposta.headers["Retry-After"] = "30"
+            return resposta
+        _clientes += 1
+
+    ultimo = _ultimo_id(request.headers.get("Last-Event-ID") or request.args.get("ultimo"))
+    resposta = Response(
+        _stream(ultimo),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    resposta.call_on_close(_liberar_cliente)   # roda mesmo se o gerador nem começou
+    return resposta
@@ -0,0 +1,137 @@
+# backend/api/respostas.py
+"""
+Respostas JSON com GET condicional e compressão para os endpoints que o
+front consulta sem parar (resultados, destinos, alertas, logs).
+
+O ETag sai da versão dos dados (id + contador do banco, mtime do CSV, sequência
+do log) e não do corpo: com If-None-Match igual a resposta é um 304 sem
+montar nada. Quando há corpo, ele é montado uma vez por versão e guardado
+já comprimido (gzip e br; sem o pacote brotli, que está no requirements, só gzip).
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from flask import Response, current_app, request
+
+try:
+    import brotli
+except ImportError:   # opcional
+    brotli = None
+
+TAMANHO_MINIMO = 1024   # corpos menores vão sem compressão
+CACHE_MAXIMO = 128      # corpos guardados por processo
+
+
+class CacheRespostas:
+    """LRU de corpos por ETag: {"identity": bytes, "gzip": bytes, "br": bytes}."""
+
+    def __init__(self, maximo=CACHE_MAXIMO):
+        self.maximo = maximo
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, etag):
+        with self._lock:
+            corpos = self._itens.get(etag)
+            if corpos is not None:
+                self._itens.move_to_end(etag)
+            return corpos
+
+    def guardar(self, etag, corpos):
+        with self._lock:
+            self._itens[etag] = corpos
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+
+
+cache_respostas = CacheRespostas()
+
+# primeira vez que cada versão foi vista neste processo (Last-Modified sem relógio no banco)
+_vistas = OrderedDict()
+_vistas_lock = threading.Lock()
+
+
+def _etag(chave, versao):
+    return '"' + hashlib.sha1(repr((chave, versao)).encode("utf-8")).hexdigest()[:20] + '"'
+
+
+def _modificado_em(etag):
+    with _vistas_lock:
+        quando = _vistas.get(etag)
+        if quando is None:
+            quando = _vistas[etag] = datetime.now(timezone.utc).replace(microsecond=0)
+            while len(_vistas) > CACHE_MAXIMO * 4:
+                _vistas.popitem(last=False)
+        return quando
+
+
+def _nao_modificado(etag, modificado_em, usar_data):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        return etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+    # a data "vista pela primeira vez" difere entre workers: só vale a data real dos dados
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since and usar_data:
+        try:
+            return modificado_em <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _comprimir(corpo):
+    corpos = {"identity": corpo}
+    if len(corpo) >= TAMANHO_MINIMO:
+        corpos["gzip"] = gzip.compress(corpo, compresslevel=6)
+        if brotli is not None:
+            corpos["br"] = brotli.compress(corpo, quality=5)
+    return corpos
+
+
+def _codificacao(corpos):
+    aceitas = {
+        parte.split(";")[0].strip().lower()
+        for parte in request.headers.get("Accept-Encoding", "").split(",")
+    }
+    for codificacao in ("br", "gzip"):
+        if codificacao in corpos and codificacao in aceitas:
+            return codificacao
+    return "identity"
+
+
+def responder_json(chave, versao, montar, modificado_em=None, status=200):
+    """
+    Resposta JSON de `montar()` identificada por (chave, versao).
+    `chave` distingue variações do mesmo recurso (ex.: filtros da consulta);
+    `versao` muda sempre que os dados mudam. `modificado_em` (datetime UTC)
+    vira o Last-Modified; sem ele vale a primeira vez que a versão foi vista.
+    """
+    etag = _etag(chave, versao)
+    usar_data = modificado_em is not None
+    modificado_em = (modificado_em or _modificado_em(etag)).replace(microsecond=0)
+    cabecalhos = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(modificado_em, usegmt=True),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+
+    if _nao_modificado(etag, modificado_em, usar_data):
+        return Response(status=304, headers=cabecalhos)
+
+    corpos = cache_respostas.obter(etag)
+    if corpos is None:
+        corpo = current_app.json.dumps(montar()).encode("utf-8")
+        corpos = _comprimir(corpo)
+        cache_respostas.guardar(etag, corpos)
+
+    codificacao = _codificacao(corpos)
+    if codificacao != "identity":
+        cabecalhos["Content-Encoding"] = codificacao
+    return Response(corpos[codificacao], status=status, mimetype="application/json", headers=cabecalhos)
@@ -0,0 +1,110 @@
+# backend/api/resultados.py
+from datetime import datetime
+
+from flask import Blueprint, jsonify, request
+
+from backend.api.respostas import responder_json
+from backend.armazenamento.banco import ORDENS_OFERTAS, banco
+
+bp_resultados = Blueprint("resultados", __name__)
+
+LIMITE_PADRAO = 100     # sem `limite`, uma página (o histórico todo não sai de uma vez)
+LIMITE_MAXIMO = 1000
+
+
+def _lista(nome):
+    valor = request.args.get(nome, "")
+    return tuple(sorted({v.strip().upper() for v in valor.split(",") if v.strip()}))
+
+
+def _data(nome):
+    valor = request.args.get(nome)
+    if not valor:
+        return None
+    datetime.strptime(valor[:10], "%Y-%m-%d")   # ValueError -> 400
+    return valor
+
+
+def _inteiro(nome, padrao, minimo, maximo=None):
+    valor = request.args.get(nome)
+    if valor in (None, ""):
+        return padrao
+    numero = int(valor)
+    if numero < minimo or (maximo is not None and numero > maximo):
+        raise ValueError(f"{nome} fora da faixa")
+    return numero
+
+
+def _filtros():
+    """Parâmetros da query string validados, numa tupla hashável (chave do cache)."""
+    ordem = request.args.get("ordem", "-timestamp")
+    decrescente = ordem.startswith("-")
+    ordem = ordem.lstrip("-")
+    if ordem not in ORDENS_OFERTAS:
+        raise ValueError(f"ordem inválida (use {', '.join(ORDENS_OFERTAS)})")
+
+    preco_max = request.args.get("preco_max")
+    modo = (request.args.get("modo") or "").strip().upper() or None
+
+    limite = _inteiro("limite", LIMITE_PADRAO, 1, LIMITE_MAXIMO)
+    # offset (linhas puladas) ou pagina (a partir de 1)
+    deslocamento = _inteiro("offset", None, 0)
+    if deslocamento is None:
+        deslocamento = (_inteiro("pagina", 1, 1) - 1) * limite
+    busca = (request.args.get("busca") or "").strip().upper() or None
+
+    return (
+        ("origens", _lista("origem")),
+        ("destinos", _lista("destino")),
+        ("destino_prefixo", busca),
+        ("ida_de", _data("ida_de")),
+        ("ida_ate", _data("ida_ate")),
+        ("preco_max", float(preco_max) if preco_max else None),
+        ("modo", modo),
+        ("abaixo_baseline", request.args.get("abaixo_baseline") in ("1", "true")),
+        ("visto_desde", _data("desde")),
+        ("ordem", ordem),
+        ("decrescente", decrescente),
+        ("limite", limite),
+        ("deslocamento", deslocamento),
+    )
+
+
+def _consultar(filtros):
+    args = dict(filtros)
+    limite, deslocamento = args["limite"], args["deslocamento"]
+    consulta = banco.consultar_ofertas_atuais(**args)
+    total = consulta["total"]
+    return {
+        "success": True,
+        "results": consulta["linhas"],
+        "total": total,
+        "offset": deslocamento,
+        "pagina": deslocamento // limite + 1,
+        "limite": limite,
+        "paginas": (total + limite - 1) // limite,
+    }
+
+
+@bp_resultados.route("/api/resultados", methods=["GET"])
+def api_resultados():
+    """
+    Ofertas atuais (uma por rota + datas), paginadas (limite padrão 100).
+    Filtros: origem, destino (listas com vírgula), busca (prefixo do
+    destino), ida_de, ida_ate, desde, preco_max, modo, abaixo_baseline;
+    ordem (preco, data_ida, destino, origem, timestamp; '-' na frente =
+    decrescente); limite e offset (ou pagina).
+    """
+    try:
+        filtros = _filtros()
+    except ValueError as e:
+        return jsonify({"success": False, "results": [], "error": str(e)}), 400
+
+    try:
+        # mesma versão de ofertas_atuais + mesmos filtros = mesmo ETag e corpo já pronto
+        return responder_json(
+            ("resultados", filtros), banco.versao("ofertas_atuais"), lambda: _consultar(filtros)
+        )
+    except Exception as e:
+        print(f"🚨 Erro /api/resultados: {e}")
+        return jsonify({"success": False, "results": [], "error": str(e)}), 500
@@ -0,0 +1 @@
+# Persistência local (SQLite) compartilhada entre threads e workers do gunicorn.
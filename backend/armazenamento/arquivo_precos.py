@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Arquivo histórico de preços observados (só cresce, nunca é reescrito).
+
+Cada preço buscado vira uma Observacao e vai para uma partição por mês e
+rota: data/arquivo_precos/<AAAA-MM>/<ORIGEM>-<DESTINO>.gz. Cada lote gravado
+é um membro gzip anexado ao fim do arquivo, com os registros em
+delta + varint (instante, centavos, data de ida e duração em relação ao
+registro anterior): o mesmo preço observado de novo custa poucos bytes.
+
+`iterar(origem, destino, inicio, fim)` abre só as partições da rota e dos
+meses pedidos, sem carregar o resto do histórico.
+"""
+
+import gzip
+import os
+from datetime import date, datetime
+
+from backend.armazenamento.travas import trava_arquivo
+from backend.armazenamento.sqlite import DATA_DIR
+
+DIR_ARQUIVO = os.getenv("ARQUIVO_PRECOS_DIR", os.path.join(DATA_DIR, "arquivo_precos"))
+
+_FORMATO = "%Y-%m-%d %H:%M:%S"
+_SEM_VOLTA = -1
+
+
+class Observacao:
+    """Um preço visto numa busca (rota, datas, preço e quando)."""
+
+    __slots__ = ("timestamp", "origem", "destino", "data_ida", "data_volta", "preco", "moeda")
+
+    def __init__(self, timestamp, origem, destino, data_ida, data_volta, preco, moeda="BRL"):
+        self.timestamp = timestamp
+        self.origem = origem
+        self.destino = destino
+        self.data_ida = data_ida
+        self.data_volta = data_volta
+        self.preco = preco
+        self.moeda = moeda
+
+    def __repr__(self):
+        return (
+            f"Observacao({self.timestamp} {self.origem}->{self.destino} "
+            f"{self.data_ida}/{self.data_volta} {self.preco:.2f} {self.moeda})"
+        )
+
+
+# ---------- codificação ----------
+
+def _zigzag(n):
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def _dezigzag(n):
+    return (n >> 1) ^ -(n & 1)
+
+
+def _varint(n, saida):
+    while n > 0x7F:
+        saida.append((n & 0x7F) | 0x80)
+        n >>= 7
+    saida.append(n)
+
+
+def _ler_varint(dados, pos):
+    n = deslocamento = 0
+    while True:
+        byte = dados[pos]
+        pos += 1
+        n |= (byte & 0x7F) << deslocamento
+        if byte < 0x80:
+            return n, pos
+        deslocamento += 7
+
+
+def _segundos(timestamp):
+    return int(datetime.strptime(timestamp, _FORMATO).timestamp())
+
+
+def _campos(obs):
+    """(instante, centavos, ida, duração) inteiros de uma observação."""
+    ida = date.fromisoformat(obs.data_ida).toordinal()
+    duracao = _SEM_VOLTA
+    if obs.data_volta:
+        duracao = date.fromisoformat(obs.data_volta).toordinal() - ida
+    return _segundos(obs.timestamp), round(obs.preco * 100), ida, duracao
+
+
+def _codificar_bloco(observacoes, moeda):
+    """Cabeçalho (quantidade, moeda) + registros em delta do anterior."""
+    saida = bytearray()
+    _varint(len(observacoes), saida)
+    moeda = moeda.encode("ascii")
+    _varint(len(moeda), saida)
+    saida += moeda
+
+    anterior = (0, 0, 0, 0)
+    for obs in observacoes:
+        atual = _campos(obs)
+        for valor, ultimo in zip(atual, anterior):
+            _varint(_zigzag(valor - ultimo), saida)
+        anterior = atual
+    return gzip.compress(bytes(saida))
+
+
+def _decodificar(dados):
+    """Percorre os blocos (membros gzip já descomprimidos e concatenados)."""
+    pos = 0
+    while pos < len(dados):
+        quantidade, pos = _ler_varint(dados, pos)
+        tamanho, pos = _ler_varint(dados, pos)
+        moeda = dados[pos:pos + tamanho].decode("ascii")
+        pos += tamanho
+
+        instante = centavos = ida = duracao = 0
+        for _ in range(quantidade):
+            d, pos = _ler_varint(dados, pos)
+            instante += _dezigzag(d)
+            d, pos = _ler_varint(dados, pos)
+            centavos += _dezigzag(d)
+            d, pos = _ler_varint(dados, pos)
+            ida += _dezigzag(d)
+            d, pos = _ler_varint(dados, pos)
+            duracao += _dezigzag(d)
+            yield instante, centavos, ida, duracao, moeda
+
+
+# ---------- partições ----------
+
+def _instante(valor, fim=False):
+    """datetime, date ou texto ('AAAA-MM-DD[ HH:MM:SS]') -> segundos; None = sem limite."""
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        valor = datetime.strptime(valor, _FORMATO) if " " in valor else date.fromisoformat(valor)
+    if not isinstance(valor, datetime):
+        # só a data: o fim inclui o dia inteiro
+        valor = datetime.combine(valor, datetime.max.time() if fim else datetime.min.time())
+    return int(valor.timestamp())
+
+
+def _mes(segundos):
+    return datetime.fromtimestamp(segundos).strftime("%Y-%m")
+
+
+class ArquivoPrecos:
+    def __init__(self, diretorio=DIR_ARQUIVO):
+        self.diretorio = diretorio
+
+    def _caminho(self, mes, origem, destino):
+        return os.path.join(self.diretorio, mes, f"{origem}-{destino}.gz")
+
+    def gravar(self, observacoes):
+        """Anexa as observações às partições (um membro gzip por partição e moeda)."""
+        grupos = {}
+        for obs in observacoes:
+            chave = (obs.timestamp[:7], obs.origem, obs.destino, obs.moeda or "BRL")
+            grupos.setdefault(chave, []).append(obs)
+
+        for (mes, origem, destino, moeda), grupo in grupos.items():
+            grupo.sort(key=lambda o: (o.data_ida, o.data_volta or "", o.timestamp))
+            bloco = _codificar_bloco(grupo, moeda)
+            caminho = self._caminho(mes, origem, destino)
+            with trava_arquivo(caminho):
+                with open(caminho, "ab") as f:
+                    f.write(bloco)
+
+    def particoes(self, origem=None, destino=None, inicio=None, fim=None):
+        """Caminhos das partições que a rota e a janela [inicio, fim] tocam, em ordem de mês."""
+        if not os.path.isdir(self.diretorio):
+            return []
+        inicio, fim = _instante(inicio), _instante(fim, fim=True)
+        mes_inicio = _mes(inicio) if inicio is not None else None
+        mes_fim = _mes(fim) if fim is not None else None
+
+        caminhos = []
+        for mes in sorted(os.listdir(self.diretorio)):
+            if (mes_inicio and mes < mes_inicio) or (mes_fim and mes > mes_fim):
+                continue
+            pasta = os.path.join(self.diretorio, mes)
+            if origem and destino:
+                nomes = [f"{origem}-{destino}.gz"]
+            else:
+                nomes = sorted(os.listdir(pasta))
+            for nome in nomes:
+                if not nome.endswith(".gz"):
+                    continue
+                o, _, d = nome[:-3].partition("-")
+                if (origem and o != origem) or (destino and d != destino):
+                    continue
+                caminho = os.path.join(pasta, nome)
+                if os.path.exists(caminho):
+                    caminhos.append(caminho)
+        return caminhos
+
+    def iterar(self, origem=None, destino=None, inicio=None, fim=None):
+        """
+        Observações da rota (ou de todas, com origem/destino None) entre
+        inicio e fim. Ordem: mês a mês; dentro da partição, lote a lote.
+        """
+        limite_inicio, limite_fim = _instante(inicio), _instante(fim, fim=True)
+
+        for caminho in self.particoes(origem, destino, inicio, fim):
+            rota = os.path.basename(caminho)[:-3]
+            o, _, d = rota.partition("-")
+            with trava_arquivo(caminho, exclusiva=False):
+                with open(caminho, "rb") as f:
+                    dados = gzip.decompress(f.read())
+
+            for instante, centavos, ida, duracao, moeda in _decodificar(dados):
+                if limite_inicio is not None and instante < limite_inicio:
+                    continue
+                if limite_fim is not None and instante > limite_fim:
+                    continue
+                yield Observacao(
+                    datetime.fromtimestamp(instante).strftime(_FORMATO),
+                    o, d,
+                    date.fromordinal(ida).isoformat(),
+                    date.fromordinal(ida + duracao).isoformat() if duracao != _SEM_VOLTA else None,
+                    centavos / 100,
+                    moeda,
+                )
+
+
+arquivo_precos = ArquivoPrecos()
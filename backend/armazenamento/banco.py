@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+"""
+Banco principal do Partiu085 (SQLite em WAL): ofertas encontradas,
+alertas fixos e histórico de buscas. Substitui os CSVs/JSON que eram
+relidos inteiros a cada requisição; os índices por rota, datas e
+timestamp mantêm as leituras rápidas com milhões de linhas.
+Os arquivos antigos entram uma única vez pelo importar_csv.py.
+"""
+
+import os
+
+from backend.armazenamento.sqlite import DATA_DIR, ConexaoPorThread
+
+CAMINHO_BANCO = os.getenv("PARTIU_DB_PATH", os.path.join(DATA_DIR, "partiu085.sqlite3"))
+
+COLUNAS_RESULTADOS = (
+    "origem", "destino", "data_ida", "data_volta",
+    "preco", "moeda", "link", "timestamp",
+    "modo", "baseline",
+)
+# Estado atual de cada (rota, datas): o que o /api/resultados entrega
+COLUNAS_OFERTAS_ATUAIS = COLUNAS_RESULTADOS + (
+    "primeiro_visto", "preco_anterior", "menor_preco",
+)
+COLUNAS_ALERTAS = ("id", "origem", "destino", "data_ida", "data_volta", "preco_alvo")
+COLUNAS_HISTORICO = ("timestamp", "origem", "destino", "preco", "data_ida", "data_volta", "baseline")
+
+
+def _criar_tabelas(con):
+    con.executescript("""
+        CREATE TABLE IF NOT EXISTS resultados (
+            id INTEGER PRIMARY KEY,
+            origem TEXT NOT NULL,
+            destino TEXT NOT NULL,
+            data_ida TEXT,
+            data_volta TEXT,
+            preco REAL,
+            moeda TEXT,
+            link TEXT,
+            timestamp TEXT,
+            modo TEXT,
+            baseline REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_resultados_rota ON resultados (origem, destino);
+        CREATE INDEX IF NOT EXISTS idx_resultados_datas ON resultados (data_ida, data_volta);
+        CREATE INDEX IF NOT EXISTS idx_resultados_timestamp ON resultados (timestamp);
+
+        -- data_volta '' = só ida (NULL não entraria na chave única)
+        CREATE TABLE IF NOT EXISTS ofertas_atuais (
+            origem TEXT NOT NULL,
+            destino TEXT NOT NULL,
+            data_ida TEXT NOT NULL,
+            data_volta TEXT NOT NULL DEFAULT '',
+            preco REAL,
+            moeda TEXT,
+            link TEXT,
+            modo TEXT,
+            baseline REAL,
+            preco_anterior REAL,
+            menor_preco REAL,
+            primeiro_visto TEXT,
+            ultimo_visto TEXT,
+            PRIMARY KEY (origem, destino, data_ida, data_volta)
+        );
+        CREATE INDEX IF NOT EXISTS idx_ofertas_atuais_visto ON ofertas_atuais (ultimo_visto);
+        CREATE INDEX IF NOT EXISTS idx_ofertas_atuais_destino ON ofertas_atuais (destino, data_ida);
+        CREATE INDEX IF NOT EXISTS idx_ofertas_atuais_ida ON ofertas_atuais (data_ida);
+        CREATE INDEX IF NOT EXISTS idx_ofertas_atuais_preco ON ofertas_atuais (preco);
+
+        -- contador por tabela, somado a cada escrita (chave dos caches de leitura)
+        CREATE TABLE IF NOT EXISTS versoes (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL
+        );
+
+        -- id aleatório gerado quando o arquivo do banco é criado: banco
+        -- recriado recomeça os contadores, mas não repete os ETags antigos
+        CREATE TABLE IF NOT EXISTS metadados (
+            chave TEXT PRIMARY KEY,
+            valor TEXT NOT NULL
+        );
+        INSERT OR IGNORE INTO metadados (chave, valor) VALUES ('instancia', lower(hex(randomblob(8))));
+
+        CREATE TABLE IF NOT EXISTS alertas (
+            id TEXT PRIMARY KEY,
+            origem TEXT NOT NULL,
+            destino TEXT NOT NULL,
+            data_ida TEXT,
+            data_volta TEXT,
+            preco_alvo REAL
+        );
+
+        CREATE TABLE IF NOT EXISTS historico_buscas (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT NOT NULL,
+            origem TEXT NOT NULL,
+            destino TEXT NOT NULL,
+            preco REAL,
+            data_ida TEXT,
+            data_volta TEXT,
+            baseline REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_historico_rota ON historico_buscas (origem, destino, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_historico_timestamp ON historico_buscas (timestamp);
+
+        CREATE TABLE IF NOT EXISTS baselines_rotas (
+            origem TEXT NOT NULL,
+            destino TEXT NOT NULL,
+            estado TEXT NOT NULL,
+            atualizado TEXT NOT NULL,
+            PRIMARY KEY (origem, destino)
+        );
+
+        CREATE TABLE IF NOT EXISTS importacoes (
+            arquivo TEXT PRIMARY KEY,
+            importado_em TEXT NOT NULL,
+            linhas INTEGER NOT NULL
+        );
+    """)
+
+
+# Última observação de cada chave vence; preço anterior só muda quando o preço muda
+_UPSERT_OFERTA = """
+    INSERT INTO ofertas_atuais (
+        origem, destino, data_ida, data_volta, preco, moeda, link, modo, baseline,
+        menor_preco, primeiro_visto, ultimo_visto
+    )
+    VALUES (?, ?, ?, COALESCE(?, ''), ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (origem, destino, data_ida, data_volta) DO UPDATE SET
+        preco_anterior = CASE WHEN excluded.preco <> ofertas_atuais.preco
+                              THEN ofertas_atuais.preco ELSE ofertas_atuais.preco_anterior END,
+        preco = excluded.preco,
+        moeda = excluded.moeda,
+        link = excluded.link,
+        modo = excluded.modo,
+        baseline = excluded.baseline,
+        menor_preco = MIN(COALESCE(ofertas_atuais.menor_preco, excluded.preco), excluded.preco),
+        ultimo_visto = excluded.ultimo_visto
+    WHERE excluded.ultimo_visto >= COALESCE(ofertas_atuais.ultimo_visto, '')
+"""
+
+
+def _linha_oferta_atual(linha):
+    """Linha de COLUNAS_RESULTADOS -> parâmetros do _UPSERT_OFERTA."""
+    o = dict(zip(COLUNAS_RESULTADOS, linha))
+    return (
+        o["origem"], o["destino"], o["data_ida"], o["data_volta"], o["preco"],
+        o["moeda"], o["link"], o["modo"], o["baseline"],
+        o["preco"], o["timestamp"], o["timestamp"],
+    )
+
+
+# Ordenações aceitas em consultar_ofertas_atuais (nome público -> coluna)
+ORDENS_OFERTAS = {
+    "preco": "preco",
+    "data_ida": "data_ida",
+    "destino": "destino",
+    "origem": "origem",
+    "timestamp": "ultimo_visto",
+}
+
+
+def sql_insert(tabela, colunas, ignorar=False):
+    return (
+        f"INSERT {'OR IGNORE ' if ignorar else ''}INTO {tabela} ({', '.join(colunas)}) "
+        f"VALUES ({', '.join('?' * len(colunas))})"
+    )
+
+
+class BancoPartiu:
+    def __init__(self, caminho=CAMINHO_BANCO):
+        self.caminho = caminho
+        self._con = ConexaoPorThread(caminho, _criar_tabelas)
+
+    def conexao(self):
+        return self._con()
+
+    # ---------- versões ----------
+
+    def tocar_versao(self, con, tabela):
+        con.execute(
+            "INSERT INTO versoes (tabela, versao) VALUES (?, 1) "
+            "ON CONFLICT (tabela) DO UPDATE SET versao = versao + 1",
+            (tabela,),
+        )
+
+    def versao(self, tabela):
+        """
+        (id do banco, contador) — muda a cada escrita na tabela, em qualquer
+        worker; contador 0 = nunca escrita. O id separa um banco recriado do
+        anterior (os contadores recomeçam do zero).
+        """
+        row = self._con().execute(
+            "SELECT (SELECT valor FROM metadados WHERE chave = 'instancia') AS instancia, "
+            "(SELECT versao FROM versoes WHERE tabela = ?) AS versao",
+            (tabela,),
+        ).fetchone()
+        return row["instancia"], row["versao"] or 0
+
+    # ---------- resultados ----------
+
+    def inserir_resultados(self, linhas):
+        """
+        Linhas na ordem de COLUNAS_RESULTADOS (uma transação por lote):
+        entram no log de resultados e atualizam ofertas_atuais.
+        """
+        con = self._con()
+        with con:
+            con.executemany(sql_insert("resultados", COLUNAS_RESULTADOS), linhas)
+            self._atualizar_ofertas(con, linhas)
+            self.tocar_versao(con, "ofertas_atuais")
+
+    def _atualizar_ofertas(self, con, linhas):
+        con.executemany(
+            _UPSERT_OFERTA,
+            [_linha_oferta_atual(l) for l in linhas if l[2]],   # sem data de ida não há chave
+        )
+
+    def reconstruir_ofertas_atuais(self, con):
+        """Refaz ofertas_atuais a partir do log de resultados inteiro (na ordem de chegada)."""
+        con.execute("DELETE FROM ofertas_atuais")
+        cursor = con.execute(f"SELECT {', '.join(COLUNAS_RESULTADOS)} FROM resultados ORDER BY id")
+        while True:
+            linhas = [tuple(row) for row in cursor.fetchmany(5000)]
+            if not linhas:
+                break
+            self._atualizar_ofertas(con, linhas)
+        self.tocar_versao(con, "ofertas_atuais")
+        return con.execute("SELECT COUNT(*) FROM ofertas_atuais").fetchone()[0]
+
+    def listar_ofertas_atuais(self):
+        """Uma linha por (rota, datas), com `timestamp` = última vez vista; mais recentes primeiro."""
+        return self.consultar_ofertas_atuais()["linhas"]
+
+    def consultar_ofertas_atuais(
+        self, origens=None, destinos=None, destino_prefixo=None, ida_de=None, ida_ate=None,
+        preco_max=None, modo=None, abaixo_baseline=False, visto_desde=None,
+        ordem="timestamp", decrescente=True, limite=None, deslocamento=0,
+    ):
+        """
+        Filtra, ordena e pagina ofertas_atuais no próprio SQLite (índices por
+        destino, data de ida, preço e última vez vista).
+        Retorna {"total": linhas que passam no filtro, "linhas": [página]}.
+        """
+        condicoes, params = [], []
+        if origens:
+            condicoes.append(f"origem IN ({', '.join('?' * len(origens))})")
+            params += origens
+        if destinos:
+            condicoes.append(f"destino IN ({', '.join('?' * len(destinos))})")
+            params += destinos
+        if destino_prefixo:
+            # prefixo usa o índice de destino (LIKE não usaria sem COLLATE NOCASE)
+            condicoes.append("destino >= ? AND destino < ?")
+            params += [destino_prefixo, destino_prefixo + "\uffff"]
+        if ida_de:
+            condicoes.append("data_ida >= ?")
+            params.append(ida_de)
+        if ida_ate:
+            condicoes.append("data_ida <= ?")
+            params.append(ida_ate)
+        if preco_max is not None:
+            condicoes.append("preco <= ?")
+            params.append(preco_max)
+        if modo:
+            condicoes.append("modo = ?")
+            params.append(modo)
+        if abaixo_baseline:
+            condicoes.append("baseline > 0 AND preco <= baseline")
+        if visto_desde:
+            condicoes.append("ultimo_visto >= ?")
+            params.append(visto_desde)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+
+        con = self._con()
+        total = con.execute(f"SELECT COUNT(*) FROM ofertas_atuais {where}", params).fetchone()[0]
+
+        coluna = ORDENS_OFERTAS[ordem]
+        direcao = "DESC" if decrescente else "ASC"
+        sql = (
+            f"SELECT {', '.join(c for c in COLUNAS_OFERTAS_ATUAIS if c != 'timestamp')}, "
+            f"ultimo_visto AS timestamp FROM ofertas_atuais {where} "
+            f"ORDER BY {coluna} {direcao}, ultimo_visto DESC, origem, destino, data_ida, data_volta"
+        )
+        if limite is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [limite, deslocamento]
+
+        linhas = [
+            {
+                **{c: row[c] for c in COLUNAS_OFERTAS_ATUAIS},
+                "data_volta": row["data_volta"] or None,
+            }
+            for row in con.execute(sql, params)
+        ]
+        return {"total": total, "linhas": linhas}
+
+    def listar_resultados(self, limite=None):
+        sql = f"SELECT {', '.join(COLUNAS_RESULTADOS)} FROM resultados ORDER BY id"
+        params = ()
+        if limite:
+            # últimas `limite` ofertas, ainda na ordem de inserção
+            sql = (
+                f"SELECT * FROM (SELECT id, {', '.join(COLUNAS_RESULTADOS)} FROM resultados "
+                f"ORDER BY id DESC LIMIT ?) ORDER BY id"
+            )
+            params = (limite,)
+        return [
+            {c: row[c] for c in COLUNAS_RESULTADOS}
+            for row in self._con().execute(sql, params)
+        ]
+
+    def resumo_resultados(self):
+        row = self._con().execute(
+            "SELECT COUNT(*) AS total, MAX(timestamp) AS ultima FROM resultados"
+        ).fetchone()
+        return {"total_registros": row["total"], "ultima_atualizacao": row["ultima"]}
+
+    # ---------- alertas ----------
+
+    def listar_alertas(self):
+        return [
+            dict(row) for row in self._con().execute(
+                f"SELECT {', '.join(COLUNAS_ALERTAS)} FROM alertas ORDER BY rowid"
+            )
+        ]
+
+    def criar_alerta(self, alerta):
+        con = self._con()
+        with con:
+            con.execute(
+                sql_insert("alertas", COLUNAS_ALERTAS),
+                tuple(alerta.get(c) for c in COLUNAS_ALERTAS),
+            )
+            self.tocar_versao(con, "alertas")
+
+    def remover_alerta(self, id_alerta):
+        con = self._con()
+        with con:
+            removidos = con.execute("DELETE FROM alertas WHERE id = ?", (id_alerta,)).rowcount
+            if removidos:
+                self.tocar_versao(con, "alertas")
+            return removidos
+
+    # ---------- histórico de buscas ----------
+
+    def inserir_historico(self, linhas):
+        """Linhas na ordem de COLUNAS_HISTORICO."""
+        con = self._con()
+        with con:
+            con.executemany(sql_insert("historico_buscas", COLUNAS_HISTORICO), linhas)
+
+    def resumo_buscas_rotas(self, desde):
+        """Por rota: última busca, quantas buscas e menor preço visto a partir de `desde`."""
+        return self._con().execute("""
+            SELECT origem, destino,
+                   MAX(timestamp) AS ultima_busca,
+                   COUNT(*) AS buscas,
+                   MIN(CASE WHEN timestamp >= ? THEN preco END) AS menor_recente
+              FROM historico_buscas
+             GROUP BY origem, destino
+        """, (desde,)).fetchall()
+
+    def observacoes_preco(self, desde):
+        """
+        Preços com datas e baseline (histórico + ofertas salvas) a partir de
+        `desde`; alimenta o explorador de datas. A oferta salva também está
+        no histórico: o GROUP BY (rota, datas, dia, preço) conta uma vez só.
+        """
+        return self._con().execute("""
+            SELECT MIN(timestamp) AS timestamp, origem, destino, preco, data_ida, data_volta,
+                   MIN(baseline) AS baseline
+              FROM (
+                SELECT timestamp, origem, destino, preco, data_ida, data_volta, baseline
+                  FROM historico_buscas
+                 WHERE timestamp >= ?
+                   AND data_ida IS NOT NULL AND data_volta IS NOT NULL AND baseline IS NOT NULL
+                UNION ALL
+                SELECT timestamp, origem, destino, preco, data_ida, data_volta, baseline
+                  FROM resultados
+                 WHERE timestamp >= ?
+                   AND data_ida IS NOT NULL AND data_volta IS NOT NULL AND baseline IS NOT NULL
+              )
+             GROUP BY origem, destino, data_ida, data_volta, substr(timestamp, 1, 10), preco
+        """, (desde, desde))
+
+    # ---------- baselines vivos ----------
+
+    def ler_baselines(self):
+        return self._con().execute("SELECT origem, destino, estado FROM baselines_rotas").fetchall()
+
+    def gravar_baselines(self, linhas, substituir=True):
+        """
+        Linhas (origem, destino, estado JSON, atualizado). substituir=False
+        só grava rotas que ainda não têm estado (semeadura inicial).
+        """
+        con = self._con()
+        with con:
+            con.executemany(
+                f"INSERT OR {'REPLACE' if substituir else 'IGNORE'} INTO baselines_rotas "
+                "(origem, destino, estado, atualizado) VALUES (?, ?, ?, ?)",
+                linhas,
+            )
+
+    def mesclar_baselines(self, chaves, mesclar, atualizado):
+        """
+        Lê, mescla e grava o estado das rotas numa única transação de escrita:
+        `mesclar((origem, destino), estado JSON ou None)` devolve o estado novo.
+        O web (MANUAL) e o agendador (AUTO) somam suas observações em vez de
+        um sobrescrever o outro.
+        """
+        con = self._con()
+        with con:
+            con.execute("BEGIN IMMEDIATE")
+            linhas = []
+            for origem, destino in chaves:
+                row = con.execute(
+                    "SELECT estado FROM baselines_rotas WHERE origem = ? AND destino = ?",
+                    (origem, destino),
+                ).fetchone()
+                estado = mesclar((origem, destino), row["estado"] if row else None)
+                linhas.append((origem, destino, estado, atualizado))
+            con.executemany(
+                "INSERT OR REPLACE INTO baselines_rotas (origem, destino, estado, atualizado) "
+                "VALUES (?, ?, ?, ?)",
+                linhas,
+            )
+
+    # ---------- importação ----------
+
+    def ja_importado(self, arquivo):
+        return self._con().execute(
+            "SELECT 1 FROM importacoes WHERE arquivo = ?", (arquivo,)
+        ).fetchone() is not None
+
+    def reivindicar_importacao(self, con, arquivo, quando):
+        """
+        Marca o arquivo como importado dentro da transação `con`, antes de
+        inserir as linhas; False se outro worker já o marcou (não importar).
+        """
+        cur = con.execute(
+            "INSERT INTO importacoes (arquivo, importado_em, linhas) VALUES (?, ?, 0) "
+            "ON CONFLICT (arquivo) DO NOTHING",
+            (arquivo, quando),
+        )
+        return cur.rowcount == 1
+
+    def registrar_importacao(self, con, arquivo, linhas, quando):
+        con.execute(
+            "INSERT OR REPLACE INTO importacoes (arquivo, importado_em, linhas) VALUES (?, ?, ?)",
+            (arquivo, quando, linhas),
+        )
+
+
+banco = BancoPartiu()
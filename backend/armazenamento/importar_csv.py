@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Importação única dos arquivos antigos para o banco (banco.py):
+resultados_v2.csv, resultados.json, alertas_fixos.csv e historico_buscas.csv.
+Cada arquivo entra uma vez só (tabela `importacoes`, reivindicada na
+mesma transação das linhas: dois workers subindo juntos não duplicam
+nada); os originais ficam intocados. Depois disso a tabela ofertas_atuais
+é montada a partir do log de resultados.
+
+Roda sozinho na subida do app.py, ou manualmente:
+
+    python -m backend.armazenamento.importar_csv
+"""
+
+import json
+import os
+from datetime import datetime
+
+from backend.armazenamento.banco import (
+    COLUNAS_ALERTAS,
+    COLUNAS_HISTORICO,
+    COLUNAS_RESULTADOS,
+    banco as banco_padrao,
+    sql_insert,
+)
+from backend.armazenamento.travas import ler_csv
+from backend.armazenamento.sqlite import DATA_DIR
+
+MARCA_OFERTAS_ATUAIS = "ofertas_atuais"
+
+
+def _numero(valor):
+    if valor in (None, ""):
+        return None
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _texto(valor):
+    return valor if valor not in ("", None) else None
+
+
+def _linha_resultado(row):
+    numericas = {"preco", "baseline"}
+    return tuple(
+        _numero(row.get(c)) if c in numericas else _texto(row.get(c))
+        for c in COLUNAS_RESULTADOS
+    )
+
+
+def _ler_resultados_json(caminho):
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    if isinstance(dados, list):
+        return dados
+    return (
+        dados.get("results")
+        or dados.get("resultados")
+        or dados.get("lista")
+        or dados.get("ofertas")
+        or []
+    )
+
+
+def _fontes(data_dir):
+    """(arquivo, tabela, colunas, leitor, conversor) de cada arquivo legado."""
+    return [
+        ("resultados_v2.csv", "resultados", COLUNAS_RESULTADOS,
+         ler_csv, _linha_resultado),
+        ("resultados.json", "resultados", COLUNAS_RESULTADOS,
+         _ler_resultados_json, _linha_resultado),
+        ("alertas_fixos.csv", "alertas", COLUNAS_ALERTAS,
+         ler_csv, lambda r: tuple(
+             _numero(r.get(c)) if c == "preco_alvo" else _texto(r.get(c)) for c in COLUNAS_ALERTAS
+         )),
+        ("historico_buscas.csv", "historico_buscas", COLUNAS_HISTORICO,
+         ler_csv, lambda r: tuple(
+             _numero(r.get(c)) if c in ("preco", "baseline") else _texto(r.get(c))
+             for c in COLUNAS_HISTORICO
+         )),
+    ]
+
+
+def importar_legado(banco=None, data_dir=DATA_DIR, log=print):
+    """Importa o que ainda não foi importado; retorna {arquivo: linhas}."""
+    banco = banco or banco_padrao
+    importados = {}
+
+    for arquivo, tabela, colunas, ler, converter in _fontes(data_dir):
+        caminho = os.path.join(data_dir, arquivo)
+        if not os.path.exists(caminho) or banco.ja_importado(arquivo):
+            continue
+        try:
+            linhas = [converter(row) for row in ler(caminho)]
+        except Exception as e:
+            log(f"⚠️ Importação de {arquivo} falhou: {e}")
+            continue
+
+        # linhas sem rota não servem para nada
+        linhas = [l for l in linhas if l[colunas.index("origem")] and l[colunas.index("destino")]]
+
+        agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        con = banco.conexao()
+        with con:
+            # o ja_importado lá em cima é só um atalho; quem decide é esta reivindicação
+            if not banco.reivindicar_importacao(con, arquivo, agora):
+                continue
+            con.executemany(sql_insert(tabela, colunas, ignorar=(tabela == "alertas")), linhas)
+            banco.tocar_versao(con, tabela)
+            banco.registrar_importacao(con, arquivo, len(linhas), agora)
+        importados[arquivo] = len(linhas)
+        log(f"📥 {arquivo}: {len(linhas)} linhas importadas para o banco")
+
+    # ofertas_atuais sai do log de resultados (bancos anteriores a ela e legado recém-importado)
+    reconstruir = any(arquivo.startswith("resultados") for arquivo in importados)
+    if reconstruir or not banco.ja_importado(MARCA_OFERTAS_ATUAIS):
+        agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        con = banco.conexao()
+        with con:
+            if reconstruir or banco.reivindicar_importacao(con, MARCA_OFERTAS_ATUAIS, agora):
+                total = banco.reconstruir_ofertas_atuais(con)
+                banco.registrar_importacao(con, MARCA_OFERTAS_ATUAIS, total, agora)
+                importados[MARCA_OFERTAS_ATUAIS] = total
+        if MARCA_OFERTAS_ATUAIS in importados:
+            log(f"📥 ofertas_atuais: {total} ofertas (rota + datas) montadas a partir dos resultados")
+
+    return importados
+
+
+if __name__ == "__main__":
+    resultado = importar_legado()
+    if not resultado:
+        print("✔ Nada a importar (arquivos ausentes ou já importados).")
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Escrita em lotes, segura entre threads.
+As linhas ficam num buffer e vão para o destino de uma vez (por tamanho,
+por tempo, no fim da execução e no shutdown); quem grava de fato é a
+função `gravar(linhas)` recebida (ex.: BancoPartiu.inserir_resultados).
+Se o lote falha, as linhas são regravadas uma a uma: só as que falham de
+novo saem do buffer, para uma quarentena limitada (com log), e o resto
+do lote é gravado normalmente.
+"""
+
+import atexit
+import os
+import threading
+from collections import deque
+
+LOTE_PADRAO = int(os.getenv("RESULTADOS_LOTE", "50"))
+INTERVALO_PADRAO = float(os.getenv("RESULTADOS_INTERVALO", "2"))
+QUARENTENA_MAX = 200   # linhas rejeitadas guardadas para inspeção (as mais recentes)
+
+
+class EscritorEmLotes:
+    def __init__(self, gravar, nome="lotes", lote=LOTE_PADRAO, intervalo=INTERVALO_PADRAO):
+        self.gravar = gravar
+        self.nome = nome
+        self.lote = lote
+        self.intervalo = intervalo
+        self._buffer = []
+        self.quarentena = deque(maxlen=QUARENTENA_MAX)   # (linha, erro)
+        self.rejeitadas = 0
+        self._lock = threading.Lock()
+        self._descarga = threading.Lock()   # uma descarga por vez no processo
+        self._acordar = threading.Event()
+        self._thread = None
+        self._pid = None
+        atexit.register(self.descarregar)
+
+    def adicionar(self, linha):
+        with self._lock:
+            self._buffer.append(linha)
+            cheio = len(self._buffer) >= self.lote
+            self._garantir_thread()
+        if cheio:
+            self._acordar.set()
+
+    def _garantir_thread(self):
+        # thread herdada de outro processo (fork) não existe mais
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._loop, name=f"escritor-{self.nome}", daemon=True
+            )
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            try:
+                self.descarregar()
+            except Exception as e:
+                print(f"⚠️ Falha ao gravar {self.nome}: {e}")
+
+    def descarregar(self):
+        """Grava tudo o que está no buffer; retorna quantas linhas foram escritas."""
+        with self._descarga:
+            with self._lock:
+                linhas, self._buffer = self._buffer, []
+            if not linhas:
+                return 0
+            try:
+                self.gravar(linhas)
+                return len(linhas)
+            except Exception as e:
+                print(f"⚠️ Lote de {len(linhas)} {self.nome} falhou ({e}) — gravando linha a linha")
+            return self._gravar_uma_a_uma(linhas)
+
+    def _gravar_uma_a_uma(self, linhas):
+        """Isola as linhas ruins: elas vão para a quarentena e não travam as próximas descargas."""
+        gravadas = 0
+        for linha in linhas:
+            try:
+                self.gravar([linha])
+                gravadas += 1
+            except Exception as e:
+                self.rejeitadas += 1
+                self.quarentena.append((linha, str(e)))
+                print(f"🚫 {self.nome}: linha descartada ({e}): {linha!r}"[:500])
+        return gravadas
+
+    def pendentes(self):
+        with self._lock:
+            return len(self._buffer)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Conexões SQLite em modo WAL.
+Cada thread (e cada worker do gunicorn) abre a sua própria conexão para o
+mesmo arquivo; o SQLite cuida do lock entre processos.
+"""
+
+import os
+import sqlite3
+import threading
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.abspath(os.path.join(ROOT_DIR, "..", "data"))
+
+
+def conectar(caminho):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    con = sqlite3.connect(caminho, timeout=30)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+
+class ConexaoPorThread:
+    """Entrega uma conexão por thread; `inicializar(con)` roda uma vez por conexão."""
+
+    def __init__(self, caminho, inicializar=None):
+        self.caminho = caminho
+        self._inicializar = inicializar
+        self._local = threading.local()
+
+    def __call__(self):
+        con = getattr(self._local, "con", None)
+        # conexão herdada de outro processo (fork) não pode ser reaproveitada
+        if con is None or self._local.pid != os.getpid():
+            con = conectar(self.caminho)
+            if self._inicializar:
+                with con:
+                    self._inicializar(con)
+            self._local.con = con
+            self._local.pid = os.getpid()
+        return con
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Lock de arquivo entre processos (<arquivo>.lock ao lado do original).
+Usado pelo arquivo de preços (gravação de várias threads/workers) e pela
+leitura dos CSVs legados no importador: quem lê com ler_csv nunca pega
+uma escrita pela metade.
+"""
+
+import contextlib
+import csv
+import os
+
+try:
+    import fcntl
+except ImportError:          # Windows
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+@contextlib.contextmanager
+def trava_arquivo(caminho, exclusiva=True):
+    """Lock entre processos num arquivo .lock ao lado de `caminho` (sem lock disponível: só segue)."""
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    with open(caminho + ".lock", "a+b") as trava:
+        if fcntl is not None:
+            fcntl.flock(trava.fileno(), fcntl.LOCK_EX if exclusiva else fcntl.LOCK_SH)
+        elif msvcrt is not None:
+            trava.seek(0)
+            msvcrt.locking(trava.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(trava.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                trava.seek(0)
+                msvcrt.locking(trava.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def ler_csv(caminho, **kwargs):
+    """Lê o CSV inteiro (lista de dicts) sob lock compartilhado."""
+    if not os.path.exists(caminho):
+        return []
+    with trava_arquivo(caminho, exclusiva=False):
+        with open(caminho, "r", encoding="utf-8-sig", newline="") as f:
+            return list(csv.DictReader(f, **kwargs))
+
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Cache persistente (SQLite) das respostas da Amadeus.
+Chave = endpoint + parâmetros normalizados. Compartilhado por todos os
+workers do gunicorn e sobrevive a restarts; expira por TTL e descarta as
+entradas menos usadas (LRU) quando passa do tamanho máximo.
+Uma leitura não escreve no banco (o SQLite tem um único escritor): hits e
+misses ficam em memória e vão para o banco de tempos em tempos, e o
+horário de acesso do LRU só é atualizado quando está velho.
+"""
+
+import json
+import os
+import threading
+import time
+
+from backend.armazenamento.sqlite import DATA_DIR, ConexaoPorThread
+
+CAMINHO_CACHE = os.getenv("AMADEUS_CACHE_PATH", os.path.join(DATA_DIR, "cache_amadeus.sqlite3"))
+CACHE_TTL = int(os.getenv("AMADEUS_CACHE_TTL", "900"))          # segundos
+CACHE_MAX_BYTES = int(float(os.getenv("AMADEUS_CACHE_MAX_MB", "50")) * 1024 * 1024)
+
+ACESSO_RESOLUCAO = 60       # s; precisão do "acessado" usado pelo LRU
+CONTADORES_INTERVALO = 30   # s entre gravações dos contadores de hit/miss
+
+
+def _criar_tabelas(con):
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS respostas (
+            chave TEXT PRIMARY KEY,
+            corpo TEXT NOT NULL,
+            criado REAL NOT NULL,
+            acessado REAL NOT NULL,
+            tamanho INTEGER NOT NULL
+        )
+    """)
+    con.execute("CREATE INDEX IF NOT EXISTS idx_respostas_acessado ON respostas (acessado)")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS contadores (
+            nome TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL
+        )
+    """)
+
+
+def chave_consulta(endpoint, params):
+    """Normaliza a consulta: ordem dos parâmetros e caixa dos códigos não importam."""
+    normalizados = sorted(
+        (str(k), str(v).strip().upper()) for k, v in (params or {}).items() if v is not None
+    )
+    return endpoint + "?" + "&".join(f"{k}={v}" for k, v in normalizados)
+
+
+class CacheRespostas:
+    def __init__(self, caminho=CAMINHO_CACHE, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._con = ConexaoPorThread(caminho, _criar_tabelas)
+        self._contadores = {"hits": 0, "misses": 0}   # ainda não gravados
+        self._contadores_lock = threading.Lock()
+        self._gravados_em = time.monotonic()
+
+    def _contar(self, nome):
+        with self._contadores_lock:
+            self._contadores[nome] += 1
+            if time.monotonic() - self._gravados_em < CONTADORES_INTERVALO:
+                return
+        self.gravar_contadores()
+
+    def gravar_contadores(self):
+        """Soma no banco os hits/misses acumulados em memória."""
+        with self._contadores_lock:
+            pendentes = [(nome, valor) for nome, valor in self._contadores.items() if valor]
+            self._contadores = {"hits": 0, "misses": 0}
+            self._gravados_em = time.monotonic()
+        if not pendentes:
+            return
+        try:
+            con = self._con()
+            with con:
+                con.executemany(
+                    "INSERT INTO contadores (nome, valor) VALUES (?, ?) "
+                    "ON CONFLICT(nome) DO UPDATE SET valor = valor + excluded.valor",
+                    pendentes,
+                )
+        except Exception as e:
+            print(f"⚠️ Cache Amadeus indisponível (contadores): {e}")
+
+    def obter(self, endpoint, params):
+        """Resposta em cache (dict) ou None. Conta hit/miss."""
+        if self.ttl <= 0:
+            return None
+        chave = chave_consulta(endpoint, params)
+        agora = time.time()
+        try:
+            con = self._con()
+            row = con.execute(
+                "SELECT corpo, criado, acessado FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if row and agora - row["criado"] < self.ttl:
+                resposta = json.loads(row["corpo"])
+                self._contar("hits")
+                if agora - row["acessado"] >= ACESSO_RESOLUCAO:
+                    self._tocar(con, chave, agora)
+                return resposta
+            self._contar("misses")
+        except Exception as e:
+            print(f"⚠️ Cache Amadeus indisponível (leitura): {e}")
+        return None
+
+    def _tocar(self, con, chave, agora):
+        # só ordena o LRU: com o banco ocupado, fica para o próximo acesso
+        try:
+            with con:
+                con.execute("UPDATE respostas SET acessado = ? WHERE chave = ?", (agora, chave))
+        except Exception:
+            pass
+
+    def gravar(self, endpoint, params, resposta):
+        if self.ttl <= 0:
+            return
+        chave = chave_consulta(endpoint, params)
+        corpo = json.dumps(resposta, ensure_ascii=False, separators=(",", ":"))
+        agora = time.time()
+        try:
+            con = self._con()
+            with con:
+                con.execute(
+                    "INSERT OR REPLACE INTO respostas (chave, corpo, criado, acessado, tamanho) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (chave, corpo, agora, agora, len(corpo)),
+                )
+                con.execute("DELETE FROM respostas WHERE criado < ?", (agora - self.ttl,))
+                self._despejar_lru(con)
+        except Exception as e:
+            print(f"⚠️ Cache Amadeus indisponível (escrita): {e}")
+
+    def _despejar_lru(self, con):
+        total = con.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excesso = total - self.max_bytes
+        liberado = 0
+        remover = []
+        for row in con.execute("SELECT chave, tamanho FROM respostas ORDER BY acessado"):
+            remover.append((row["chave"],))
+            liberado += row["tamanho"]
+            if liberado >= excesso:
+                break
+        con.executemany("DELETE FROM respostas WHERE chave = ?", remover)
+
+    def limpar(self):
+        with self._contadores_lock:
+            self._contadores = {"hits": 0, "misses": 0}
+        con = self._con()
+        with con:
+            con.execute("DELETE FROM respostas")
+            con.execute("DELETE FROM contadores")
+
+    def estatisticas(self):
+        self.gravar_contadores()
+        con = self._con()
+        contadores = {r["nome"]: r["valor"] for r in con.execute("SELECT nome, valor FROM contadores")}
+        entradas, tamanho = con.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM respostas"
+        ).fetchone()
+        hits = contadores.get("hits", 0)
+        misses = contadores.get("misses", 0)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "taxa_acerto": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "entradas": entradas,
+            "bytes": tamanho,
+            "ttl": self.ttl,
+            "max_bytes": self.max_bytes,
+        }
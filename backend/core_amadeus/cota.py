@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Contador persistente de chamadas à Amadeus por chave e por dia (SQLite),
+compartilhado entre os workers. Serve de base para o orçamento da
+varredura AUTO (core_milhas/planejador.py) e para /api/amadeus/cota.
+"""
+
+import calendar
+import contextvars
+import os
+from datetime import date
+
+from backend.armazenamento.sqlite import DATA_DIR, ConexaoPorThread
+
+CAMINHO_COTA = os.getenv("AMADEUS_COTA_PATH", os.path.join(DATA_DIR, "cota_amadeus.sqlite3"))
+
+# Chamadas por mês por chave (0 = sem limite). AMADEUS_COTA_MENSAL_n sobrescreve a chave n.
+COTA_MENSAL = int(os.getenv("AMADEUS_COTA_MENSAL", "0"))
+
+# Orçamento da execução AUTO em curso nesta thread/tarefa (OrcamentoExecucao).
+# Só a chamada HTTP real é cobrada dele: resposta do cache ou de uma busca
+# idêntica em voo (single-flight) não gasta cota e não gasta orçamento.
+orcamento_execucao = contextvars.ContextVar("orcamento_execucao", default=None)
+
+
+def _criar_tabelas(con):
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS chamadas (
+            credencial TEXT NOT NULL,
+            dia TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (credencial, dia)
+        )
+    """)
+
+
+def cobrar_orcamento(quantidade=1):
+    orcamento = orcamento_execucao.get()
+    if orcamento is not None:
+        orcamento.cobrar(quantidade)
+
+
+def cota_mensal(nome):
+    # "Chave 3" → AMADEUS_COTA_MENSAL_3
+    sufixo = nome.rsplit(" ", 1)[-1]
+    valor = os.getenv(f"AMADEUS_COTA_MENSAL_{sufixo}")
+    return int(valor) if valor else COTA_MENSAL
+
+
+class ContadorCota:
+    def __init__(self, caminho=CAMINHO_COTA):
+        self._con = ConexaoPorThread(caminho, _criar_tabelas)
+
+    def registrar(self, nome, quantidade=1):
+        try:
+            con = self._con()
+            with con:
+                con.execute(
+                    "INSERT INTO chamadas (credencial, dia, total) VALUES (?, ?, ?) "
+                    "ON CONFLICT(credencial, dia) DO UPDATE SET total = total + excluded.total",
+                    (nome, date.today().isoformat(), quantidade),
+                )
+        except Exception as e:
+            print(f"⚠️ Contador de cota indisponível: {e}")
+
+    def _usados(self, nome, desde, ate):
+        row = self._con().execute(
+            "SELECT COALESCE(SUM(total), 0) FROM chamadas WHERE credencial = ? AND dia BETWEEN ? AND ?",
+            (nome, desde, ate),
+        ).fetchone()
+        return row[0]
+
+    def resumo(self, credenciais, hoje=None):
+        """Uso do dia/mês por chave e orçamento diário que ainda cabe no mês."""
+        hoje = hoje or date.today()
+        inicio_mes = hoje.replace(day=1).isoformat()
+        dias_no_mes = calendar.monthrange(hoje.year, hoje.month)[1]
+        dias_restantes = dias_no_mes - hoje.day + 1   # inclui hoje
+
+        chaves = []
+        ilimitado = False
+        for cred in credenciais:
+            nome = cred['name']
+            cota = cota_mensal(nome)
+            usados_hoje = self._usados(nome, hoje.isoformat(), hoje.isoformat())
+            usados_mes = self._usados(nome, inicio_mes, hoje.isoformat())
+            if cota <= 0:
+                ilimitado = True
+            chaves.append({
+                "nome": nome,
+                "cota_mensal": cota or None,
+                "usados_hoje": usados_hoje,
+                "usados_mes": usados_mes,
+                "restante_mes": max(0, cota - usados_mes) if cota > 0 else None,
+            })
+
+        resumo = {
+            "dia": hoje.isoformat(),
+            "dias_restantes_mes": dias_restantes,
+            "chaves": chaves,
+            "usados_hoje": sum(c["usados_hoje"] for c in chaves),
+            "usados_mes": sum(c["usados_mes"] for c in chaves),
+            "orcamento_hoje": None,
+            "restante_hoje": None,
+        }
+        if ilimitado or not chaves:
+            return resumo
+
+        # o que sobrou no mês (somando o já gasto hoje) dividido pelos dias que faltam
+        restante_mes = sum(c["restante_mes"] for c in chaves)
+        orcamento_hoje = (restante_mes + resumo["usados_hoje"]) // dias_restantes
+        resumo["orcamento_hoje"] = orcamento_hoje
+        resumo["restante_hoje"] = max(0, orcamento_hoje - resumo["usados_hoje"])
+        return resumo
+
+
+contador_cota = ContadorCota()
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Projeção das respostas do flight-offers.
+Cada oferta da Amadeus traz itinerários, segmentos e tarifas, mas a
+varredura só usa preço e moeda: o JSON é reduzido a uma Cotacao assim que
+chega, e o resto é descartado junto com a resposta.
+"""
+
+import sys
+
+
+class Cotacao:
+    __slots__ = ("preco", "moeda")
+
+    def __init__(self, preco, moeda="BRL"):
+        self.preco = preco
+        self.moeda = sys.intern(moeda)
+
+    def __repr__(self):
+        return f"Cotacao({self.preco:.2f} {self.moeda})"
+
+
+def projetar_cotacoes(ofertas):
+    """Lista de ofertas cruas (campo "data") → lista de Cotacao, na mesma ordem."""
+    cotacoes = []
+    for oferta in ofertas or []:
+        price = oferta.get("price") or {}
+        try:
+            preco = float(price.get("grandTotal") or price.get("total") or 0)
+        except (TypeError, ValueError):
+            continue
+        cotacoes.append(Cotacao(preco, price.get("currency") or "BRL"))
+    return cotacoes
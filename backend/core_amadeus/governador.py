@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Governador de taxa por credencial Amadeus.
+
+Cada chave tem um balde de fichas (GCRA) com taxa adaptativa: sobe de forma
+aditiva a cada resposta boa e cai pela metade a cada 429 (AIMD). Retry-After
+e cabeçalhos de rate limit bloqueiam a chave até o horário indicado.
+Quem chama recebe quanto tempo esperar pelo próximo horário livre e dorme
+(time.sleep) ou aguarda (asyncio.sleep) por esse tempo.
+"""
+
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+TAXA_INICIAL = float(os.getenv("AMADEUS_TAXA_INICIAL", "5"))     # req/s por chave
+TAXA_MIN = float(os.getenv("AMADEUS_TAXA_MIN", "0.2"))
+TAXA_MAX = float(os.getenv("AMADEUS_TAXA_MAX", "10"))
+RAJADA = int(os.getenv("AMADEUS_RAJADA", "3"))                   # fichas acumuláveis
+INCREMENTO = float(os.getenv("AMADEUS_TAXA_INCREMENTO", "0.1"))  # req/s somados por sucesso
+ESPERA_429_PADRAO = 2.0                                          # sem Retry-After
+
+
+def _segundos_retry_after(valor):
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def _cabecalho(headers, *nomes):
+    for nome in nomes:
+        valor = headers.get(nome) if headers else None
+        if valor is not None:
+            return valor
+    return None
+
+
+class BaldeCredencial:
+    def __init__(self, nome):
+        self.nome = nome
+        self.taxa = TAXA_INICIAL
+        self.tat = 0.0              # "theoretical arrival time" do GCRA
+        self.bloqueado_ate = 0.0
+        self.total_429 = 0
+
+    def _intervalo(self):
+        return 1.0 / self.taxa
+
+    def proximo_horario(self, agora):
+        tolerancia = (RAJADA - 1) * self._intervalo()
+        return max(agora, self.tat - tolerancia, self.bloqueado_ate)
+
+    def reservar(self, agora):
+        horario = self.proximo_horario(agora)
+        self.tat = max(self.tat, horario) + self._intervalo()
+        return horario - agora
+
+    def registrar(self, status, headers, agora):
+        if status == 429:
+            self.total_429 += 1
+            self.taxa = max(TAXA_MIN, self.taxa / 2)
+            espera = _segundos_retry_after(_cabecalho(headers, "Retry-After", "retry-after"))
+            self.bloqueado_ate = max(self.bloqueado_ate, agora + (espera if espera is not None else ESPERA_429_PADRAO))
+            return
+
+        if 200 <= status < 500:
+            self.taxa = min(TAXA_MAX, self.taxa + INCREMENTO)
+
+        # cota da janela esgotada: segura a chave até o reset anunciado
+        restante = _cabecalho(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+        reset = _cabecalho(headers, "X-RateLimit-Reset", "RateLimit-Reset")
+        try:
+            if restante is not None and int(restante) <= 0 and reset is not None:
+                reset = float(reset)
+                # alguns servidores mandam epoch, outros segundos restantes
+                espera = reset - time.time() if reset > 1e9 else reset
+                self.bloqueado_ate = max(self.bloqueado_ate, agora + max(0.0, espera))
+        except ValueError:
+            pass
+
+    def to_dict(self, agora):
+        return {
+            "nome": self.nome,
+            "taxa_req_s": round(self.taxa, 2),
+            "bloqueado_por_s": round(max(0.0, self.bloqueado_ate - agora), 1),
+            "espera_estimada_s": round(self.proximo_horario(agora) - agora, 2),
+            "total_429": self.total_429,
+        }
+
+
+class GovernadorTaxa:
+    def __init__(self):
+        self._baldes = {}
+        self._lock = threading.Lock()
+
+    def _get(self, nome):
+        balde = self._baldes.get(nome)
+        if balde is None:
+            balde = self._baldes[nome] = BaldeCredencial(nome)
+        return balde
+
+    def reservar(self, nome):
+        """Reserva o próximo horário livre da chave; retorna quantos segundos esperar."""
+        with self._lock:
+            return self._get(nome).reservar(time.monotonic())
+
+    def espera_estimada(self, nome):
+        with self._lock:
+            agora = time.monotonic()
+            return self._get(nome).proximo_horario(agora) - agora
+
+    def registrar(self, nome, status, headers=None):
+        with self._lock:
+            self._get(nome).registrar(status, headers, time.monotonic())
+
+    def status(self, nomes):
+        with self._lock:
+            agora = time.monotonic()
+            return [self._get(n).to_dict(agora) for n in nomes]
+
+
+governador = GovernadorTaxa()
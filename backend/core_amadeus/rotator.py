@@ -2,131 +2,361 @@ import requests
 import time
 import os
 import sys
+import atexit
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from backend.core_amadeus.cache_respostas import CacheRespostas, chave_consulta
+from backend.core_amadeus.cota import cobrar_orcamento, contador_cota
+from backend.core_amadeus.cotacao import projetar_cotacoes
+from backend.core_amadeus.governador import governador
+from backend.core_amadeus.saude import monitor_saude
+from backend.core_amadeus.single_flight import SingleFlight
+from backend.core_amadeus.token_store import MARGEM_EXPIRACAO, token_store
 
 load_dotenv()
 
+# Tamanho do pool keep-alive por credencial (conexões reaproveitadas entre threads)
+POOL_SIZE = int(os.getenv("AMADEUS_POOL_SIZE", "10"))
+
+# Renovação proativa: verifica a cada TOKEN_INTERVALO s e renova quando faltar
+# menos de TOKEN_ANTECEDENCIA s para o token expirar
+TOKEN_INTERVALO = int(os.getenv("AMADEUS_TOKEN_INTERVALO", "60"))
+TOKEN_ANTECEDENCIA = int(os.getenv("AMADEUS_TOKEN_ANTECEDENCIA", "300"))
+# Quanto esperar pelo token que outro processo está renovando (lease) antes de buscar
+ESPERA_RENOVACAO = 10
+
+# 429: quantas vezes voltar à fila antes de desistir da chave, e a maior
+# espera (s) aceitável por vaga antes de pular a chave
+MAX_RETRIES_429 = int(os.getenv("AMADEUS_MAX_RETRIES_429", "5"))
+ESPERA_MAX = float(os.getenv("AMADEUS_ESPERA_MAX", "60"))
+
+LIMITADA = object()  # resposta 429 (sentinela de _tentar_com)
+
+# Outra base só para testes/benchmarks (ex.: bench/fake_amadeus.py)
+BASE_URL = os.getenv("AMADEUS_BASE_URL", "https://api.amadeus.com").rstrip("/")
+
+URL_TOKEN = f"{BASE_URL}/v1/security/oauth2/token"
+URL_FLIGHT_OFFERS = f"{BASE_URL}/v2/shopping/flight-offers"
+URL_FLIGHT_DATES = f"{BASE_URL}/v1/shopping/flight-dates"
+
 
 def log_force(msg):
     print(f"[{datetime.now()}] {msg}", file=sys.stderr, flush=True)
 
 
+def carregar_credenciais():
+    """Lê AMADEUS_API_KEY_n / AMADEUS_API_SECRET_n do ambiente (n = 1, 2, ...)."""
+    credenciais = []
+    i = 1
+    while True:
+        key = os.getenv(f'AMADEUS_API_KEY_{i}')
+        secret = os.getenv(f'AMADEUS_API_SECRET_{i}')
+        if key and secret:
+            credenciais.append({"key": key, "secret": secret, "name": f"Chave {i}"})
+            i += 1
+        else:
+            break
+    return credenciais
+
+
+def params_voo_exato(origem, destino, data, data_volta=None):
+    params = {
+        "originLocationCode": origem, "destinationLocationCode": destino,
+        "departureDate": data, "adults": 1, "currencyCode": "BRL", "max": 5
+    }
+    if data_volta: params['returnDate'] = data_volta
+    return params
+
+
+def params_datas_baratas(origem, destino, data_ida=None, duracao=None):
+    """data_ida e duracao aceitam faixa: "2025-01-01,2025-03-01" / "7,14"."""
+    params = {"origin": origem, "destination": destino, "viewBy": "DATE"}
+    if data_ida: params['departureDate'] = data_ida
+    if duracao: params['duration'] = duracao
+    return params
+
+
 class AmadeusRotator:
     def __init__(self, modo="AUTO"):
-        self.credentials = []
+        self.credentials = carregar_credenciais()
         self.tokens = {}
-        self.current_cred_index = 0
-
-        # Carrega chaves
-        i = 1
-        while True:
-            key = os.getenv(f'AMADEUS_API_KEY_{i}')
-            secret = os.getenv(f'AMADEUS_API_SECRET_{i}')
-            if key and secret:
-                self.credentials.append({"key": key, "secret": secret, "name": f"Chave {i}"})
-                i += 1
-            else:
-                break
+        self.saude = monitor_saude
+        self.governador = governador
+        self.cota = contador_cota
+        self.cache = CacheRespostas()
+        self.single_flight = SingleFlight()
+        self.pool_size = POOL_SIZE
+        self.sessions = {}
+        self._sessions_lock = threading.Lock()
+        self._lock = threading.RLock()  # tokens compartilhados entre threads
+        self.token_store = token_store
+        self._renovador = None
+        self._parar_renovacao = threading.Event()
 
         if not self.credentials:
             log_force("❌ Nenhuma credencial Amadeus encontrada!")
         else:
             log_force(f"✅ Amadeus Rotator iniciado com {len(self.credentials)} chaves.")
 
+    def _get_session(self, key):
+        """Sessão keep-alive da credencial (criada sob demanda e reaproveitada)."""
+        with self._sessions_lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.pool_size,
+                    pool_maxsize=self.pool_size,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.sessions[key] = session
+            return session
+
+    def fechar(self):
+        """Para a renovação de tokens e fecha as sessões (chamado no shutdown)."""
+        self._parar_renovacao.set()
+        with self._sessions_lock:
+            sessions = list(self.sessions.values())
+            self.sessions.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+
     def _get_active_credential(self):
+        """Chave mais saudável no momento (sem reservá-la)."""
         if not self.credentials: return None
-        return self.credentials[self.current_cred_index]
+        return self.saude.escolher(self.credentials, reservar=False) or self.credentials[0]
 
-    def _rotate_credential(self):
-        if not self.credentials: return
-        antiga = self._get_active_credential()
-        self.tokens[antiga['key']] = None
-        self.current_cred_index = (self.current_cred_index + 1) % len(self.credentials)
-        nova = self._get_active_credential()
-        log_force(f"⚠️ Rotacionando: {antiga['name']} → {nova['name']}")
+    def _descartar_token(self, cred, token):
+        with self._lock:
+            self.tokens[cred['key']] = None
+        self.token_store.descartar(cred['key'], token)
 
     def get_token(self, key=None, secret=None):
         cred = self._get_active_credential()
         if not cred: return None
         if key is None: key = cred['key']
         if secret is None: secret = cred['secret']
+        nome = next((c['name'] for c in self.credentials if c['key'] == key), cred['name'])
 
         cached = self.tokens.get(key)
         if cached and time.time() < cached['expiry']: return cached['token']
 
+        # token renovado em segundo plano ou por outro worker
+        compartilhado = self._token_compartilhado(key)
+        if compartilhado: return compartilhado
+
+        # caminho frio: ninguém renovou ainda; só um processo faz o POST
+        adquirido = self.token_store.adquirir_renovacao(key)
+        if not adquirido:
+            limite = time.time() + ESPERA_RENOVACAO
+            while time.time() < limite:
+                time.sleep(0.2)
+                compartilhado = self._token_compartilhado(key)
+                if compartilhado: return compartilhado
+            # quem tinha o lease não salvou: relê e tenta pegar o lease de novo
+            compartilhado = self._token_compartilhado(key)
+            if compartilhado: return compartilhado
+            adquirido = self.token_store.adquirir_renovacao(key)
+            if not adquirido:
+                log_force(f"⚠️ Renovação de token presa em outro processo ({nome}) — buscando mesmo assim")
+        try:
+            return self._buscar_token(key, secret, nome)
+        finally:
+            # só solta o lease que este processo pegou
+            if adquirido:
+                self.token_store.liberar_renovacao(key)
+
+    def _token_compartilhado(self, key):
+        encontrado = self.token_store.obter(key)
+        if not encontrado:
+            return None
+        token, expira = encontrado
+        with self._lock:
+            self.tokens[key] = {"token": token, "expiry": expira - MARGEM_EXPIRACAO}
+        return token
+
+    def _buscar_token(self, key, secret, nome):
         try:
-            url = "https://api.amadeus.com/v1/security/oauth2/token"
-            resp = requests.post(url, data={
+            resp = self._get_session(key).post(URL_TOKEN, data={
                 "grant_type": "client_credentials",
                 "client_id": key,
                 "client_secret": secret
             }, timeout=10)
             resp.raise_for_status()
             data = resp.json()
-            self.tokens[key] = {"token": data["access_token"], "expiry": time.time() + data["expires_in"] - 30}
+            expira = self.token_store.salvar(key, data["access_token"], data["expires_in"])
+            with self._lock:
+                self.tokens[key] = {"token": data["access_token"], "expiry": expira - MARGEM_EXPIRACAO}
             return data["access_token"]
         except Exception as e:
-            log_force(f"❌ Erro Token ({cred['name']}): {e}")
+            log_force(f"❌ Erro Token ({nome}): {e}")
             return None
 
-    def _make_request(self, endpoint_url, params):
-        for _ in range(len(self.credentials)):
-            cred = self._get_active_credential()
-            token = self.get_token(cred['key'], cred['secret'])
-            if not token:
-                self._rotate_credential()
+    # ---------- renovação proativa ----------
+
+    def iniciar_renovacao(self):
+        """Thread que renova os tokens antes do expires_in, fora do caminho das buscas."""
+        if not self.credentials or self._renovador is not None:
+            return
+        self._renovador = threading.Thread(
+            target=self._loop_renovacao, name="amadeus-tokens", daemon=True
+        )
+        self._renovador.start()
+
+    def _loop_renovacao(self):
+        while True:
+            try:
+                self.renovar_tokens()
+            except Exception as e:
+                log_force(f"❌ Erro renovando tokens: {e}")
+            if self._parar_renovacao.wait(TOKEN_INTERVALO):
+                break
+
+    def renovar_tokens(self):
+        for cred in self.credentials:
+            key = cred['key']
+            if not self.token_store.precisa_renovar(key, TOKEN_ANTECEDENCIA):
+                continue
+            # outro worker já está renovando esta chave
+            if not self.token_store.adquirir_renovacao(key):
                 continue
+            try:
+                if self._buscar_token(key, cred['secret'], cred['name']):
+                    log_force(f"🔁 Token renovado em segundo plano ({cred['name']})")
+            finally:
+                self.token_store.liberar_renovacao(key)
 
+    def _make_request(self, endpoint_url, params):
+        cached = self.cache.obter(endpoint_url, params)
+        if cached is not None:
+            return cached
+
+        # consultas idênticas simultâneas viram uma única requisição
+        chave = chave_consulta(endpoint_url, params)
+        return self.single_flight.executar(
+            chave, lambda: self._buscar_api(endpoint_url, params)
+        )
+
+    def _buscar_api(self, endpoint_url, params):
+        tentadas = set()
+        limitadas = 0
+        while len(tentadas) < len(self.credentials):
+            # chave mais saudável (e com vaga mais cedo) entre as que não falharam
+            # chaves que esperariam mais de ESPERA_MAX por vaga ficam de fora antes
+            # da reserva (uma meio-aberta reservada e não usada nunca mais sondaria)
+            cred = self.saude.escolher(
+                self.credentials,
+                excluir=tentadas,
+                espera=self.governador.espera_estimada,
+                espera_max=ESPERA_MAX,
+            )
+            if not cred:
+                log_force(f"⛔ Nenhuma chave disponível (circuitos abertos ou espera acima de {ESPERA_MAX}s).")
+                break
             try:
-                log_force(f"🔎 Tentando API com {cred['name']}...")
-                response = requests.get(
-                    endpoint_url,
-                    headers={"Authorization": f"Bearer {token}"},
-                    params=params,
-                    timeout=25
-                )
+                resultado = self._tentar_com(cred, endpoint_url, params)
+            finally:
+                self.saude.liberar(cred)
+
+            if resultado is LIMITADA and limitadas < MAX_RETRIES_429:
+                # 429: a chave volta para a fila e o governador segura até o Retry-After
+                limitadas += 1
+                continue
+            if resultado is None or resultado is LIMITADA:
+                tentadas.add(cred['name'])
+                continue
+            return resultado
 
-                if response.status_code == 200:
-                    return response.json()
+        log_force("❌ Todas as chaves falharam.")
+        return {"data": []}
 
-                elif response.status_code == 404:
-                    # ✅ SEM RESULTADO (normal)
-                    return {"data": []}
+    def _tentar_com(self, cred, endpoint_url, params):
+        """Uma tentativa com a chave; None = falhou, LIMITADA = 429, tentar de novo."""
+        token = self.get_token(cred['key'], cred['secret'])
+        if not token:
+            self.saude.falha(cred, "auth")
+            return None
 
-                elif response.status_code in (401, 403):
-                    log_force("🔑 Token inválido, rotacionando chave...")
-                    self._rotate_credential()
+        espera = self.governador.reservar(cred['name'])
+        if espera > 0:
+            time.sleep(espera)
 
-                elif response.status_code in (429, 500, 503):
-                    log_force(f"⚠️ Erro temporário {response.status_code}, tentando outra chave...")
-                    self._rotate_credential()
+        self.cota.registrar(cred['name'])
+        cobrar_orcamento()
+        inicio = time.monotonic()
+        try:
+            log_force(f"🔎 Tentando API com {cred['name']}...")
+            response = self._get_session(cred['key']).get(
+                endpoint_url,
+                headers={"Authorization": f"Bearer {token}"},
+                params=params,
+                timeout=25
+            )
+            latencia = time.monotonic() - inicio
+            self.governador.registrar(cred['name'], response.status_code, response.headers)
+
+            if response.status_code == 200:
+                self.saude.sucesso(cred, latencia)
+                data = response.json()
+                self.cache.gravar(endpoint_url, params, data)
+                return data
+
+            elif response.status_code == 404:
+                # ✅ SEM RESULTADO (normal)
+                self.saude.sucesso(cred, latencia)
+                self.cache.gravar(endpoint_url, params, {"data": []})
+                return {"data": []}
+
+            elif response.status_code in (401, 403):
+                log_force("🔑 Token inválido, trocando de chave...")
+                self._descartar_token(cred, token)
+                self.saude.falha(cred, "auth", latencia)
+
+            elif response.status_code == 429:
+                log_force(f"🚦 429 em {cred['name']}, aguardando vaga (Retry-After)...")
+                self.saude.falha(cred, "limite", latencia)
+                return LIMITADA
+
+            elif 500 <= response.status_code < 600:
+                # 5xx (inclusive 502/504 de gateway) é falha da chave, nunca "sem voos"
+                log_force(f"⚠️ Erro temporário {response.status_code}, tentando outra chave...")
+                self.saude.falha(cred, "servidor", latencia)
 
-                else:
-                    log_force(f"❌ Erro inesperado {response.status_code}: {response.text}")
-                    return {"data": []}
+            else:
+                # a chave respondeu; o problema é a consulta
+                self.saude.sucesso(cred, latencia)
+                log_force(f"❌ Erro inesperado {response.status_code}: {response.text}")
+                return {"data": []}
 
-            except requests.exceptions.Timeout:
-                log_force("⏱️ Timeout, tentando próxima chave...")
-                self._rotate_credential()
+        except requests.exceptions.Timeout:
+            log_force("⏱️ Timeout, tentando próxima chave...")
+            self.saude.falha(cred, "timeout", time.monotonic() - inicio)
 
-            except Exception as e:
-                log_force(f"❌ Erro conexão: {e}")
-                self._rotate_credential()
+        except Exception as e:
+            log_force(f"❌ Erro conexão: {e}")
+            self.saude.falha(cred, "conexao")
 
-        log_force("❌ Todas as chaves falharam.")
-        return {"data": []}
+        return None
 
+    def status_saude(self):
+        return self.saude.status(self.credentials)
 
-    def buscar_datas_baratas(self, origem, destino):
+
+    def buscar_datas_baratas(self, origem, destino, data_ida=None, duracao=None):
         try:
             # CORREÇÃO 1: Usar o método _make_request (que lida com tokens/rotator)
             # URL correta para buscar datas baratas é "/v1/shopping/flight-dates"
-            endpoint = "https://api.amadeus.com/v1/shopping/flight-dates"
-            params = {"origin": origem, "destination": destino, "viewBy": "DATE"}
-
             # response_data pode ser None se _make_request falhar
-            response_data = self._make_request(endpoint, params)
+            response_data = self._make_request(
+                URL_FLIGHT_DATES, params_datas_baratas(origem, destino, data_ida, duracao)
+            )
 
             # CORREÇÃO 2: Tratar o caso de response_data ser None antes de chamar .get()
             if response_data is None:
@@ -143,14 +373,13 @@ class AmadeusRotator:
             return None
 
     def buscar_voo_exato(self, origem, destino, data, data_volta=None):
-        params = {
-            "originLocationCode": origem, "destinationLocationCode": destino,
-            "departureDate": data, "adults": 1, "currencyCode": "BRL", "max": 5
-        }
-        if data_volta: params['returnDate'] = data_volta
-
-        resp = self._make_request("https://api.amadeus.com/v2/shopping/flight-offers", params)
-        return resp.get("data", []) if resp else []
+        params = params_voo_exato(origem, destino, data, data_volta)
+        resp = self._make_request(URL_FLIGHT_OFFERS, params)
+        # só preço/moeda seguem adiante; o JSON completo morre aqui
+        return projetar_cotacoes(resp.get("data")) if resp else []
 
 
-amadeus_client = AmadeusRotator()
\ No newline at end of file
+# a renovação proativa (thread) é ligada pelo app.py na subida do servidor:
+# importar o cliente (scheduler, bench, scripts) não dispara nada em segundo plano
+amadeus_client = AmadeusRotator()
+atexit.register(amadeus_client.fechar)
\ No newline at end of file
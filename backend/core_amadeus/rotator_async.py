@@ -0,0 +1,280 @@
+"""
+Versão asyncio do AmadeusRotator (httpx).
+Mesma escolha de chaves do rotator síncrono, mas sem uma thread por
+requisição: um único event loop mantém dezenas de buscas em voo.
+Cache, cota e token store são SQLite (bloqueantes): vão por
+asyncio.to_thread para não parar as outras buscas.
+"""
+
+import asyncio
+import time
+
+import httpx
+
+from backend.core_amadeus.cache_respostas import CacheRespostas, chave_consulta
+from backend.core_amadeus.cota import cobrar_orcamento, contador_cota
+from backend.core_amadeus.cotacao import projetar_cotacoes
+from backend.core_amadeus.governador import governador
+from backend.core_amadeus.saude import monitor_saude
+from backend.core_amadeus.single_flight import SingleFlightAsync
+from backend.core_amadeus.token_store import MARGEM_EXPIRACAO, token_store
+from backend.core_amadeus.rotator import (
+    ESPERA_MAX,
+    ESPERA_RENOVACAO,
+    LIMITADA,
+    MAX_RETRIES_429,
+    POOL_SIZE,
+    URL_FLIGHT_DATES,
+    URL_FLIGHT_OFFERS,
+    URL_TOKEN,
+    carregar_credenciais,
+    log_force,
+    params_datas_baratas,
+    params_voo_exato,
+)
+
+
+class AmadeusRotatorAsync:
+    def __init__(self, modo="AUTO"):
+        self.credentials = carregar_credenciais()
+        self.tokens = {}
+        self.saude = monitor_saude
+        self.governador = governador
+        self.cota = contador_cota
+        self.cache = CacheRespostas()
+        self.single_flight = SingleFlightAsync()
+        self.pool_size = POOL_SIZE
+        self.clients = {}
+        self._token_locks = {}
+        self.token_store = token_store
+
+        if not self.credentials:
+            log_force("❌ Nenhuma credencial Amadeus encontrada (async)!")
+        else:
+            log_force(f"✅ Amadeus Rotator async iniciado com {len(self.credentials)} chaves.")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.fechar()
+
+    def _get_client(self, key):
+        """Cliente httpx keep-alive da credencial (criado sob demanda)."""
+        client = self.clients.get(key)
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+                timeout=25,
+            )
+            self.clients[key] = client
+        return client
+
+    async def fechar(self):
+        clients = list(self.clients.values())
+        self.clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+
+    def _get_active_credential(self):
+        """Chave mais saudável no momento (sem reservá-la)."""
+        if not self.credentials: return None
+        return self.saude.escolher(self.credentials, reservar=False) or self.credentials[0]
+
+    async def get_token(self, key=None, secret=None):
+        cred = self._get_active_credential()
+        if not cred: return None
+        if key is None: key = cred['key']
+        if secret is None: secret = cred['secret']
+        nome = next((c['name'] for c in self.credentials if c['key'] == key), cred['name'])
+
+        # uma única renovação por chave, mesmo com várias corrotinas esperando
+        lock = self._token_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = self.tokens.get(key)
+            if cached and time.time() < cached['expiry']: return cached['token']
+
+            # token renovado pelo processo web (ou outro worker)
+            compartilhado = await self._token_compartilhado(key)
+            if compartilhado: return compartilhado
+
+            # caminho frio: o mesmo lease do rotator síncrono (um POST entre processos)
+            adquirido = await asyncio.to_thread(self.token_store.adquirir_renovacao, key)
+            if not adquirido:
+                limite = time.time() + ESPERA_RENOVACAO
+                while time.time() < limite:
+                    await asyncio.sleep(0.2)
+                    compartilhado = await self._token_compartilhado(key)
+                    if compartilhado: return compartilhado
+                compartilhado = await self._token_compartilhado(key)
+                if compartilhado: return compartilhado
+                adquirido = await asyncio.to_thread(self.token_store.adquirir_renovacao, key)
+                if not adquirido:
+                    log_force(f"⚠️ Renovação de token presa em outro processo ({nome}) — buscando mesmo assim")
+            try:
+                return await self._buscar_token(key, secret, nome)
+            finally:
+                # só solta o lease que este processo pegou
+                if adquirido:
+                    await asyncio.to_thread(self.token_store.liberar_renovacao, key)
+
+    async def _token_compartilhado(self, key):
+        encontrado = await asyncio.to_thread(self.token_store.obter, key)
+        if not encontrado:
+            return None
+        token, expira = encontrado
+        self.tokens[key] = {"token": token, "expiry": expira - MARGEM_EXPIRACAO}
+        return token
+
+    async def _buscar_token(self, key, secret, nome):
+        try:
+            resp = await self._get_client(key).post(URL_TOKEN, data={
+                "grant_type": "client_credentials",
+                "client_id": key,
+                "client_secret": secret
+            }, timeout=10)
+            resp.raise_for_status()
+            data = resp.json()
+            expira = await asyncio.to_thread(
+                self.token_store.salvar, key, data["access_token"], data["expires_in"]
+            )
+            self.tokens[key] = {"token": data["access_token"], "expiry": expira - MARGEM_EXPIRACAO}
+            return data["access_token"]
+        except Exception as e:
+            log_force(f"❌ Erro Token async ({nome}): {e}")
+            return None
+
+    async def _make_request(self, endpoint_url, params):
+        cached = await asyncio.to_thread(self.cache.obter, endpoint_url, params)
+        if cached is not None:
+            return cached
+
+        # consultas idênticas simultâneas viram uma única requisição
+        chave = chave_consulta(endpoint_url, params)
+        return await self.single_flight.executar(
+            chave, lambda: self._buscar_api(endpoint_url, params)
+        )
+
+    async def _buscar_api(self, endpoint_url, params):
+        tentadas = set()
+        limitadas = 0
+        while len(tentadas) < len(self.credentials):
+            # chave mais saudável (e com vaga mais cedo) entre as que não falharam
+            # chaves que esperariam mais de ESPERA_MAX por vaga ficam de fora antes
+            # da reserva (uma meio-aberta reservada e não usada nunca mais sondaria)
+            cred = self.saude.escolher(
+                self.credentials,
+                excluir=tentadas,
+                espera=self.governador.espera_estimada,
+                espera_max=ESPERA_MAX,
+            )
+            if not cred:
+                log_force(f"⛔ Nenhuma chave disponível (circuitos abertos ou espera acima de {ESPERA_MAX}s).")
+                break
+            try:
+                resultado = await self._tentar_com(cred, endpoint_url, params)
+            finally:
+                self.saude.liberar(cred)
+
+            if resultado is LIMITADA and limitadas < MAX_RETRIES_429:
+                # 429: a chave volta para a fila e o governador segura até o Retry-After
+                limitadas += 1
+                continue
+            if resultado is None or resultado is LIMITADA:
+                tentadas.add(cred['name'])
+                continue
+            return resultado
+
+        log_force("❌ Todas as chaves falharam.")
+        return {"data": []}
+
+    async def _tentar_com(self, cred, endpoint_url, params):
+        """Uma tentativa com a chave; None = falhou, LIMITADA = 429, tentar de novo."""
+        token = await self.get_token(cred['key'], cred['secret'])
+        if not token:
+            self.saude.falha(cred, "auth")
+            return None
+
+        espera = self.governador.reservar(cred['name'])
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+        await asyncio.to_thread(self.cota.registrar, cred['name'])
+        cobrar_orcamento()
+        inicio = time.monotonic()
+        try:
+            log_force(f"🔎 Tentando API (async) com {cred['name']}...")
+            response = await self._get_client(cred['key']).get(
+                endpoint_url,
+                headers={"Authorization": f"Bearer {token}"},
+                params=params,
+            )
+            latencia = time.monotonic() - inicio
+            self.governador.registrar(cred['name'], response.status_code, response.headers)
+
+            if response.status_code == 200:
+                self.saude.sucesso(cred, latencia)
+                data = response.json()
+                await asyncio.to_thread(self.cache.gravar, endpoint_url, params, data)
+                return data
+
+            elif response.status_code == 404:
+                # ✅ SEM RESULTADO (normal)
+                self.saude.sucesso(cred, latencia)
+                await asyncio.to_thread(self.cache.gravar, endpoint_url, params, {"data": []})
+                return {"data": []}
+
+            elif response.status_code in (401, 403):
+                log_force("🔑 Token inválido, trocando de chave...")
+                self.tokens[cred['key']] = None
+                await asyncio.to_thread(self.token_store.descartar, cred['key'], token)
+                self.saude.falha(cred, "auth", latencia)
+
+            elif response.status_code == 429:
+                log_force(f"🚦 429 em {cred['name']}, aguardando vaga (Retry-After)...")
+                self.saude.falha(cred, "limite", latencia)
+                return LIMITADA
+
+            elif 500 <= response.status_code < 600:
+                # 5xx (inclusive 502/504 de gateway) é falha da chave, nunca "sem voos"
+                log_force(f"⚠️ Erro temporário {response.status_code}, tentando outra chave...")
+                self.saude.falha(cred, "servidor", latencia)
+
+            else:
+                self.saude.sucesso(cred, latencia)
+                log_force(f"❌ Erro inesperado {response.status_code}: {response.text}")
+                return {"data": []}
+
+        except httpx.TimeoutException:
+            log_force("⏱️ Timeout, tentando próxima chave...")
+            self.saude.falha(cred, "timeout", time.monotonic() - inicio)
+
+        except Exception as e:
+            log_force(f"❌ Erro conexão: {e}")
+            self.saude.falha(cred, "conexao")
+
+        return None
+
+    async def buscar_datas_baratas(self, origem, destino, data_ida=None, duracao=None):
+        try:
+            response_data = await self._make_request(
+                URL_FLIGHT_DATES, params_datas_baratas(origem, destino, data_ida, duracao)
+            )
+            if response_data is None:
+                print(f"❌ Rotator async: Falha na busca de {origem}->{destino}. Resposta da API foi None.")
+                return None
+            return response_data.get("data", [])
+        except Exception as e:
+            print(f"❌ Erro fatal inesperado no rotator_async.py para {origem}->{destino}: {e}")
+            return None
+
+    async def buscar_voo_exato(self, origem, destino, data, data_volta=None):
+        params = params_voo_exato(origem, destino, data, data_volta)
+        resp = await self._make_request(URL_FLIGHT_OFFERS, params)
+        return projetar_cotacoes(resp.get("data")) if resp else []
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Saúde por credencial Amadeus + circuit breaker.
+
+Cada chave acumula latência e taxa de erro (médias móveis exponenciais) e
+os horários do último 429/401. Falhas repetidas abrem o circuito da chave
+por um cool-down que dobra a cada reabertura; vencido o prazo, uma única
+requisição de sonda (meio-aberto) decide se a chave volta ao rodízio.
+"""
+
+import os
+import threading
+import time
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+MEIO_ABERTO = "meio_aberto"
+
+FALHAS_PARA_ABRIR = int(os.getenv("AMADEUS_CB_FALHAS", "3"))
+COOLDOWN_BASE = float(os.getenv("AMADEUS_CB_COOLDOWN", "30"))       # segundos
+COOLDOWN_MAX = float(os.getenv("AMADEUS_CB_COOLDOWN_MAX", "900"))
+
+ALFA = 0.2  # peso da última amostra nas médias móveis
+
+
+class SaudeCredencial:
+    def __init__(self, nome):
+        self.nome = nome
+        self.estado = FECHADO
+        self.latencia_media = None
+        self.taxa_erro = 0.0
+        self.falhas_seguidas = 0
+        self.ultimo_429 = None
+        self.ultimo_401 = None
+        self.aberto_ate = 0.0
+        self.cooldown = COOLDOWN_BASE
+        self.sondando = False
+        self.em_uso = 0
+        self.total_chamadas = 0
+        self.total_erros = 0
+
+    def _media(self, latencia):
+        if latencia is None:
+            return
+        if self.latencia_media is None:
+            self.latencia_media = latencia
+        else:
+            self.latencia_media += ALFA * (latencia - self.latencia_media)
+
+    def registrar_sucesso(self, latencia):
+        self.total_chamadas += 1
+        self._media(latencia)
+        self.taxa_erro *= (1 - ALFA)
+        self.falhas_seguidas = 0
+        if self.estado != FECHADO:
+            self.estado = FECHADO
+            self.cooldown = COOLDOWN_BASE
+        self.sondando = False
+
+    def registrar_falha(self, motivo, latencia=None, agora=None):
+        """motivo: 'auth' (401/403), 'limite' (429), 'servidor', 'timeout' ou 'conexao'."""
+        agora = agora or time.time()
+        self.total_chamadas += 1
+        self.total_erros += 1
+        self._media(latencia)
+        self.taxa_erro += ALFA * (1 - self.taxa_erro)
+        self.falhas_seguidas += 1
+
+        if motivo == "limite":
+            self.ultimo_429 = agora
+        elif motivo == "auth":
+            self.ultimo_401 = agora
+
+        # sonda falhou → reabre com cool-down dobrado
+        if self.estado == MEIO_ABERTO:
+            self.cooldown = min(self.cooldown * 2, COOLDOWN_MAX)
+            self._abrir(agora)
+        # chave recusada não adianta insistir; 429 fica com o governador de
+        # taxa (Retry-After) e só abre o circuito se repetir N vezes
+        elif motivo == "auth" or self.falhas_seguidas >= FALHAS_PARA_ABRIR:
+            self._abrir(agora)
+        self.sondando = False
+
+    def _abrir(self, agora):
+        self.estado = ABERTO
+        self.aberto_ate = agora + self.cooldown
+
+    def disponivel(self, agora):
+        if self.estado == FECHADO:
+            return True
+        if self.estado == ABERTO and agora >= self.aberto_ate:
+            self.estado = MEIO_ABERTO
+        # meio-aberto: só uma sonda por vez
+        return self.estado == MEIO_ABERTO and not self.sondando
+
+    def pontuacao(self):
+        """Menor é melhor: latência penalizada por erro e por uso simultâneo."""
+        latencia = self.latencia_media if self.latencia_media is not None else 1.0
+        return latencia * (1 + 4 * self.taxa_erro) * (1 + self.em_uso)
+
+    def to_dict(self, agora=None):
+        agora = agora or time.time()
+        return {
+            "nome": self.nome,
+            "estado": self.estado,
+            "latencia_media_ms": round(self.latencia_media * 1000) if self.latencia_media is not None else None,
+            "taxa_erro": round(self.taxa_erro, 3),
+            "falhas_seguidas": self.falhas_seguidas,
+            "ultimo_429": self.ultimo_429,
+            "ultimo_401": self.ultimo_401,
+            "reabre_em_s": round(max(0.0, self.aberto_ate - agora), 1) if self.estado == ABERTO else 0,
+            "cooldown_s": self.cooldown,
+            "em_uso": self.em_uso,
+            "total_chamadas": self.total_chamadas,
+            "total_erros": self.total_erros,
+        }
+
+
+class MonitorSaude:
+    """Estado de saúde de todas as chaves do processo (compartilhado sync/async)."""
+
+    def __init__(self):
+        self._saude = {}
+        self._lock = threading.Lock()
+
+    def _get(self, nome):
+        saude = self._saude.get(nome)
+        if saude is None:
+            saude = self._saude[nome] = SaudeCredencial(nome)
+        return saude
+
+    def escolher(self, credenciais, excluir=(), reservar=True, espera=None, espera_max=None):
+        """
+        Reserva a chave disponível mais saudável (ou None se todas estão abertas).
+        `espera(nome)` soma à pontuação os segundos até a chave ter vaga; com
+        `espera_max`, chaves que esperariam mais que isso nem entram (assim uma
+        chave meio-aberta só vira sonda se a sonda for de fato enviada).
+        """
+        agora = time.time()
+        with self._lock:
+            candidatas = []
+            for cred in credenciais:
+                if cred['name'] in excluir:
+                    continue
+                saude = self._get(cred['name'])
+                if not saude.disponivel(agora):
+                    continue
+                segundos = espera(cred['name']) if espera else 0
+                if espera_max is not None and segundos > espera_max:
+                    continue
+                candidatas.append((saude.pontuacao() + segundos, cred, saude))
+            if not candidatas:
+                return None
+            _, cred, saude = min(candidatas, key=lambda c: c[0])
+            if not reservar:
+                return cred
+            if saude.estado == MEIO_ABERTO:
+                saude.sondando = True
+            saude.em_uso += 1
+            return cred
+
+    def liberar(self, cred):
+        with self._lock:
+            saude = self._get(cred['name'])
+            saude.em_uso = max(0, saude.em_uso - 1)
+
+    def sucesso(self, cred, latencia):
+        with self._lock:
+            self._get(cred['name']).registrar_sucesso(latencia)
+
+    def falha(self, cred, motivo, latencia=None):
+        with self._lock:
+            self._get(cred['name']).registrar_falha(motivo, latencia)
+
+    def status(self, credenciais):
+        agora = time.time()
+        with self._lock:
+            return [self._get(c['name']).to_dict(agora) for c in credenciais]
+
+
+monitor_saude = MonitorSaude()
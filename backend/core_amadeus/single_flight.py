@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Single-flight: chamadas simultâneas com a mesma consulta normalizada
+compartilham uma única requisição HTTP. A primeira (líder) busca; as
+demais esperam e recebem o mesmo resultado (ou a mesma exceção).
+Vale dentro do processo; entre workers quem evita a repetição é o cache.
+"""
+
+import asyncio
+import threading
+
+
+class _Chamada:
+    __slots__ = ("evento", "resultado", "erro", "seguidores")
+
+    def __init__(self, evento):
+        self.evento = evento
+        self.resultado = None
+        self.erro = None
+        self.seguidores = 0
+
+
+class _Contadores:
+    def __init__(self):
+        self.lideres = 0
+        self.economizadas = 0
+
+    def estatisticas(self, em_voo):
+        return {
+            "requisicoes_feitas": self.lideres,
+            "chamadas_economizadas": self.economizadas,
+            "em_voo": em_voo,
+        }
+
+
+class SingleFlight(_Contadores):
+    """Versão para threads (AmadeusRotator)."""
+
+    def __init__(self):
+        super().__init__()
+        self._em_voo = {}
+        self._lock = threading.Lock()
+
+    def executar(self, chave, funcao):
+        with self._lock:
+            chamada = self._em_voo.get(chave)
+            lider = chamada is None
+            if lider:
+                chamada = self._em_voo[chave] = _Chamada(threading.Event())
+                self.lideres += 1
+            else:
+                chamada.seguidores += 1
+                self.economizadas += 1
+
+        if not lider:
+            chamada.evento.wait()
+            if chamada.erro is not None:
+                raise chamada.erro
+            return chamada.resultado
+
+        try:
+            chamada.resultado = funcao()
+            return chamada.resultado
+        except BaseException as e:
+            chamada.erro = e
+            raise
+        finally:
+            with self._lock:
+                self._em_voo.pop(chave, None)
+            chamada.evento.set()
+
+    def estatisticas(self):
+        with self._lock:
+            return super().estatisticas(len(self._em_voo))
+
+
+class SingleFlightAsync(_Contadores):
+    """Versão asyncio (AmadeusRotatorAsync); vale para um único event loop."""
+
+    def __init__(self):
+        super().__init__()
+        self._em_voo = {}
+
+    async def executar(self, chave, funcao):
+        futuro = self._em_voo.get(chave)
+        if futuro is not None:
+            self.economizadas += 1
+            # shield: o cancelamento de um seguidor não derruba o líder
+            return await asyncio.shield(futuro)
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._em_voo[chave] = futuro
+        self.lideres += 1
+        try:
+            resultado = await funcao()
+            futuro.set_result(resultado)
+            return resultado
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except BaseException as e:
+            futuro.set_exception(e)
+            # evita "exception was never retrieved" quando não há seguidores
+            futuro.exception()
+            raise
+        finally:
+            self._em_voo.pop(chave, None)
+
+    def estatisticas(self):
+        return super().estatisticas(len(self._em_voo))
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Tokens OAuth da Amadeus compartilhados entre processos (SQLite).
+Todos os workers do gunicorn e todos os clientes (sync/async) leem daqui;
+um lease por chave garante que só um processo renova o token por vez.
+"""
+
+import hashlib
+import os
+import time
+
+from backend.armazenamento.sqlite import DATA_DIR, ConexaoPorThread
+
+CAMINHO_TOKENS = os.getenv("AMADEUS_TOKENS_PATH", os.path.join(DATA_DIR, "tokens_amadeus.sqlite3"))
+
+MARGEM_EXPIRACAO = 30  # segundos de folga antes do expires_in real
+
+
+def _criar_tabelas(con):
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS tokens (
+            chave_id TEXT PRIMARY KEY,
+            token TEXT,
+            expira REAL NOT NULL DEFAULT 0,
+            atualizado REAL NOT NULL DEFAULT 0,
+            renovando_ate REAL NOT NULL DEFAULT 0
+        )
+    """)
+
+
+def _id_chave(key):
+    # o client_id não fica gravado em disco
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+
+
+class TokenStore:
+    def __init__(self, caminho=CAMINHO_TOKENS):
+        self._con = ConexaoPorThread(caminho, _criar_tabelas)
+
+    def obter(self, key):
+        """(token, expira) ainda válido ou None."""
+        try:
+            row = self._con().execute(
+                "SELECT token, expira FROM tokens WHERE chave_id = ?", (_id_chave(key),)
+            ).fetchone()
+        except Exception as e:
+            print(f"⚠️ Token store indisponível: {e}")
+            return None
+        if row and row["token"] and time.time() < row["expira"] - MARGEM_EXPIRACAO:
+            return row["token"], row["expira"]
+        return None
+
+    def salvar(self, key, token, expires_in):
+        agora = time.time()
+        expira = agora + expires_in
+        try:
+            con = self._con()
+            with con:
+                con.execute(
+                    "INSERT INTO tokens (chave_id, token, expira, atualizado, renovando_ate) "
+                    "VALUES (?, ?, ?, ?, 0) "
+                    "ON CONFLICT(chave_id) DO UPDATE SET token = excluded.token, "
+                    "expira = excluded.expira, atualizado = excluded.atualizado, renovando_ate = 0",
+                    (_id_chave(key), token, expira, agora),
+                )
+        except Exception as e:
+            print(f"⚠️ Token store indisponível: {e}")
+        return expira
+
+    def descartar(self, key, token):
+        """Invalida o token (ex.: 401) se ninguém já o substituiu."""
+        try:
+            con = self._con()
+            with con:
+                con.execute(
+                    "UPDATE tokens SET token = NULL, expira = 0 WHERE chave_id = ? AND token = ?",
+                    (_id_chave(key), token),
+                )
+        except Exception as e:
+            print(f"⚠️ Token store indisponível: {e}")
+
+    def precisa_renovar(self, key, antecedencia):
+        try:
+            row = self._con().execute(
+                "SELECT expira FROM tokens WHERE chave_id = ?", (_id_chave(key),)
+            ).fetchone()
+        except Exception:
+            return True
+        return not row or time.time() >= row["expira"] - antecedencia
+
+    def adquirir_renovacao(self, key, duracao=30):
+        """Lease de renovação: True para um único processo até expirar ou salvar()."""
+        agora = time.time()
+        try:
+            con = self._con()
+            with con:
+                con.execute(
+                    "INSERT OR IGNORE INTO tokens (chave_id, renovando_ate) VALUES (?, 0)",
+                    (_id_chave(key),),
+                )
+                cur = con.execute(
+                    "UPDATE tokens SET renovando_ate = ? WHERE chave_id = ? AND renovando_ate < ?",
+                    (agora + duracao, _id_chave(key), agora),
+                )
+                return cur.rowcount == 1
+        except Exception as e:
+            print(f"⚠️ Token store indisponível: {e}")
+            return True
+
+    def liberar_renovacao(self, key):
+        try:
+            con = self._con()
+            with con:
+                con.execute("UPDATE tokens SET renovando_ate = 0 WHERE chave_id = ?", (_id_chave(key),))
+        except Exception:
+            pass
+
+
+token_store = TokenStore()
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Baselines vivos por rota.
+
+Em vez do preco_baseline fixo do coletas_completo.csv, cada rota mantém
+estatísticas que se atualizam a cada preço observado, em O(1):
+média e variância com decaimento exponencial, uma estimativa da mediana
+(aproximação estocástica: anda um passo na direção do preço novo) e uma
+média por mês da ida (sazonalidade). Nada de recalcular o histórico:
+o estado de cada rota fica no banco e é relido no início de cada execução.
+Só na primeira vez, com o banco vazio, as estatísticas saem do arquivo
+de preços.
+Cada processo guarda os preços que observou desde a última gravação e, ao
+salvar, os aplica sobre o estado que está no banco naquele momento: as
+observações do web e do agendador se somam em vez de uma cópia velha
+sobrescrever a outra.
+"""
+
+import json
+import math
+import os
+import threading
+from datetime import datetime
+
+from backend.armazenamento.arquivo_precos import arquivo_precos as arquivo_padrao
+from backend.armazenamento.banco import banco as banco_padrao
+
+# Peso de cada preço novo na média/variância (≈ memória das últimas 1/ALFA buscas)
+ALFA = float(os.getenv("BASELINE_ALFA", "0.05"))
+
+# Abaixo disso a rota segue com o baseline do CSV
+MIN_OBSERVACOES = int(os.getenv("BASELINE_MIN_OBS", "10"))
+MIN_OBSERVACOES_MES = 3
+
+PASSO_MEDIANA = 0.05            # fração do desvio típico andada a cada preço
+FATOR_SAZONAL = (0.6, 1.6)      # limites do ajuste pelo mês da ida
+
+
+class EstatisticaRota:
+    __slots__ = ("n", "media", "variancia", "mediana", "desvio", "meses")
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.variancia = 0.0
+        self.mediana = 0.0
+        self.desvio = 0.0   # desvio absoluto médio em torno da mediana (tamanho do passo)
+        self.meses = {}     # mês da ida -> [n, média]
+
+    def atualizar(self, preco, mes):
+        if self.n == 0:
+            self.media = self.mediana = preco
+            self.desvio = preco * 0.1
+        else:
+            delta = preco - self.media
+            self.media += ALFA * delta
+            self.variancia = (1 - ALFA) * (self.variancia + ALFA * delta * delta)
+
+            self.desvio += ALFA * (abs(preco - self.mediana) - self.desvio)
+            passo = PASSO_MEDIANA * max(self.desvio, 1.0)
+            if preco > self.mediana:
+                self.mediana += passo
+            elif preco < self.mediana:
+                self.mediana -= passo
+        self.n += 1
+
+        # sem data de ida o preço conta só para a rota, não para o mês
+        if mes is None:
+            return
+        sazonal = self.meses.setdefault(mes, [0, preco])
+        sazonal[0] += 1
+        sazonal[1] += max(ALFA, 1 / sazonal[0]) * (preco - sazonal[1])
+
+    @property
+    def desvio_padrao(self):
+        return math.sqrt(self.variancia)
+
+    def baseline(self, mes=None):
+        """Mediana ajustada pelo mês da ida; None enquanto a rota tem poucas observações."""
+        if self.n < MIN_OBSERVACOES:
+            return None
+        sazonal = self.meses.get(mes)
+        if not sazonal or sazonal[0] < MIN_OBSERVACOES_MES or self.media <= 0:
+            return self.mediana
+        fator = min(max(sazonal[1] / self.media, FATOR_SAZONAL[0]), FATOR_SAZONAL[1])
+        return self.mediana * fator
+
+    def para_dict(self):
+        return {
+            "n": self.n, "media": self.media, "variancia": self.variancia,
+            "mediana": self.mediana, "desvio": self.desvio,
+            "meses": {str(m): v for m, v in self.meses.items()},
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        est = cls()
+        est.n = dados["n"]
+        est.media = dados["media"]
+        est.variancia = dados["variancia"]
+        est.mediana = dados["mediana"]
+        est.desvio = dados["desvio"]
+        # chaves que não são mês (ex.: "None" gravado por versões antigas) ficam de fora
+        est.meses = {int(m): list(v) for m, v in dados.get("meses", {}).items() if m.isdigit()}
+        return est
+
+
+def _de_json(estado):
+    try:
+        return EstatisticaRota.de_dict(json.loads(estado))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+
+def _mes(data_ida):
+    mes = (data_ida or "")[5:7]
+    return int(mes) if mes.isdigit() else None
+
+
+class BaselinesRotas:
+    def __init__(self, banco=None, arquivo=None):
+        self.banco = banco or banco_padrao
+        self.arquivo = arquivo or arquivo_padrao
+        self._rotas = {}       # (origem, destino) -> EstatisticaRota
+        self._pendentes = {}   # (origem, destino) -> [(preço, mês)] ainda não gravados
+        self._carregado = False
+        self._lock = threading.RLock()
+
+    def carregar(self):
+        """Grava o que mudou e relê o estado de todas as rotas; retorna quantas rotas têm estatística."""
+        with self._lock:
+            self.salvar()
+            self._ler()
+            if not self._rotas:
+                self._semear()
+            self._carregado = True
+            return len(self._rotas)
+
+    def _ler(self):
+        self._rotas = {}
+        for row in self.banco.ler_baselines():
+            est = _de_json(row["estado"])
+            if est is not None:
+                self._rotas[(row["origem"], row["destino"])] = est
+
+    def _semear(self):
+        # primeira vez: o arquivo de preços inteiro, em ordem de mês
+        for obs in self.arquivo.iterar():
+            self._observar(obs.origem, obs.destino, obs.data_ida, obs.preco, pendente=False)
+        if self._rotas:
+            # outro processo pode ter semeado ao mesmo tempo: vale quem gravou primeiro
+            agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.banco.gravar_baselines(
+                [(o, d, json.dumps(est.para_dict()), agora) for (o, d), est in self._rotas.items()],
+                substituir=False,
+            )
+            self._ler()
+
+    def _garantir(self):
+        if not self._carregado:
+            self.carregar()
+
+    def _observar(self, origem, destino, data_ida, preco, pendente=True):
+        if not preco or preco <= 0:
+            return
+        chave = (origem, destino)
+        est = self._rotas.get(chave)
+        if est is None:
+            est = self._rotas[chave] = EstatisticaRota()
+        mes = _mes(data_ida)
+        est.atualizar(float(preco), mes)
+        if pendente:
+            self._pendentes.setdefault(chave, []).append((float(preco), mes))
+
+    def observar(self, origem, destino, data_ida, preco):
+        with self._lock:
+            self._garantir()
+            self._observar(origem, destino, data_ida, preco)
+
+    def baseline(self, origem, destino, data_ida=None, padrao=None):
+        """Baseline vivo da rota (no mês da ida, se houver); `padrao` se ainda não há dados."""
+        with self._lock:
+            self._garantir()
+            est = self._rotas.get((origem, destino))
+            valor = est.baseline(_mes(data_ida)) if est else None
+        return valor if valor is not None else padrao
+
+    def resumo(self, origem, destino):
+        with self._lock:
+            self._garantir()
+            est = self._rotas.get((origem, destino))
+            if est is None:
+                return None
+            return {
+                "observacoes": est.n,
+                "media": round(est.media, 2),
+                "desvio_padrao": round(est.desvio_padrao, 2),
+                "mediana": round(est.mediana, 2),
+                "baseline": round(est.baseline(), 2) if est.baseline() is not None else None,
+            }
+
+    def salvar(self):
+        """
+        Aplica os preços observados desde o último salvar sobre o estado atual
+        do banco (de qualquer processo) e grava; retorna quantas rotas mudaram.
+        """
+        with self._lock:
+            if not self._pendentes:
+                return 0
+            pendentes, self._pendentes = self._pendentes, {}
+
+            def mesclar(chave, estado):
+                est = (_de_json(estado) if estado else None) or EstatisticaRota()
+                for preco, mes in pendentes[chave]:
+                    est.atualizar(preco, mes)
+                self._rotas[chave] = est
+                return json.dumps(est.para_dict())
+
+            agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            try:
+                self.banco.mesclar_baselines(list(pendentes), mesclar, agora)
+            except Exception:
+                # nada gravado: as observações voltam para a próxima tentativa
+                for chave, obs in pendentes.items():
+                    self._pendentes[chave] = obs + self._pendentes.get(chave, [])
+                raise
+            return len(pendentes)
+
+
+baselines = BaselinesRotas()
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Checkpoint da varredura AUTO.
+O progresso (rotas concluídas, células feitas e o estado de parada
+antecipada de cada rota) é gravado num JSON de forma atômica, em lotes: a
+cada AUTO_CHECKPOINT_LOTE células ou AUTO_CHECKPOINT_INTERVALO segundos, e
+no fim da execução. Se o worker morrer no meio (redeploy do Render,
+restart), a próxima execução retoma do último lote gravado em vez de
+começar do primeiro destino — no máximo um lote de datas é buscado de novo.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+
+from backend.armazenamento.sqlite import DATA_DIR
+
+CAMINHO_CHECKPOINT = os.getenv("AUTO_CHECKPOINT_PATH", os.path.join(DATA_DIR, "checkpoint_auto.json"))
+
+# Checkpoint mais velho que isso é descartado (datas/preços já mudaram)
+CHECKPOINT_MAX_HORAS = float(os.getenv("AUTO_CHECKPOINT_MAX_HORAS", "24"))
+
+# Regravação do JSON (o arquivo inteiro): a cada N células ou T segundos
+CHECKPOINT_LOTE = int(os.getenv("AUTO_CHECKPOINT_LOTE", "25"))
+CHECKPOINT_INTERVALO = float(os.getenv("AUTO_CHECKPOINT_INTERVALO", "10"))
+
+_em_uso = set()   # caminhos de checkpoint com execução em andamento neste processo
+_em_uso_lock = threading.Lock()
+
+
+class CheckpointEmUso(RuntimeError):
+    """Já há uma execução AUTO usando este checkpoint neste processo."""
+
+
+def _agora():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _chave(origem, destino):
+    return f"{origem}->{destino}"
+
+
+def ler_checkpoint(caminho=CAMINHO_CHECKPOINT):
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Checkpoint ilegível ({e}) — ignorando")
+        return None
+
+
+def checkpoint_em_uso(caminho=CAMINHO_CHECKPOINT):
+    return caminho in _em_uso
+
+
+def _liberar(caminho):
+    with _em_uso_lock:
+        _em_uso.discard(caminho)
+
+
+def descartar_checkpoint(caminho=CAMINHO_CHECKPOINT):
+    try:
+        os.remove(caminho)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def resumo_checkpoint(dados):
+    if not dados:
+        return None
+    rotas = dados.get("rotas", {})
+    return {
+        "id": dados.get("id"),
+        "iniciado": dados.get("iniciado"),
+        "atualizado": dados.get("atualizado"),
+        "rotas_iniciadas": len(rotas),
+        "rotas_concluidas": sum(1 for r in rotas.values() if r.get("concluida")),
+        "celulas_feitas": sum(len(r.get("celulas", [])) for r in rotas.values()),
+        "ofertas": sum(r.get("ofertas", 0) for r in rotas.values()),
+        "rotas": {
+            nome: {
+                "concluida": r.get("concluida", False),
+                "celulas_feitas": len(r.get("celulas", [])),
+                "ofertas": r.get("ofertas", 0),
+            }
+            for nome, r in rotas.items()
+        },
+    }
+
+
+def _expirado(dados):
+    try:
+        iniciado = datetime.strptime(dados["iniciado"], "%Y-%m-%d %H:%M:%S")
+    except (KeyError, TypeError, ValueError):
+        return True
+    return datetime.now() - iniciado > timedelta(hours=CHECKPOINT_MAX_HORAS)
+
+
+class CheckpointAuto:
+    def __init__(self, dados, caminho=CAMINHO_CHECKPOINT):
+        self.dados = dados
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._pendentes = 0                 # mudanças ainda não gravadas
+        self._gravado_em = time.monotonic()
+        self._encerrado = False
+
+    @classmethod
+    def abrir(cls, datas_ida, retomar=True, caminho=CAMINHO_CHECKPOINT):
+        """
+        Retoma o checkpoint pendente (se houver e for recente) ou começa um novo.
+        CheckpointEmUso se outra execução AUTO deste processo já está com ele
+        (ex.: /api/executar e /api/agendador/agora ao mesmo tempo).
+        """
+        with _em_uso_lock:
+            if caminho in _em_uso:
+                raise CheckpointEmUso(caminho)
+            _em_uso.add(caminho)
+        try:
+            return cls._carregar(datas_ida, retomar, caminho)
+        except Exception:
+            _liberar(caminho)
+            raise
+
+    @classmethod
+    def _carregar(cls, datas_ida, retomar, caminho):
+        dados = ler_checkpoint(caminho) if retomar else None
+        if dados and _expirado(dados):
+            dados = None
+        if dados:
+            # a grade foi montada até 24h atrás: idas que já passaram saem dela
+            hoje = date.today().isoformat()
+            dados["datas_ida"] = [d for d in dados.get("datas_ida", []) if d >= hoje]
+            if not dados["datas_ida"]:
+                dados = None
+        retomado = dados is not None
+
+        if not retomado:
+            dados = {
+                "id": uuid.uuid4().hex[:8],
+                "iniciado": _agora(),
+                "atualizado": _agora(),
+                "datas_ida": list(datas_ida),
+                "rotas": {},
+            }
+        checkpoint = cls(dados, caminho)
+        checkpoint._gravar()
+        return checkpoint, retomado
+
+    @property
+    def datas_ida(self):
+        return self.dados["datas_ida"]
+
+    def _rota(self, origem, destino):
+        return self.dados["rotas"].setdefault(
+            _chave(origem, destino), {"concluida": False, "celulas": [], "estado": None, "ofertas": 0}
+        )
+
+    def progresso_rota(self, origem, destino):
+        """(estado de parada salvo ou None, conjunto de (ida, volta) já buscadas)."""
+        with self._lock:
+            rota = self.dados["rotas"].get(_chave(origem, destino))
+            if not rota:
+                return None, set()
+            return rota["estado"], {tuple(c) for c in rota["celulas"]}
+
+    def registrar_celula(self, origem, destino, data_ida, data_volta, estado, ofertas=0):
+        with self._lock:
+            rota = self._rota(origem, destino)
+            rota["celulas"].append([data_ida, data_volta])
+            rota["estado"] = dict(estado)
+            rota["ofertas"] += ofertas
+            self._marcar()
+
+    def concluir_rota(self, origem, destino, estado):
+        with self._lock:
+            rota = self._rota(origem, destino)
+            rota["concluida"] = True
+            rota["estado"] = dict(estado)
+            self._marcar()
+
+    def pendentes(self, destinos):
+        """Rotas da lista que ainda não foram concluídas."""
+        with self._lock:
+            rotas = self.dados["rotas"]
+            return [
+                item for item in destinos
+                if not rotas.get(_chave(item["origem"], item["destino"]), {}).get("concluida")
+            ]
+
+    def encerrar(self, completa):
+        """
+        Fim da execução; completa = não há o que retomar e o arquivo sai.
+        Só a primeira chamada vale (o finally da execução chama de novo).
+        """
+        with self._lock:
+            if self._encerrado:
+                return
+            self._encerrado = True
+            if completa:
+                descartar_checkpoint(self.caminho)
+            elif self._pendentes:
+                self._gravar()
+            _liberar(self.caminho)
+
+    def _marcar(self):
+        """Conta uma mudança; grava quando o lote enche ou o intervalo vence."""
+        self._pendentes += 1
+        if (
+            self._pendentes >= CHECKPOINT_LOTE
+            or time.monotonic() - self._gravado_em >= CHECKPOINT_INTERVALO
+        ):
+            self._gravar()
+
+    def _gravar(self):
+        # grava num temporário e troca de uma vez: nunca fica um JSON pela metade
+        self.dados["atualizado"] = _agora()
+        pasta = os.path.dirname(self.caminho)
+        temporario = None
+        try:
+            os.makedirs(pasta, exist_ok=True)
+            fd, temporario = tempfile.mkstemp(prefix=".checkpoint_", dir=pasta)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.dados, f, ensure_ascii=False)
+            os.replace(temporario, self.caminho)
+            self._pendentes = 0
+            self._gravado_em = time.monotonic()
+        except Exception as e:
+            print(f"⚠️ Checkpoint não gravado: {e}")
+            if temporario and os.path.exists(temporario):
+                os.remove(temporario)
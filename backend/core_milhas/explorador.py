@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Ordem adaptativa de exploração das datas no AUTO.
+
+Cada busca fica registrada no histórico do banco (preço, datas e baseline).
+Com esse histórico e as ofertas salvas, cada célula da grade
+(mês da ida, duração) ganha uma estimativa de preço/baseline por rota,
+puxada para a média de todas as rotas quando a rota tem pouco histórico e
+suavizada com os meses vizinhos (regiões baratas). A ordem sai de uma
+amostra de Thompson: células baratas vêm primeiro, mas as pouco exploradas
+ainda aparecem de vez em quando. Com as regras de parada do AUTO, as
+ofertas boas aparecem em menos chamadas.
+"""
+
+import math
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+
+from backend.armazenamento.banco import banco as banco_padrao
+from backend.armazenamento.lotes import EscritorEmLotes
+
+# Observações perdem metade do peso a cada MEIA_VIDA dias
+MEIA_VIDA = float(os.getenv("AUTO_HISTORICO_MEIA_VIDA", "90"))
+# Só esta janela é lida a cada execução (8 meias-vidas: peso < 0,4%)
+JANELA_DIAS = float(os.getenv("AUTO_HISTORICO_JANELA_DIAS", str(8 * MEIA_VIDA)))
+
+PESO_PRIOR = 2.0      # observações "virtuais" da média geral em cada célula
+PESO_VIZINHO = 0.5    # peso dos meses vizinhos na suavização
+DESVIO = 0.25         # incerteza (em preço/baseline) de uma célula sem dados
+
+
+def _data(valor):
+    return datetime.strptime(valor[:10], "%Y-%m-%d")
+
+
+class ExploradorDatas:
+    def __init__(self, banco=None, duracoes=(7, 10, 14)):
+        self.banco = banco or banco_padrao
+        self.duracoes = duracoes
+        self.historico = EscritorEmLotes(self.banco.inserir_historico, nome="historico")
+        self._por_rota = {}   # (origem, destino) -> {(mes, duracao): [soma_razao, peso]}
+        self._geral = {}      # (mes, duracao) -> [soma_razao, peso]
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+
+    # ---------- aprendizado ----------
+
+    def carregar(self):
+        """
+        Relê do banco o histórico e as ofertas salvas da janela recente
+        (chamado no início de cada execução).
+        """
+        try:
+            self.historico.descarregar()
+        except Exception as e:
+            print(f"⚠️ Histórico de buscas indisponível: {e}")
+
+        with self._lock:
+            self._por_rota = {}
+            self._geral = {}
+            agora = datetime.now()
+            desde = (agora - timedelta(days=JANELA_DIAS)).strftime("%Y-%m-%d")
+            # duplicatas (oferta salva + histórico) já saem agrupadas do banco
+            for row in self.banco.observacoes_preco(desde):
+                try:
+                    self._somar(
+                        row["origem"], row["destino"], row["data_ida"], row["data_volta"],
+                        float(row["preco"]), float(row["baseline"]),
+                        _data(row["timestamp"]), agora,
+                    )
+                except (TypeError, ValueError):
+                    continue
+            return sum(p for _, p in self._geral.values())
+
+    def _celula(self, data_ida, data_volta):
+        ida = _data(data_ida)
+        dias = (_data(data_volta) - ida).days
+        duracao = min(self.duracoes, key=lambda d: abs(d - dias))
+        return ida.month, duracao
+
+    def _somar(self, origem, destino, data_ida, data_volta, preco, baseline, quando, agora):
+        if not data_volta or baseline <= 0 or baseline >= 99999 or preco <= 0:
+            return
+        celula = self._celula(data_ida, data_volta)
+        peso = 0.5 ** (max(0, (agora - quando).days) / MEIA_VIDA)
+        razao = preco / baseline
+        for tabela in (self._por_rota.setdefault((origem, destino), {}), self._geral):
+            acumulado = tabela.setdefault(celula, [0.0, 0.0])
+            acumulado[0] += razao * peso
+            acumulado[1] += peso
+
+    def observar(self, origem, destino, data_ida, data_volta, preco, baseline):
+        """Registra o preço de uma busca: entra no modelo e (em lote) no histórico do banco."""
+        agora = datetime.now()
+        with self._lock:
+            try:
+                self._somar(origem, destino, data_ida, data_volta, preco, baseline, agora, agora)
+            except ValueError:
+                pass
+        self.historico.adicionar(
+            (agora.strftime("%Y-%m-%d %H:%M:%S"), origem, destino, preco, data_ida, data_volta, baseline)
+        )
+
+    # ---------- ordenação ----------
+
+    def _media(self, tabela, mes, duracao):
+        """(soma, peso) da célula somada aos meses vizinhos com peso menor."""
+        soma = peso = 0.0
+        for delta, fator in ((0, 1.0), (-1, PESO_VIZINHO), (1, PESO_VIZINHO)):
+            vizinho = (mes + delta - 1) % 12 + 1
+            s, p = tabela.get((vizinho, duracao), (0.0, 0.0))
+            soma += s * fator
+            peso += p * fator
+        return soma, peso
+
+    def _amostra(self, rota, mes, duracao):
+        soma_geral, peso_geral = self._media(self._geral, mes, duracao)
+        prior = soma_geral / peso_geral if peso_geral else 1.0
+        soma, peso = self._media(self._por_rota.get(rota, {}), mes, duracao)
+        media = (soma + PESO_PRIOR * prior) / (peso + PESO_PRIOR)
+        return self._rng.gauss(media, DESVIO / math.sqrt(peso + PESO_PRIOR))
+
+    def ordenar_grade(self, origem, destino, grade, limite=None):
+        """
+        Reordena a grade (ida, [voltas]) pelas células mais promissoras e,
+        com orçamento, fica só com as `limite` primeiras. Sem histórico
+        nenhum a grade volta como veio.
+        """
+        with self._lock:
+            if not self._geral:
+                return grade, False
+            celulas = []
+            for data_ida, voltas in grade:
+                for data_volta in voltas:
+                    mes, duracao = self._celula(data_ida, data_volta)
+                    amostra = self._amostra((origem, destino), mes, duracao)
+                    celulas.append((amostra, len(celulas), data_ida, data_volta))
+
+        celulas.sort()
+        if limite is not None:
+            celulas = celulas[:max(0, limite)]
+
+        # agrupa idas consecutivas para manter o formato (ida, [voltas])
+        ordenada = []
+        for _, _, data_ida, data_volta in celulas:
+            if ordenada and ordenada[-1][0] == data_ida:
+                ordenada[-1][1].append(data_volta)
+            else:
+                ordenada.append((data_ida, [data_volta]))
+        return ordenada, True
+
+
+explorador = ExploradorDatas()
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Índice em memória dos destinos (data/coletas_filtrado_iata.csv) para o
+autocomplete.
+
+Cidade, código IATA e país são normalizados (minúsculas, sem acento) e
+cada termo vai para uma lista ordenada de prefixos: a busca é um bisect,
+O(log n) mais os resultados. Quando o prefixo não acha o bastante, entram
+as palavras a até 1-2 erros de digitação (candidatas por bigramas,
+confirmadas pela distância de edição). O CSV é relido sozinho quando muda
+(mtime/tamanho).
+"""
+
+import bisect
+import csv
+import os
+import threading
+import unicodedata
+from collections import Counter
+
+from backend.armazenamento.sqlite import DATA_DIR
+
+CAMINHO_DESTINOS = os.path.join(DATA_DIR, "coletas_filtrado_iata.csv")
+
+PREFIXO_FUZZY = 8     # só o começo das palavras entra no índice de bigramas
+MIN_FUZZY = 4         # termos mais curtos só casam por prefixo
+MAX_VERIFICADAS = 100 # candidatas (mais bigramas em comum primeiro) medidas pela distância
+MAX_PREFIXOS = 500    # termos lidos por busca (consultas de 1 letra numa lista mundial)
+
+# Peso de cada tipo de acerto (menor = mais relevante)
+_IATA_EXATO, _IATA, _CIDADE, _PALAVRA_CIDADE, _PAIS, _ERRO = range(6)
+
+
+def normalizar(texto):
+    """'São Paulo/Guarulhos' -> 'sao paulo guarulhos'."""
+    sem_acento = "".join(
+        c for c in unicodedata.normalize("NFKD", texto or "") if not unicodedata.combining(c)
+    )
+    limpo = "".join(c if c.isalnum() else " " for c in sem_acento.lower())
+    return " ".join(limpo.split())
+
+
+def _bigramas(texto):
+    """[(bigrama, posição)] do começo da palavra ('^' marca o início)."""
+    texto = "^" + texto[:PREFIXO_FUZZY]
+    return [(texto[i:i + 2], i) for i in range(len(texto) - 1)]
+
+
+def _distancia_prefixo(termo, palavra, maximo):
+    """
+    Menor distância de edição (com transposição) entre `termo` e algum
+    prefixo de `palavra`; maximo + 1 quando passa do máximo.
+    """
+    anterior_2 = None
+    anterior = list(range(len(palavra) + 1))
+    for i in range(1, len(termo) + 1):
+        atual = [i] + [0] * len(palavra)
+        for j in range(1, len(palavra) + 1):
+            custo = termo[i - 1] != palavra[j - 1]
+            atual[j] = min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + custo)
+            if (
+                anterior_2 is not None and i > 1 and j > 1
+                and termo[i - 1] == palavra[j - 2] and termo[i - 2] == palavra[j - 1]
+            ):
+                atual[j] = min(atual[j], anterior_2[j - 2] + 1)
+        if min(atual) > maximo:
+            return maximo + 1
+        anterior_2, anterior = anterior, atual
+    return min(anterior)
+
+
+class IndiceDestinos:
+    def __init__(self, caminho=CAMINHO_DESTINOS):
+        self.caminho = caminho
+        self.versao = None
+        # (destinos, termos, chaves, palavras, bigramas), trocado de uma vez ao remontar:
+        # termos = [(termo normalizado, tipo, índice do destino)] ordenada; chaves = só os
+        # termos (bisect); palavras = palavra -> [(tipo, destino)];
+        # bigramas = (bigrama, posição) -> {palavra}
+        self._dados = ([], [], [], {}, {})
+        self._lock = threading.Lock()
+
+    # ---------- montagem ----------
+
+    def _garantir(self):
+        """Remonta o índice se o CSV mudou desde a última leitura."""
+        try:
+            info = os.stat(self.caminho)
+            versao = (info.st_mtime_ns, info.st_size)
+        except FileNotFoundError:
+            versao = None
+        if versao == self.versao:
+            return
+        with self._lock:
+            if versao != self.versao:
+                self._montar(versao)
+
+    def _montar(self, versao):
+        destinos = []
+        if versao is not None:
+            with open(self.caminho, "r", encoding="utf-8-sig", newline="") as f:
+                for row in csv.DictReader(f):
+                    iata = (row.get("iata") or "").strip().upper()
+                    if iata:
+                        destinos.append({
+                            "iata": iata,
+                            "cidade": (row.get("cidade") or "").strip(),
+                            "pais": (row.get("pais") or "").strip(),
+                        })
+
+        termos, palavras, bigramas = [], {}, {}
+        for i, d in enumerate(destinos):
+            cidade, pais = normalizar(d["cidade"]), normalizar(d["pais"])
+            entradas = [(d["iata"].lower(), _IATA), (cidade, _CIDADE)]
+            entradas += [(p, _PALAVRA_CIDADE) for p in cidade.split()[1:]]
+            entradas += [(pais, _PAIS)] + [(p, _PAIS) for p in pais.split()[1:]]
+            for termo, tipo in entradas:
+                if termo:
+                    termos.append((termo, tipo, i))
+            for termo, tipo in [(cidade, _CIDADE), (pais, _PAIS)]:
+                for palavra in termo.split():
+                    palavras.setdefault(palavra, []).append((tipo, i))
+                    for chave in _bigramas(palavra):
+                        bigramas.setdefault(chave, set()).add(palavra)
+
+        termos.sort()
+        self._dados = (destinos, termos, [t[0] for t in termos], palavras, bigramas)
+        self.versao = versao
+
+    # ---------- consulta ----------
+
+    def versao_atual(self):
+        """(mtime_ns, tamanho) do CSV já indexado; None se ele não existe."""
+        self._garantir()
+        return self.versao
+
+    def todos(self):
+        self._garantir()
+        return self._dados[0]
+
+    def buscar(self, consulta, limite=12):
+        """Destinos que casam com `consulta`, mais relevantes primeiro (cada um com `tipo`)."""
+        self._garantir()
+        termo = normalizar(consulta)
+        if not termo:
+            return []
+
+        # tudo do mesmo índice, mesmo se outro request remontar no meio
+        dados = self._dados
+        destinos, termos, chaves = dados[:3]
+
+        melhores = {}   # destino -> (peso, termo)
+
+        def anotar(i, peso, casado):
+            if i not in melhores or (peso, casado) < melhores[i]:
+                melhores[i] = (peso, casado)
+
+        inicio = bisect.bisect_left(chaves, termo)
+        fim = min(len(termos), inicio + MAX_PREFIXOS)
+        for pos in range(inicio, fim):
+            casado, tipo, i = termos[pos]
+            if not casado.startswith(termo):
+                break
+            peso = _IATA_EXATO if tipo == _IATA and casado == termo else tipo
+            anotar(i, peso, casado)
+
+        ultima = termo.split()[-1]
+        if len(melhores) < limite and len(ultima) >= MIN_FUZZY:
+            for i, distancia, palavra in _aproximados(dados, ultima, limite):
+                anotar(i, _ERRO + distancia, palavra)
+
+        ordem = sorted(
+            melhores.items(),
+            key=lambda item: (item[1][0], len(item[1][1]), destinos[item[0]]["cidade"]),
+        )
+        return [
+            {**destinos[i], "tipo": _nome_tipo(peso)}
+            for i, (peso, _) in ordem[:limite]
+        ]
+
+
+def _aproximados(dados, termo, limite):
+    """(destino, distância, palavra) das palavras a até 1-2 erros do termo."""
+    palavras, indice_bigramas = dados[3], dados[4]
+    maximo = 1 if len(termo) < 6 else 2
+    bigramas = _bigramas(termo)
+    contagem = Counter()
+    for bigrama, posicao in bigramas:
+        # com `maximo` erros o bigrama só pode ter andado até `maximo` posições
+        vizinhas = set()
+        for deslocamento in range(-maximo, maximo + 1):
+            vizinhas.update(indice_bigramas.get((bigrama, posicao + deslocamento), ()))
+        contagem.update(vizinhas)
+
+    # cada erro de digitação estraga no máximo 2 bigramas
+    minimo = max(1, len(bigramas) - 2 * maximo)
+    achados = []
+    for palavra, comuns in contagem.most_common(MAX_VERIFICADAS):
+        if comuns < minimo or len(achados) >= limite:
+            break
+        distancia = _distancia_prefixo(termo, palavra, maximo)
+        if distancia <= maximo:
+            achados += [(i, distancia, palavra) for _, i in palavras[palavra]]
+    return achados
+
+
+def _nome_tipo(peso):
+    if peso >= _ERRO:
+        return "aproximado"
+    return {_IATA_EXATO: "iata", _IATA: "iata", _CIDADE: "cidade", _PALAVRA_CIDADE: "cidade", _PAIS: "pais"}[peso]
+
+
+indice_destinos = IndiceDestinos()
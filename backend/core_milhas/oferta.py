@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Registro compacto de oferta usado pela varredura.
+Com __slots__ cada oferta ocupa uma fração de um dict; códigos IATA,
+datas, moeda e modo se repetem em milhares de ofertas e são internados
+(uma única string por valor no processo).
+"""
+
+import sys
+
+COLUNAS = (
+    "origem", "destino", "data_ida", "data_volta",
+    "preco", "moeda", "link", "timestamp",
+    "modo", "baseline",
+)
+
+
+def _intern(valor):
+    return sys.intern(valor) if isinstance(valor, str) else valor
+
+
+class Oferta:
+    __slots__ = COLUNAS
+
+    def __init__(self, origem, destino, data_ida, data_volta, preco, moeda,
+                 link, modo, baseline, timestamp=None):
+        self.origem = _intern(origem)
+        self.destino = _intern(destino)
+        self.data_ida = _intern(data_ida)
+        self.data_volta = _intern(data_volta)
+        self.preco = preco
+        self.moeda = _intern(moeda)
+        self.link = link
+        self.modo = _intern(modo)
+        self.baseline = baseline
+        self.timestamp = timestamp
+
+    def to_dict(self):
+        return {coluna: getattr(self, coluna) for coluna in COLUNAS}
+
+    def __repr__(self):
+        return (
+            f"Oferta({self.origem}->{self.destino} {self.data_ida}→{self.data_volta} "
+            f"R$ {self.preco:.2f} {self.modo})"
+        )
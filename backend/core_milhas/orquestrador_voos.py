@@ -1,57 +1,126 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import csv
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
 
 from backend.core_amadeus.rotator import amadeus_client as amadeus_client_rotator
+from backend.core_amadeus.rotator_async import AmadeusRotatorAsync
+from backend.core_amadeus.cota import orcamento_execucao
 from backend.api.log_buffer import add_log   # <- seguro, sem circular import
+from backend.armazenamento.arquivo_precos import Observacao, arquivo_precos
+from backend.armazenamento.banco import banco
+from backend.armazenamento.lotes import EscritorEmLotes
+from backend.core_milhas.baselines import baselines
+from backend.core_milhas.checkpoint import CheckpointAuto, CheckpointEmUso
+from backend.core_milhas.explorador import explorador
+from backend.core_milhas.oferta import COLUNAS, Oferta
+from backend.core_milhas.priorizador import priorizador
+from backend.core_milhas.progresso import acompanhar_execucao, iniciar_progresso
+from backend.core_milhas.planejador import (
+    OrcamentoExecucao,
+    orcamento_da_execucao,
+    planejar_orcamento,
+    reduzir_grade,
+)
 
 
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.abspath(os.path.join(ROOT_DIR, "..", "data"))
 
 CAMINHO_CSV_INPUT = os.path.join(DATA_DIR, "coletas_completo.csv")
-CAMINHO_CSV_OUTPUT = os.path.join(DATA_DIR, "resultados_v2.csv")
 
+# Origem das buscas manuais/alertas quando nenhuma é informada
+ORIGEM_PADRAO = os.getenv("ORIGEM_PADRAO", "FOR")
 
-# ================= UTIL =================
+# Matriz do AUTO: cada destino do CSV contra todas estas origens (ex.: FOR,REC,NAT,GRU);
+# vazio = usa a coluna origem do CSV
+AUTO_ORIGENS = [o.strip().upper() for o in os.getenv("AUTO_ORIGENS", "").split(",") if o.strip()]
 
-def salvar_oferta_csv(oferta: dict):
-    os.makedirs(os.path.dirname(CAMINHO_CSV_OUTPUT), exist_ok=True)
-    newfile = not os.path.exists(CAMINHO_CSV_OUTPUT)
+# Destinos processados em paralelo no AUTO (limitado ao nº de chaves Amadeus)
+AUTO_WORKERS = int(os.getenv("AUTO_WORKERS", "1"))
 
-    colunas = [
-        "origem","destino","data_ida","data_volta",
-        "preco","moeda","link","timestamp",
-        "modo","baseline"
-    ]
+# Destinos em voo ao mesmo tempo no fluxo async
+ASYNC_CONCORRENCIA = int(os.getenv("AUTO_ASYNC_CONCORRENCIA", "24"))
+
+# Pré-filtro flight-dates: 1 chamada por rota escolhe as datas que valem
+# um buscar_voo_exato (preço <= baseline * fator); sem dados → grade completa
+AUTO_PREFILTRO = os.getenv("AUTO_PREFILTRO", "0") == "1"
+PREFILTRO_FATOR = float(os.getenv("AUTO_PREFILTRO_FATOR", "1.15"))
+PREFILTRO_MAX = int(os.getenv("AUTO_PREFILTRO_MAX", "8"))
+PREFILTRO_MIN = 2   # nenhuma data abaixo do fator → confirma as 2 mais baratas
+
+# Ordem adaptativa: células (mês, duração) mais baratas no histórico primeiro
+AUTO_ADAPTATIVO = os.getenv("AUTO_ADAPTATIVO", "0") == "1"
+
+# Retoma a varredura interrompida (checkpoint em data/checkpoint_auto.json)
+AUTO_RETOMAR = os.getenv("AUTO_RETOMAR", "1") == "1"
+
+# Baseline vivo: estatística de preços da rota (por mês da ida) no lugar do
+# preco_baseline do CSV, que continua valendo enquanto a rota tem poucos dados
+AUTO_BASELINE_VIVO = os.getenv("AUTO_BASELINE_VIVO", "0") == "1"
+
+# Prioridade: rotas paradas há mais tempo, voláteis ou perto do baseline
+# primeiro, com o orçamento dividido pela nota (em vez da ordem do CSV)
+AUTO_PRIORIZAR = os.getenv("AUTO_PRIORIZAR", "0") == "1"
+
+DURACOES_VOLTA = (7, 10, 14)
 
-    with open(CAMINHO_CSV_OUTPUT, "a", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=colunas)
-        if newfile:
-            w.writeheader()
+# Ofertas vão para a tabela resultados em lotes (RESULTADOS_LOTE / RESULTADOS_INTERVALO)
+escritor_resultados = EscritorEmLotes(banco.inserir_resultados, nome="resultados")
+escritor_arquivo = EscritorEmLotes(arquivo_precos.gravar, nome="arquivo_precos")
 
-        oferta["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        w.writerow(oferta)
+
+# ================= UTIL =================
+
+def salvar_oferta(oferta: Oferta):
+    escritor_resultados.adicionar(tuple(getattr(oferta, c) for c in COLUNAS))
 
     add_log(
-        f"💾 CSV -> {oferta['origem']}→{oferta['destino']} "
-        f"{oferta['data_ida']} | R$ {oferta['preco']:.2f}"
+        f"💾 Oferta -> {oferta.origem}→{oferta.destino} "
+        f"{oferta.data_ida} | R$ {oferta.preco:.2f}"
     )
 
 
+def observar_preco(origem, destino, data_ida, data_volta, preco, moeda):
+    """Todo preço buscado (bom ou não) atualiza o baseline vivo e vai para o arquivo histórico."""
+    baselines.observar(origem, destino, data_ida, preco)
+    escritor_arquivo.adicionar(Observacao(
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        origem, destino, data_ida, data_volta, preco, moeda,
+    ))
+
+
 # ================= MANUAL =================
 
-def _fluxo_manual_exato(destinos, data_ida, data_volta=None):
-    origem = "FOR"
+def _origens_manuais(origens):
+    """Lista de origens de uma busca manual (texto, lista ou None = ORIGEM_PADRAO)."""
+    if isinstance(origens, str):
+        origens = origens.split(",")
+    origens = [o.strip().upper() for o in (origens or []) if o and o.strip()]
+    return origens or [ORIGEM_PADRAO]
+
+
+def _pares_manuais(origens, destinos):
+    return [
+        (origem, destino)
+        for destino in (destinos or [])
+        for origem in origens
+        if origem != destino
+    ]
+
+
+def _fluxo_manual_exato(destinos, data_ida, data_volta=None, origens=None):
+    origens = _origens_manuais(origens)
     ofertas = []
 
     add_log("🟠 EXECUÇÃO MANUAL")
-    add_log(f"➡ Destinos: {destinos}")
+    add_log(f"➡ Origens: {origens} | Destinos: {destinos}")
     add_log(f"➡ Ida: {data_ida} | Volta: {data_volta}")
+    baselines.carregar()
 
-    for destino in (destinos or []):
+    for origem, destino in _pares_manuais(origens, destinos):
         try:
             voos = amadeus_client_rotator.buscar_voo_exato(
                 origem, destino, data_ida, data_volta
@@ -61,135 +130,646 @@ def _fluxo_manual_exato(destinos, data_ida, data_volta=None):
                 add_log(f"⚠️ SEM RESULTADO {origem}->{destino}")
                 continue
 
-            price = voos[0].get("price", {})
-            preco = float(price.get("grandTotal") or price.get("total") or 0)
+            preco = voos[0].preco
+            observar_preco(origem, destino, data_ida, data_volta, preco, voos[0].moeda)
 
             add_log(
                 f"🎯 {origem}->{destino} | {data_ida}→{data_volta} "
                 f"| 💰 R$ {preco:.2f}"
             )
 
-            oferta = {
-                "origem": origem,
-                "destino": destino,
-                "data_ida": data_ida,
-                "data_volta": data_volta,
-                "preco": preco,
-                "moeda": price.get("currency", "BRL"),
-                "link": "https://www.google.com/travel/flights",
-                "modo": "MANUAL",
-                "baseline": 99999
-            }
-
-            salvar_oferta_csv(oferta)
+            oferta = _montar_oferta(
+                origem, destino, data_ida, data_volta, preco,
+                voos[0].moeda, "https://www.google.com/travel/flights",
+                "MANUAL", 99999
+            )
+
+            salvar_oferta(oferta)
             ofertas.append(oferta)
 
         except Exception as e:
-            add_log(f"❌ Erro MANUAL {destino}: {e}")
+            add_log(f"❌ Erro MANUAL {origem}->{destino}: {e}")
 
+    _descarregar_resultados()
     add_log(f"🟠 Manual finalizado — {len(ofertas)} ofertas salvas")
     return ofertas
 
 
 # ================= AUTO (com lógica inteligente) =================
 
-def _fluxo_automatico():
+def _fluxo_automatico(
+    workers=None, prefiltro=None, adaptativo=None, retomar=None, baseline_vivo=None, priorizar=None,
+    origens=None
+):
     add_log("🔵 EXECUÇÃO AUTOMÁTICA")
 
+    origens = _origens_auto(origens)
+    chaves = len(amadeus_client_rotator.credentials) or 1
+    # matriz com várias origens: uma fila única atendida por todas as chaves
+    workers = workers or (chaves if len(origens) > 1 else AUTO_WORKERS)
+    # concorrência nunca passa do número de chaves carregadas
+    workers = max(1, min(workers, chaves))
+
+    preparado = _preparar_execucao_auto(
+        prefiltro, adaptativo, retomar, paralelo=workers > 1,
+        baseline_vivo=baseline_vivo, priorizar=priorizar, origens=origens,
+    )
+    if not preparado:
+        return []
+    destinos, limites, ctx = preparado
+
+    ofertas = []
+    try:
+        if workers == 1:
+            for item, limite in zip(destinos, limites):
+                ofertas.extend(_processar_rota(item, ctx, limite))
+        else:
+            add_log(f"⚡ Modo paralelo: {workers} rotas simultâneas")
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auto") as pool:
+                futuros = [
+                    pool.submit(_processar_rota, item, ctx, limite)
+                    for item, limite in zip(destinos, limites)
+                ]
+                # mantém a ordem da execução no retorno
+                for futuro, item in zip(futuros, destinos):
+                    try:
+                        ofertas.extend(futuro.result())
+                    except Exception as e:
+                        add_log(f"❌ Erro AUTO {item['origem']}->{item['destino']}: {e}")
+
+        _finalizar_execucao_auto(ctx, ofertas)
+    finally:
+        # erro no meio: o checkpoint fica para retomar e deixa de estar "em uso"
+        ctx["checkpoint"].encerrar(completa=False)
+    return ofertas
+
+
+def _origens_auto(origens):
+    """Origens da matriz do AUTO ([] = coluna origem do CSV)."""
+    if origens is None:
+        return AUTO_ORIGENS
+    return _origens_manuais(origens)
+
+
+def matriz_rotas(destinos, origens):
+    """
+    Cada destino do CSV contra cada origem, intercaladas por destino: na fila
+    única, todas as origens avançam juntas.
+    """
+    rotas = []
+    vistos = set()
+    for item in destinos:
+        if item["destino"] in vistos:
+            continue
+        vistos.add(item["destino"])
+        for origem in origens:
+            if origem != item["destino"]:
+                rotas.append({**item, "origem": origem})
+    return rotas
+
+
+def _processar_rota(item, ctx, limite=None):
+    """Uma tarefa da fila: varre a rota e soma no progresso da origem dela."""
+    ofertas = []
+    # as chamadas HTTP feitas nesta thread são cobradas do orçamento da execução
+    contexto = orcamento_execucao.set(ctx["orcamento"])
+    try:
+        ofertas = _processar_destino(item, ctx, limite)
+        return ofertas
+    finally:
+        orcamento_execucao.reset(contexto)
+        _rota_concluida(item, ctx, len(ofertas))
+
+
+def _rota_concluida(item, ctx, ofertas):
+    progresso = ctx["progresso"]
+    feitas, total = progresso.concluir(item, ofertas)
+    if len(progresso.origens) > 1:
+        add_log(f"📍 {item['origem']}: {feitas}/{total} rotas concluídas")
+
+
+def _preparar_execucao_auto(
+    prefiltro, adaptativo, retomar, paralelo, baseline_vivo=None, priorizar=None, origens=None
+):
+    """
+    Carrega os destinos e monta o contexto da execução (datas, pré-filtro,
+    ordem adaptativa, checkpoint, prioridade das rotas, orçamento de chamadas).
+    Retorna (destinos pendentes, limites por rota, ctx) ou None.
+    """
     destinos = carregar_destinos_csv()
     if not destinos:
         add_log("⚠️ Nenhum destino encontrado no CSV.")
-        return []
+        return None
 
     add_log(f"✔ {len(destinos)} destinos carregados")
 
+    if origens:
+        destinos = matriz_rotas(destinos, origens)
+        add_log(f"🗺️ Matriz: {len(origens)} origens ({', '.join(origens)}) → {len(destinos)} rotas")
+
+    prefiltro = AUTO_PREFILTRO if prefiltro is None else prefiltro
+    if prefiltro:
+        add_log("🔎 Pré-filtro flight-dates ativo")
+
+    adaptativo = AUTO_ADAPTATIVO if adaptativo is None else adaptativo
+    if adaptativo:
+        peso = explorador.carregar()
+        add_log(f"🧭 Ordem adaptativa ativa ({peso:.0f} observações no histórico)")
+
+    # todo preço buscado alimenta as estatísticas (mesmo sem baseline vivo):
+    # carregar aqui evita a leitura inteira no primeiro preço, no meio da varredura
+    rotas = baselines.carregar()
+    baseline_vivo = AUTO_BASELINE_VIVO if baseline_vivo is None else baseline_vivo
+    if baseline_vivo:
+        add_log(f"📈 Baseline vivo ativo ({rotas} rotas com estatística)")
+
+    total = orcamento_da_execucao(amadeus_client_rotator.credentials)
+    if total is not None:
+        add_log(f"💰 Orçamento desta execução: {total} chamadas")
+        if total <= 0:
+            add_log("🛑 Cota do dia esgotada — execução AUTO não iniciada")
+            return None
+
+    retomar = AUTO_RETOMAR if retomar is None else retomar
+    try:
+        checkpoint, retomado = CheckpointAuto.abrir(gerar_datas_ida_reverso(), retomar)
+    except CheckpointEmUso:
+        add_log("⚠️ Já existe uma execução AUTO em andamento — esta não foi iniciada")
+        return None
+    try:
+        if retomado:
+            pendentes = checkpoint.pendentes(destinos)
+            add_log(
+                f"♻️ Retomando execução de {checkpoint.dados['iniciado']}: "
+                f"{len(destinos) - len(pendentes)} de {len(destinos)} destinos já concluídos"
+            )
+            destinos = pendentes
+
+        priorizar = AUTO_PRIORIZAR if priorizar is None else priorizar
+        if priorizar:
+            destinos, limites = _priorizar_destinos(destinos, total)
+        else:
+            limites = planejar_orcamento(destinos, total)
+    except Exception:
+        checkpoint.encerrar(completa=False)
+        raise
+
+    ctx = {
+        "datas_ida": checkpoint.datas_ida,   # a retomada mantém a grade original
+        "prefiltro": prefiltro,
+        "adaptativo": adaptativo,
+        "baseline_vivo": baseline_vivo,
+        "paralelo": paralelo,
+        "orcamento": OrcamentoExecucao(total),
+        "checkpoint": checkpoint,
+        "destinos": destinos,
+        "progresso": iniciar_progresso(destinos),
+    }
+    return destinos, limites, ctx
+
+
+def _priorizar_destinos(destinos, total):
+    """Rotas na ordem de prioridade e o orçamento de cada uma; as que não cabem ficam para depois."""
+    _descarregar_resultados()   # última busca de cada rota em dia no banco
+    ordenados, limites, notas = priorizador.ordenar(destinos, total)
+
+    add_log(f"🎯 Prioridade das rotas ativa ({len(ordenados)} de {len(destinos)} nesta execução)")
+    for item, limite in list(zip(ordenados, limites))[:3]:
+        nota, idade, volatilidade, proximidade = notas[(item["origem"], item["destino"])]
+        add_log(
+            f"   {item['origem']}->{item['destino']}: nota {nota:.2f} "
+            f"(idade {idade:.2f} | volatilidade {volatilidade:.2f} | proximidade {proximidade:.2f})"
+            + (f" | {limite} chamadas" if limite is not None else "")
+        )
+    if len(ordenados) < len(destinos):
+        add_log(f"⏭️ {len(destinos) - len(ordenados)} rotas de menor prioridade ficam para a próxima execução")
+    return ordenados, limites
+
+
+def _finalizar_execucao_auto(ctx, ofertas):
+    orcamento = ctx["orcamento"]
+    if orcamento.total is not None:
+        add_log(f"💰 Chamadas usadas: {orcamento.gastas}/{orcamento.total}")
+
+    _descarregar_resultados()
+
+    pendentes = ctx["checkpoint"].pendentes(ctx["destinos"])
+    if pendentes:
+        add_log(f"💾 Checkpoint mantido: {len(pendentes)} destinos pendentes para a próxima execução")
+    ctx["checkpoint"].encerrar(completa=not pendentes)
+    add_log(f"\n🔵 Auto finalizado — {len(ofertas)} ofertas salvas")
+
+
+def _processar_destino(item, ctx, limite=None):
+    """Varre as datas de um destino com seu próprio estado de parada antecipada."""
+    origem = item["origem"]
+    destino = item["destino"]
+    log = _log_destino(item, ctx)
+
     ofertas = []
-    datas_ida = gerar_datas_ida_reverso()
+    estado, feitas = _retomar_destino(item, ctx, log)
+    if _destino_encerrado(estado):
+        ctx["checkpoint"].concluir_rota(origem, destino, estado)
+        return ofertas
+
+    datas_baratas = None
+    if ctx["prefiltro"] and ctx["orcamento"].disponivel():
+        faixa_ida, duracao = _janela_flight_dates(ctx["datas_ida"])
+        try:
+            datas_baratas = amadeus_client_rotator.buscar_datas_baratas(
+                origem, destino, faixa_ida, duracao
+            )
+        except Exception as e:
+            log(f"⚠️ flight-dates falhou: {e}")
 
-    for item in destinos:
-        origem = item["origem"]
-        destino = item["destino"]
-        baseline = float(item["baseline"])
+    for data_ida, datas_volta in _grade_do_destino(item, ctx, datas_baratas, limite, log):
+        for data_volta in datas_volta:
+            if (data_ida, data_volta) in feitas:
+                continue
 
-        add_log(f"\n🏁 {origem}->{destino} | baseline R$ {baseline:.2f}")
+            if not ctx["orcamento"].disponivel():
+                log("🛑 Orçamento de chamadas esgotado — encerrando destino")
+                return ofertas
 
-        entrou_zona = False
-        buscas_pos_baseline = 0
-        strikes_muito_caro = 0   # 👈 tolerância
+            log(f"🌐 {data_ida} → {data_volta}")
 
-        for data_ida in datas_ida:
-            for data_volta in gerar_datas_volta(data_ida):
+            try:
+                voos = amadeus_client_rotator.buscar_voo_exato(
+                    origem, destino, data_ida, data_volta
+                )
+                antes = len(ofertas)
+                parar = _registrar_resultado(item, ctx, estado, data_ida, data_volta, voos, ofertas, log)
+                ctx["checkpoint"].registrar_celula(
+                    origem, destino, data_ida, data_volta, estado, len(ofertas) - antes
+                )
+                if parar:
+                    break
 
-                add_log(f"🌐 {data_ida} → {data_volta}")
+            except Exception as e:
+                log(f"❌ Erro AUTO {destino}: {e}")
 
-                try:
-                    voos = amadeus_client_rotator.buscar_voo_exato(
-                        origem, destino, data_ida, data_volta
-                    )
+        # sai do destino quando um dos critérios dispara
+        if _destino_encerrado(estado):
+            break
 
-                    if not voos:
-                        add_log("⚠️ Nenhum voo retornado")
-                        continue
+    ctx["checkpoint"].concluir_rota(origem, destino, estado)
+    return ofertas
 
-                    price = voos[0].get("price", {})
-                    preco = float(price.get("grandTotal") or price.get("total") or 0)
 
-                    add_log(f"   💵 R$ {preco:.2f} (baseline R$ {baseline:.2f})")
+def _baseline(item, ctx, data_ida=None):
+    """Baseline usado nas regras: o vivo (no mês da ida) se ativo e já houver dados, senão o do CSV."""
+    padrao = float(item["baseline"])
+    if not ctx["baseline_vivo"]:
+        return padrao
+    return baselines.baseline(item["origem"], item["destino"], data_ida, padrao)
+
+
+def _log_destino(item, ctx):
+    """Abre o bloco do destino no log e devolve o logger dele."""
+    origem = item["origem"]
+    destino = item["destino"]
+
+    # com várias threads/corrotinas, cada linha identifica a rota
+    prefixo = f"[{origem}->{destino}] " if ctx["paralelo"] else ""
+
+    def log(msg):
+        add_log(f"{prefixo}{msg}")
+
+    baseline = float(item["baseline"])
+    vivo = _baseline(item, ctx)
+    if vivo != baseline:
+        add_log(f"\n{prefixo}🏁 {origem}->{destino} | baseline R$ {vivo:.2f} (vivo; CSV R$ {baseline:.2f})")
+    else:
+        add_log(f"\n{prefixo}🏁 {origem}->{destino} | baseline R$ {baseline:.2f}")
+    return log
+
+
+def _retomar_destino(item, ctx, log):
+    """Estado de parada e células já buscadas do destino (vazios se ele não começou)."""
+    estado, feitas = ctx["checkpoint"].progresso_rota(item["origem"], item["destino"])
+    if feitas:
+        log(f"♻️ Retomando: {len(feitas)} datas já buscadas")
+    return estado or _novo_estado_destino(), feitas
+
+
+def _grade_do_destino(item, ctx, datas_baratas, limite, log):
+    """Grade (ida, [voltas]) do destino: pré-filtrada, completa ou adaptativa, e reduzida ao orçamento."""
+    grade = None
+    if ctx["prefiltro"]:
+        grade = _grade_prefiltrada(datas_baratas, _baseline(item, ctx), log)
+        if limite is not None:
+            limite -= 1   # a chamada ao flight-dates já saiu da parte da rota
+
+    # o flight-dates já ordena pelo preço de agora; o histórico só ordena a grade completa
+    if not grade and ctx["adaptativo"]:
+        grade, ordenada = explorador.ordenar_grade(
+            item["origem"], item["destino"], _grade_completa(ctx["datas_ida"]), limite
+        )
+        if ordenada:
+            if grade:
+                log(f"🧭 Ordem adaptativa: começando por {grade[0][0]} → {grade[0][1][0]}")
+            return grade
+    grade = grade or _grade_completa(ctx["datas_ida"])
+
+    if limite is not None:
+        total = sum(len(voltas) for _, voltas in grade)
+        grade = reduzir_grade(grade, limite)
+        reduzida = sum(len(voltas) for _, voltas in grade)
+        if reduzida < total:
+            log(f"✂️ Grade reduzida ao orçamento: {reduzida} de {total} datas")
+    return grade
+
+
+def _registrar_resultado(item, ctx, estado, data_ida, data_volta, voos, ofertas, log):
+    """Avalia o preço retornado, salva a oferta se for boa; True = sair das voltas desta ida."""
+    if not voos:
+        log("⚠️ Nenhum voo retornado")
+        return False
+
+    baseline = _baseline(item, ctx, data_ida)
+    preco = voos[0].preco
+    explorador.observar(item["origem"], item["destino"], data_ida, data_volta, preco, float(item["baseline"]))
+
+    salvar, parar = _avaliar_preco(estado, preco, baseline, log)
+    # o preço só entra na estatística depois de ser julgado por ela
+    observar_preco(item["origem"], item["destino"], data_ida, data_volta, preco, voos[0].moeda)
+
+    if salvar:
+        oferta = _montar_oferta(
+            item["origem"], item["destino"], data_ida, data_volta, preco,
+            voos[0].moeda, "TEMP", "AUTO", baseline
+        )
+        salvar_oferta(oferta)
+        ofertas.append(oferta)
+
+    return parar
+
+
+def _novo_estado_destino():
+    return {
+        "entrou_zona": False,
+        "buscas_pos_baseline": 0,
+        "strikes_muito_caro": 0,   # 👈 tolerância
+    }
+
+
+def _destino_encerrado(estado):
+    return (
+        estado["strikes_muito_caro"] >= 3
+        or (estado["entrou_zona"] and estado["buscas_pos_baseline"] >= 3)
+    )
 
-                    # 🟥 muito caro (passagem fora da realidade)
-                    if preco > baseline * 1.35:
-                        strikes_muito_caro += 1
-                        add_log(f"   🔺 Muito acima ({strikes_muito_caro}/2)")
 
-                        # só pula se repetiu padrão caro
-                        if strikes_muito_caro >= 3:
-                            add_log("   🛑 Padrão caro confirmado — pulando destino")
-                            break
-                        continue
+def _avaliar_preco(estado, preco, baseline, log):
+    """
+    Aplica as regras do AUTO a um preço e atualiza o estado do destino.
+    Retorna (salvar, parar): salvar a oferta / sair das voltas desta ida.
+    """
+    log(f"   💵 R$ {preco:.2f} (baseline R$ {baseline:.2f})")
 
-                    # 🟡 zona de atenção
-                    if preco <= baseline * 1.15:
-                        entrou_zona = True
-                        buscas_pos_baseline += 1
+    # 🟥 muito caro (passagem fora da realidade)
+    if preco > baseline * 1.35:
+        estado["strikes_muito_caro"] += 1
+        log(f"   🔺 Muito acima ({estado['strikes_muito_caro']}/2)")
 
-                    # ⛔ acima do baseline comum
-                    if preco > baseline:
-                        add_log("   ⛔ Acima do baseline — ignorando")
-                        continue
+        # só pula se repetiu padrão caro
+        if estado["strikes_muito_caro"] >= 3:
+            log("   🛑 Padrão caro confirmado — pulando destino")
+            return False, True
+        return False, False
 
-                    # ✅ oferta encontrada
-                    add_log("   ✅ PREÇO BOM — salvando")
+    # 🟡 zona de atenção
+    if preco <= baseline * 1.15:
+        estado["entrou_zona"] = True
+        estado["buscas_pos_baseline"] += 1
 
-                    oferta = {
-                        "origem": origem,
-                        "destino": destino,
-                        "data_ida": data_ida,
-                        "data_volta": data_volta,
-                        "preco": preco,
-                        "moeda": price.get("currency", "BRL"),
-                        "link": "TEMP",
-                        "modo": "AUTO",
-                        "baseline": baseline
-                    }
+    # ⛔ acima do baseline comum
+    if preco > baseline:
+        log("   ⛔ Acima do baseline — ignorando")
+        return False, False
 
-                    salvar_oferta_csv(oferta)
-                    ofertas.append(oferta)
+    # ✅ oferta encontrada
+    log("   ✅ PREÇO BOM — salvando")
 
-                    # encerra após confirmar comportamento
-                    if entrou_zona and buscas_pos_baseline >= 3:
-                        add_log("   🟢 Zona validada — encerrando destino")
-                        break
+    # encerra após confirmar comportamento
+    if estado["entrou_zona"] and estado["buscas_pos_baseline"] >= 3:
+        log("   🟢 Zona validada — encerrando destino")
+        return True, True
+    return True, False
 
-                except Exception as e:
-                    add_log(f"❌ Erro AUTO {destino}: {e}")
 
-                time.sleep(0.3)
+def _grade_completa(datas_ida):
+    return [(data_ida, gerar_datas_volta(data_ida)) for data_ida in datas_ida]
 
-            # sai do destino quando um dos critérios dispara
-            if strikes_muito_caro >= 3 or (entrou_zona and buscas_pos_baseline >= 3):
-                break
 
-    add_log(f"\n🔵 Auto finalizado — {len(ofertas)} ofertas salvas")
+def _janela_flight_dates(datas_ida):
+    """Faixa de ida e de duração do flight-dates cobrindo a mesma janela da grade."""
+    faixa_ida = f"{min(datas_ida)},{max(datas_ida)}"
+    duracao = f"{min(DURACOES_VOLTA)},{max(DURACOES_VOLTA)}"
+    return faixa_ida, duracao
+
+
+def _grade_prefiltrada(datas_baratas, baseline, log):
+    """
+    Monta a grade (ida, [voltas]) só com as datas candidatas do flight-dates,
+    mais baratas primeiro. None quando a rota não tem dados (usar grade completa).
+    """
+    precos = []
+    for item in datas_baratas or []:
+        try:
+            precos.append((float(item["price"]["total"]), item["departureDate"], item.get("returnDate")))
+        except (KeyError, TypeError, ValueError):
+            continue
+
+    if not precos:
+        log("🔎 flight-dates sem dados — usando grade completa")
+        return None
+
+    precos.sort()
+    candidatas = [p for p in precos if p[0] <= baseline * PREFILTRO_FATOR]
+    if not candidatas:
+        candidatas = precos[:PREFILTRO_MIN]
+    candidatas = candidatas[:PREFILTRO_MAX]
+
+    log(f"🔎 flight-dates: {len(candidatas)} de {len(precos)} datas candidatas")
+
+    grade = {}
+    for _, data_ida, data_volta in candidatas:
+        grade.setdefault(data_ida, []).append(data_volta)
+    return list(grade.items())
+
+
+def _descarregar_resultados():
+    for escritor in (escritor_resultados, escritor_arquivo, explorador.historico):
+        try:
+            escritor.descarregar()
+        except Exception as e:
+            add_log(f"⚠️ Falha ao gravar {escritor.nome}: {e}")
+    try:
+        baselines.salvar()
+    except Exception as e:
+        add_log(f"⚠️ Falha ao gravar baselines: {e}")
+
+
+def _montar_oferta(origem, destino, data_ida, data_volta, preco, moeda, link, modo, baseline):
+    return Oferta(
+        origem, destino, data_ida, data_volta, preco, moeda, link, modo, baseline,
+        timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+
+# ================= ASYNC (httpx) =================
+
+async def _fluxo_manual_exato_async(
+    cliente, destinos, data_ida, data_volta=None, concorrencia=None, origens=None
+):
+    origens = _origens_manuais(origens)
+
+    add_log("🟠 EXECUÇÃO MANUAL (async)")
+    add_log(f"➡ Origens: {origens} | Destinos: {destinos}")
+    add_log(f"➡ Ida: {data_ida} | Volta: {data_volta}")
+    # SQLite e arquivos são bloqueantes: fora do event loop (as buscas seguem em voo)
+    await asyncio.to_thread(baselines.carregar)
+
+    limite = asyncio.Semaphore(concorrencia or ASYNC_CONCORRENCIA)
+
+    async def _um_destino(origem, destino):
+        async with limite:
+            try:
+                voos = await cliente.buscar_voo_exato(origem, destino, data_ida, data_volta)
+            except Exception as e:
+                add_log(f"❌ Erro MANUAL {origem}->{destino}: {e}")
+                return None
+
+        if not voos:
+            add_log(f"⚠️ SEM RESULTADO {origem}->{destino}")
+            return None
+
+        preco = voos[0].preco
+        # um lote cheio grava no banco na hora
+        await asyncio.to_thread(observar_preco, origem, destino, data_ida, data_volta, preco, voos[0].moeda)
+
+        add_log(
+            f"🎯 {origem}->{destino} | {data_ida}→{data_volta} "
+            f"| 💰 R$ {preco:.2f}"
+        )
+
+        oferta = _montar_oferta(
+            origem, destino, data_ida, data_volta, preco,
+            voos[0].moeda, "https://www.google.com/travel/flights",
+            "MANUAL", 99999
+        )
+        await asyncio.to_thread(salvar_oferta, oferta)
+        return oferta
+
+    resultados = await asyncio.gather(
+        *(_um_destino(origem, destino) for origem, destino in _pares_manuais(origens, destinos))
+    )
+    ofertas = [o for o in resultados if o]
+
+    await asyncio.to_thread(_descarregar_resultados)
+    add_log(f"🟠 Manual finalizado — {len(ofertas)} ofertas salvas")
+    return ofertas
+
+
+async def _fluxo_automatico_async(
+    cliente, concorrencia=None, prefiltro=None, adaptativo=None, retomar=None,
+    baseline_vivo=None, priorizar=None, origens=None
+):
+    add_log("🔵 EXECUÇÃO AUTOMÁTICA (async)")
+
+    # histórico, baselines, priorizador e checkpoint leem banco/arquivos:
+    # tudo isso roda numa thread para não parar o event loop
+    preparado = await asyncio.to_thread(
+        _preparar_execucao_auto,
+        prefiltro, adaptativo, retomar, paralelo=True,
+        baseline_vivo=baseline_vivo, priorizar=priorizar, origens=_origens_auto(origens),
+    )
+    if not preparado:
+        return []
+    destinos, limites, ctx = preparado
+
+    semaforo = asyncio.Semaphore(concorrencia or ASYNC_CONCORRENCIA)
+
+    async def _um_destino(item, limite):
+        ofertas = []
+        # cada tarefa tem seu contexto: as chamadas HTTP dela vão para este orçamento
+        orcamento_execucao.set(ctx["orcamento"])
+        async with semaforo:
+            try:
+                ofertas = await _processar_destino_async(cliente, item, ctx, limite)
+            except Exception as e:
+                add_log(f"❌ Erro AUTO {item['origem']}->{item['destino']}: {e}")
+            finally:
+                _rota_concluida(item, ctx, len(ofertas))
+        return ofertas
+
+    try:
+        por_destino = await asyncio.gather(
+            *(_um_destino(item, limite) for item, limite in zip(destinos, limites))
+        )
+        ofertas = [o for lista in por_destino for o in lista]
+
+        await asyncio.to_thread(_finalizar_execucao_auto, ctx, ofertas)
+    finally:
+        # erro ou cancelamento no meio: o checkpoint fica para retomar
+        await asyncio.to_thread(ctx["checkpoint"].encerrar, completa=False)
+    return ofertas
+
+
+async def _processar_destino_async(cliente, item, ctx, limite=None):
+    """Mesmas regras de _processar_destino; as datas de um destino seguem em série."""
+    origem = item["origem"]
+    destino = item["destino"]
+    log = _log_destino(item, ctx)
+
+    ofertas = []
+    estado, feitas = _retomar_destino(item, ctx, log)
+    if _destino_encerrado(estado):
+        await asyncio.to_thread(ctx["checkpoint"].concluir_rota, origem, destino, estado)
+        return ofertas
+
+    datas_baratas = None
+    if ctx["prefiltro"] and ctx["orcamento"].disponivel():
+        faixa_ida, duracao = _janela_flight_dates(ctx["datas_ida"])
+        try:
+            datas_baratas = await cliente.buscar_datas_baratas(origem, destino, faixa_ida, duracao)
+        except Exception as e:
+            log(f"⚠️ flight-dates falhou: {e}")
+
+    for data_ida, datas_volta in _grade_do_destino(item, ctx, datas_baratas, limite, log):
+        for data_volta in datas_volta:
+            if (data_ida, data_volta) in feitas:
+                continue
+
+            if not ctx["orcamento"].disponivel():
+                log("🛑 Orçamento de chamadas esgotado — encerrando destino")
+                return ofertas
+
+            log(f"🌐 {data_ida} → {data_volta}")
+
+            try:
+                voos = await cliente.buscar_voo_exato(origem, destino, data_ida, data_volta)
+                antes = len(ofertas)
+                # baselines, histórico e lotes de gravação podem tocar o banco
+                parar = await asyncio.to_thread(
+                    _registrar_resultado, item, ctx, estado, data_ida, data_volta, voos, ofertas, log
+                )
+                # a gravação do lote (arquivo inteiro) não pode parar o event loop
+                await asyncio.to_thread(
+                    ctx["checkpoint"].registrar_celula,
+                    origem, destino, data_ida, data_volta, estado, len(ofertas) - antes,
+                )
+                if parar:
+                    break
+
+            except Exception as e:
+                log(f"❌ Erro AUTO {destino}: {e}")
+
+        if _destino_encerrado(estado):
+            break
+
+    await asyncio.to_thread(ctx["checkpoint"].concluir_rota, origem, destino, estado)
     return ofertas
 
 
@@ -217,7 +797,7 @@ def carregar_destinos_csv():
                 baseline = 99999
 
             destinos.append({
-                "origem": row.get("origem", "FOR"),
+                "origem": row.get("origem") or ORIGEM_PADRAO,
                 "destino": row["destino"],
                 "baseline": baseline
             })
@@ -242,9 +822,8 @@ def gerar_datas_ida_reverso():
 def gerar_datas_volta(data_ida):
     base = datetime.strptime(data_ida, "%Y-%m-%d").date()
     return [
-        (base + timedelta(days=7)).strftime("%Y-%m-%d"),
-        (base + timedelta(days=10)).strftime("%Y-%m-%d"),
-        (base + timedelta(days=14)).strftime("%Y-%m-%d"),
+        (base + timedelta(days=dias)).strftime("%Y-%m-%d")
+        for dias in DURACOES_VOLTA
     ]
 
 
@@ -254,9 +833,47 @@ def executar_fluxo_voos(
     modo="AUTO",
     destinos_personalizados=None,
     data_ida=None,
-    data_volta=None
+    data_volta=None,
+    workers=None,
+    prefiltro=None,
+    adaptativo=None,
+    retomar=None,
+    baseline_vivo=None,
+    priorizar=None,
+    origens=None
 ):
-    if modo == "MANUAL":
-        return _fluxo_manual_exato(destinos_personalizados, data_ida, data_volta)
+    # painel, agendador e scripts passam por aqui: o estado vai para o stream SSE
+    with acompanhar_execucao(modo):
+        if modo == "MANUAL":
+            return _fluxo_manual_exato(destinos_personalizados, data_ida, data_volta, origens)
+
+        return _fluxo_automatico(
+            workers=workers, prefiltro=prefiltro, adaptativo=adaptativo, retomar=retomar,
+            baseline_vivo=baseline_vivo, priorizar=priorizar, origens=origens
+        )
+
 
-    return _fluxo_automatico()
+async def executar_fluxo_voos_async(
+    modo="AUTO",
+    destinos_personalizados=None,
+    data_ida=None,
+    data_volta=None,
+    concorrencia=None,
+    prefiltro=None,
+    adaptativo=None,
+    retomar=None,
+    baseline_vivo=None,
+    priorizar=None,
+    origens=None
+):
+    """Entrada asyncio: mesmas regras do executar_fluxo_voos, sem thread por requisição."""
+    with acompanhar_execucao(modo):
+        async with AmadeusRotatorAsync(modo) as cliente:
+            if modo == "MANUAL":
+                return await _fluxo_manual_exato_async(
+                    cliente, destinos_personalizados, data_ida, data_volta, concorrencia, origens
+                )
+
+            return await _fluxo_automatico_async(
+                cliente, concorrencia, prefiltro, adaptativo, retomar, baseline_vivo, priorizar, origens
+            )
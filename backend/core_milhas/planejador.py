@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Planejamento do orçamento de chamadas da varredura AUTO.
+Antes de começar, o que resta da cota do dia (core_amadeus/cota.py) é
+dividido entre as rotas; cada rota encolhe a própria grade de datas para
+caber na sua parte e a execução inteira para quando o total acaba.
+"""
+
+import os
+import threading
+
+from backend.core_amadeus.cota import contador_cota
+
+# Teto opcional de chamadas por execução AUTO (0 = só a cota do dia)
+AUTO_ORCAMENTO_EXECUCAO = int(os.getenv("AUTO_ORCAMENTO_EXECUCAO", "0"))
+
+
+class OrcamentoExecucao:
+    """
+    Chamadas que a execução ainda pode gastar (None = sem limite).
+    A cobrança acontece no rotator, só quando a chamada HTTP sai de verdade
+    (cota.cobrar_orcamento); as rotas só consultam se ainda há saldo.
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.gastas = 0
+        self._lock = threading.Lock()
+
+    def disponivel(self):
+        with self._lock:
+            return self.total is None or self.gastas < self.total
+
+    def cobrar(self, quantidade=1):
+        with self._lock:
+            self.gastas += quantidade
+
+    @property
+    def restante(self):
+        if self.total is None:
+            return None
+        return max(0, self.total - self.gastas)
+
+
+def orcamento_da_execucao(credenciais):
+    """Chamadas disponíveis para esta execução, ou None se não há limite configurado."""
+    restante = contador_cota.resumo(credenciais)["restante_hoje"]
+    if AUTO_ORCAMENTO_EXECUCAO > 0:
+        restante = AUTO_ORCAMENTO_EXECUCAO if restante is None else min(restante, AUTO_ORCAMENTO_EXECUCAO)
+    return restante
+
+
+def planejar_orcamento(destinos, orcamento):
+    """Divide o orçamento em partes iguais entre as rotas (None = sem limite)."""
+    if orcamento is None or not destinos:
+        return [None] * len(destinos)
+    base, sobra = divmod(orcamento, len(destinos))
+    return [base + (1 if i < sobra else 0) for i in range(len(destinos))]
+
+
+def reduzir_grade(grade, limite):
+    """
+    Encolhe a grade (ida, [voltas]) para no máximo `limite` células,
+    espalhadas por toda a janela em vez de cortar o final.
+    """
+    celulas = [(data_ida, data_volta) for data_ida, voltas in grade for data_volta in voltas]
+    if limite is None or len(celulas) <= limite:
+        return grade
+    if limite <= 0:
+        return []
+
+    passo = len(celulas) / limite
+    escolhidas = [celulas[int(i * passo)] for i in range(limite)]
+
+    reduzida = {}
+    for data_ida, data_volta in escolhidas:
+        reduzida.setdefault(data_ida, []).append(data_volta)
+    return list(reduzida.items())
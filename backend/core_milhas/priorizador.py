@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Prioridade das rotas na varredura AUTO.
+
+Em vez da ordem do CSV, cada rota ganha uma nota de 0 a 1 somando três sinais:
+- idade: quanto tempo desde a última busca (nunca buscada = máxima);
+- volatilidade: desvio/média dos preços da rota (baselines vivos);
+- proximidade: o menor preço recente perto (ou abaixo) do baseline.
+As rotas entram na execução da maior nota para a menor e o orçamento de
+chamadas é dividido proporcionalmente à nota. Rotas que não caberiam nem
+com o mínimo de chamadas ficam para a próxima execução — e, ficando mais
+velhas, sobem na fila.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from backend.armazenamento.banco import banco as banco_padrao
+from backend.core_milhas.baselines import baselines as baselines_padrao
+
+# Pesos (idade, volatilidade, proximidade)
+PESOS = tuple(float(p) for p in os.getenv("AUTO_PRIORIDADE_PESOS", "0.4,0.3,0.3").split(","))
+
+IDADE_MAXIMA_HORAS = float(os.getenv("AUTO_PRIORIDADE_IDADE_HORAS", "48"))   # a partir daqui, idade = 1
+JANELA_RECENTE_DIAS = 7       # "menor preço recente"
+VOLATILIDADE_MAXIMA = 0.3     # desvio/média a partir do qual volatilidade = 1
+FAIXA_PROXIMIDADE = 0.35      # 35% acima do baseline = proximidade 0
+NEUTRO = 0.5                  # sinal sem dados
+MIN_CHAMADAS_ROTA = int(os.getenv("AUTO_PRIORIDADE_MIN_CHAMADAS", "3"))
+
+
+def _limitar(valor):
+    return min(max(valor, 0.0), 1.0)
+
+
+class PriorizadorRotas:
+    def __init__(self, banco=None, baselines=None):
+        self.banco = banco or banco_padrao
+        self.baselines = baselines or baselines_padrao
+
+    def notas(self, destinos, agora=None):
+        """{(origem, destino): (nota, idade, volatilidade, proximidade)} de cada rota."""
+        agora = agora or datetime.now()
+        desde = (agora - timedelta(days=JANELA_RECENTE_DIAS)).strftime("%Y-%m-%d %H:%M:%S")
+        buscas = {
+            (row["origem"], row["destino"]): row
+            for row in self.banco.resumo_buscas_rotas(desde)
+        }
+
+        notas = {}
+        for item in destinos:
+            chave = (item["origem"], item["destino"])
+            row = buscas.get(chave)
+
+            idade = 1.0
+            if row and row["ultima_busca"]:
+                try:
+                    ultima = datetime.strptime(row["ultima_busca"], "%Y-%m-%d %H:%M:%S")
+                    idade = _limitar((agora - ultima).total_seconds() / 3600 / IDADE_MAXIMA_HORAS)
+                except ValueError:
+                    pass
+
+            volatilidade = NEUTRO
+            resumo = self.baselines.resumo(*chave)
+            if resumo and resumo["observacoes"] >= 2 and resumo["media"] > 0:
+                volatilidade = _limitar(resumo["desvio_padrao"] / resumo["media"] / VOLATILIDADE_MAXIMA)
+
+            proximidade = NEUTRO
+            baseline = float(item["baseline"])
+            if row and row["menor_recente"] and 0 < baseline < 99999:
+                acima = row["menor_recente"] / baseline - 1
+                proximidade = _limitar(1 - acima / FAIXA_PROXIMIDADE)
+
+            nota = (
+                PESOS[0] * idade + PESOS[1] * volatilidade + PESOS[2] * proximidade
+            ) / (sum(PESOS) or 1)
+            notas[chave] = (nota, idade, volatilidade, proximidade)
+        return notas
+
+    def ordenar(self, destinos, orcamento=None, minimo=MIN_CHAMADAS_ROTA):
+        """
+        (destinos da maior nota para a menor, limites de chamadas, notas).
+        Com orçamento, só entram as rotas que recebem pelo menos `minimo`
+        chamadas e cada uma leva uma parte proporcional à sua nota.
+        """
+        notas = self.notas(destinos)
+        ordenados = sorted(
+            destinos, key=lambda item: notas[(item["origem"], item["destino"])][0], reverse=True
+        )
+        if orcamento is None or not ordenados:
+            return ordenados, [None] * len(ordenados), notas
+
+        cabem = max(1, min(len(ordenados), orcamento // max(minimo, 1)))
+        ordenados = ordenados[:cabem]
+        pesos = [max(notas[(i["origem"], i["destino"])][0], 0.01) for i in ordenados]
+        return ordenados, _dividir(orcamento, pesos, minimo), notas
+
+
+def _dividir(orcamento, pesos, minimo):
+    """Mínimo para cada rota e o resto proporcional ao peso (maiores restos levam as sobras)."""
+    minimo = min(minimo, orcamento // len(pesos))
+    livre = orcamento - minimo * len(pesos)
+    total = sum(pesos)
+    partes = [livre * p / total for p in pesos]
+    limites = [minimo + int(parte) for parte in partes]
+    sobra = orcamento - sum(limites)
+    por_resto = sorted(range(len(pesos)), key=lambda i: partes[i] - int(partes[i]), reverse=True)
+    for i in por_resto[:sobra]:
+        limites[i] += 1
+    return limites
+
+
+priorizador = PriorizadorRotas()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Estado das execuções (em andamento ou não) e progresso da varredura AUTO
+por origem.
+Com a matriz origens × destinos numa fila única, cada rota concluída soma
+no contador da sua origem; o /api/status_execucao mostra o retrato atual
+e o stream /api/eventos_execucao recebe cada mudança.
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from backend.api.eventos import canal_execucao
+
+
+class ProgressoOrigens:
+    def __init__(self, destinos):
+        self._lock = threading.Lock()
+        self.iniciado = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.origens = {}
+        for item in destinos:
+            contagem = self.origens.setdefault(item["origem"], {"total": 0, "concluidas": 0, "ofertas": 0})
+            contagem["total"] += 1
+
+    def concluir(self, item, ofertas=0):
+        """Soma uma rota concluída; retorna (concluídas, total) da origem dela."""
+        with self._lock:
+            contagem = self.origens.setdefault(item["origem"], {"total": 0, "concluidas": 0, "ofertas": 0})
+            contagem["concluidas"] += 1
+            contagem["ofertas"] += ofertas
+            feitas = contagem["concluidas"], contagem["total"]
+        canal_execucao.publicar("progresso", self.retrato())
+        return feitas
+
+    def retrato(self):
+        with self._lock:
+            return {
+                "iniciado": self.iniciado,
+                "origens": {origem: dict(c) for origem, c in self.origens.items()},
+            }
+
+
+_atual = None
+_ativas = 0    # execuções em andamento neste processo (painel, agendador, scripts)
+_ativas_lock = threading.Lock()
+
+
+@contextmanager
+def acompanhar_execucao(modo):
+    """
+    Envolve uma execução inteira: publica "estado" no início e no fim (com
+    `sucesso`), para o painel ver qualquer execução — venha de onde vier.
+    Com execuções sobrepostas, em_andamento só volta a False na última.
+    """
+    global _ativas
+    with _ativas_lock:
+        _ativas += 1
+        canal_execucao.publicar("estado", {"em_andamento": True, "modo": modo})
+    sucesso = False
+    try:
+        yield
+        sucesso = True
+    finally:
+        with _ativas_lock:
+            _ativas -= 1
+            canal_execucao.publicar(
+                "estado", {"em_andamento": _ativas > 0, "modo": modo, "sucesso": sucesso}
+            )
+
+
+def execucao_em_andamento():
+    with _ativas_lock:
+        return _ativas > 0
+
+
+def iniciar_progresso(destinos):
+    global _atual
+    _atual = ProgressoOrigens(destinos)
+    canal_execucao.publicar("progresso", _atual.retrato())
+    return _atual
+
+
+def progresso_atual():
+    """Retrato da última varredura AUTO deste processo (None se ainda não houve)."""
+    return _atual.retrato() if _atual else None
@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark ponta a ponta da varredura contra o fake_amadeus.
+
+Sobe o servidor falso, aponta o rotator para ele (AMADEUS_BASE_URL) com
+chaves fictícias e bancos temporários, roda AUTO e MANUAL de verdade e mede:
+chamadas/s, tempo por rota e latência p50/p95 vista pelo cliente.
+O resultado vai para bench/resultados/<data>.json e é comparado com a
+execução anterior.
+
+    python -m bench.bench_varredura
+    python -m bench.bench_varredura --workers 3 --chaves 3 --latencia fixa:80 --taxa-429 0.02
+    python -m bench.bench_varredura --async --prefiltro --destinos 20
+"""
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIR_RESULTADOS = os.path.join(BASE_DIR, "bench", "resultados")
+
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from bench.fake_amadeus import FakeAmadeus
+
+
+def percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    idx = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+
+def _resumo_latencias(latencias):
+    return {
+        "chamadas": len(latencias),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 1) if latencias else None,
+        "p95_ms": round(percentil(latencias, 95) * 1000, 1) if latencias else None,
+        "media_ms": round(statistics.mean(latencias) * 1000, 1) if latencias else None,
+    }
+
+
+def preparar_ambiente(args, base_url, tmp):
+    """Precisa rodar antes de importar o backend: tudo é lido do env no import."""
+    os.environ["AMADEUS_BASE_URL"] = base_url
+    for i in range(1, 50):
+        os.environ.pop(f"AMADEUS_API_KEY_{i}", None)
+        os.environ.pop(f"AMADEUS_API_SECRET_{i}", None)
+    for i in range(1, args.chaves + 1):
+        os.environ[f"AMADEUS_API_KEY_{i}"] = f"bench-key-{i}"
+        os.environ[f"AMADEUS_API_SECRET_{i}"] = f"bench-secret-{i}"
+
+    os.environ["AMADEUS_CACHE_PATH"] = os.path.join(tmp, "cache.sqlite3")
+    os.environ["AMADEUS_TOKENS_PATH"] = os.path.join(tmp, "tokens.sqlite3")
+    os.environ["AMADEUS_COTA_PATH"] = os.path.join(tmp, "cota.sqlite3")
+    os.environ["AMADEUS_CACHE_TTL"] = str(args.cache_ttl)
+    os.environ["PARTIU_DB_PATH"] = os.path.join(tmp, "partiu085.sqlite3")
+    os.environ["AUTO_CHECKPOINT_PATH"] = os.path.join(tmp, "checkpoint_auto.json")
+    os.environ["ARQUIVO_PRECOS_DIR"] = os.path.join(tmp, "arquivo_precos")
+    os.environ.setdefault("AMADEUS_COTA_MENSAL", "0")
+
+
+class Medidor:
+    """Cronometra as chamadas do cliente e o tempo de cada rota."""
+
+    def __init__(self):
+        self.latencias = []
+        self.por_rota = {}
+        self._lock = threading.Lock()
+
+    def chamada(self, duracao):
+        with self._lock:
+            self.latencias.append(duracao)
+
+    def rota(self, origem, destino, duracao):
+        with self._lock:
+            self.por_rota[f"{origem}->{destino}"] = duracao
+
+    def envolver(self, funcao):
+        def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                self.chamada(time.perf_counter() - inicio)
+        return medida
+
+    def envolver_async(self, funcao):
+        async def medida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return await funcao(*args, **kwargs)
+            finally:
+                self.chamada(time.perf_counter() - inicio)
+        return medida
+
+
+def instrumentar(orq, medidor, usar_async):
+    """Troca os pontos de entrada do orquestrador por versões cronometradas."""
+    cliente = orq.amadeus_client_rotator
+    cliente.buscar_voo_exato = medidor.envolver(cliente.buscar_voo_exato)
+    cliente.buscar_datas_baratas = medidor.envolver(cliente.buscar_datas_baratas)
+
+    original = orq._processar_destino
+
+    def processar(item, *args, **kwargs):
+        inicio = time.perf_counter()
+        try:
+            return original(item, *args, **kwargs)
+        finally:
+            medidor.rota(item["origem"], item["destino"], time.perf_counter() - inicio)
+
+    orq._processar_destino = processar
+
+    original_async = orq._processar_destino_async
+
+    async def processar_async(cliente_async, item, *args, **kwargs):
+        inicio = time.perf_counter()
+        if not getattr(cliente_async, "_bench", False):
+            cliente_async.buscar_voo_exato = medidor.envolver_async(cliente_async.buscar_voo_exato)
+            cliente_async.buscar_datas_baratas = medidor.envolver_async(cliente_async.buscar_datas_baratas)
+            cliente_async._bench = True
+        try:
+            return await original_async(cliente_async, item, *args, **kwargs)
+        finally:
+            medidor.rota(item["origem"], item["destino"], time.perf_counter() - inicio)
+
+    orq._processar_destino_async = processar_async
+
+    if usar_async:
+        original_manual = orq._fluxo_manual_exato_async
+
+        async def manual_async(cliente_async, *args, **kwargs):
+            if not getattr(cliente_async, "_bench", False):
+                cliente_async.buscar_voo_exato = medidor.envolver_async(cliente_async.buscar_voo_exato)
+                cliente_async._bench = True
+            return await original_manual(cliente_async, *args, **kwargs)
+
+        orq._fluxo_manual_exato_async = manual_async
+
+
+def _executar(orq, args, modo, destinos=None):
+    if args.usar_async:
+        return asyncio.run(orq.executar_fluxo_voos_async(
+            modo, destinos, args.data_ida, args.data_volta,
+            concorrencia=args.concorrencia, prefiltro=args.prefiltro, adaptativo=args.adaptativo,
+            baseline_vivo=args.baseline_vivo, priorizar=args.priorizar, origens=args.origens,
+        ))
+    return orq.executar_fluxo_voos(
+        modo, destinos, args.data_ida, args.data_volta,
+        workers=args.workers, prefiltro=args.prefiltro, adaptativo=args.adaptativo,
+        baseline_vivo=args.baseline_vivo, priorizar=args.priorizar, origens=args.origens,
+    )
+
+
+def rodar_cenario(nome, orq, fake, args, modo, destinos=None):
+    medidor = Medidor()
+    originais = (
+        orq.amadeus_client_rotator.buscar_voo_exato,
+        orq.amadeus_client_rotator.buscar_datas_baratas,
+        orq._processar_destino,
+        orq._processar_destino_async,
+        orq._fluxo_manual_exato_async,
+    )
+    instrumentar(orq, medidor, args.usar_async)
+    servidor_antes = len(fake.config.registros)
+
+    # add_log (stdout) e log_force do rotator (stderr) só interessam com --verbose
+    saida = contextlib.ExitStack()
+    if not args.verbose:
+        saida.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        saida.enter_context(contextlib.redirect_stderr(io.StringIO()))
+
+    inicio = time.perf_counter()
+    try:
+        with saida:
+            ofertas = _executar(orq, args, modo, destinos)
+    finally:
+        cliente = orq.amadeus_client_rotator
+        (cliente.buscar_voo_exato, cliente.buscar_datas_baratas, orq._processar_destino,
+         orq._processar_destino_async, orq._fluxo_manual_exato_async) = originais
+    duracao = time.perf_counter() - inicio
+
+    registros = fake.config.registros[servidor_antes:]
+    http = len(registros)
+    status = {}
+    for _, _, _, _, st in registros:
+        status[str(st)] = status.get(str(st), 0) + 1
+
+    rotas = medidor.por_rota
+    return {
+        "cenario": nome,
+        "duracao_s": round(duracao, 3),
+        "ofertas": len(ofertas or []),
+        "chamadas_cliente": len(medidor.latencias),
+        "chamadas_http": http,
+        "chamadas_por_s": round(http / duracao, 2) if duracao > 0 else None,
+        "status_http": status,
+        "latencia_cliente": _resumo_latencias(medidor.latencias),
+        "rotas": len(rotas),
+        "tempo_por_rota_s": {
+            "p50": round(percentil(list(rotas.values()), 50), 3) if rotas else None,
+            "p95": round(percentil(list(rotas.values()), 95), 3) if rotas else None,
+            "max": round(max(rotas.values()), 3) if rotas else None,
+        },
+    }
+
+
+def ultimo_resultado():
+    arquivos = sorted(glob.glob(os.path.join(DIR_RESULTADOS, "*.json")))
+    if not arquivos:
+        return None, None
+    with open(arquivos[-1], encoding="utf-8") as f:
+        return arquivos[-1], json.load(f)
+
+
+def comparar(atual, anterior):
+    """Variação percentual das métricas principais por cenário."""
+    linhas = []
+    antes = {c["cenario"]: c for c in anterior.get("cenarios", [])}
+    for c in atual["cenarios"]:
+        a = antes.get(c["cenario"])
+        if not a:
+            continue
+        for rotulo, pegar in (
+            ("duração (s)", lambda x: x["duracao_s"]),
+            ("chamadas/s", lambda x: x["chamadas_por_s"]),
+            ("p50 (ms)", lambda x: x["latencia_cliente"]["p50_ms"]),
+            ("p95 (ms)", lambda x: x["latencia_cliente"]["p95_ms"]),
+        ):
+            novo, velho = pegar(c), pegar(a)
+            if novo is None or not velho:
+                continue
+            linhas.append(f"  {c['cenario']:<8} {rotulo:<12} {velho:>10} → {novo:>10} ({(novo - velho) / velho * 100:+.1f}%)")
+    return linhas
+
+
+def imprimir(cenario):
+    lat = cenario["latencia_cliente"]
+    rota = cenario["tempo_por_rota_s"]
+    print(f"\n📊 {cenario['cenario']}")
+    print(f"  duração: {cenario['duracao_s']} s | ofertas: {cenario['ofertas']}")
+    print(f"  HTTP: {cenario['chamadas_http']} ({cenario['chamadas_por_s']} chamadas/s) | status: {cenario['status_http']}")
+    print(f"  latência cliente: p50 {lat['p50_ms']} ms | p95 {lat['p95_ms']} ms ({lat['chamadas']} chamadas)")
+    if cenario["rotas"]:
+        print(f"  tempo por rota: p50 {rota['p50']} s | p95 {rota['p95']} s | máx {rota['max']} s ({cenario['rotas']} rotas)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da varredura AUTO/MANUAL contra o fake_amadeus")
+    parser.add_argument("--chaves", type=int, default=3, help="credenciais fictícias")
+    parser.add_argument("--workers", type=int, default=None, help="AUTO_WORKERS do fluxo síncrono")
+    parser.add_argument("--async", dest="usar_async", action="store_true", help="usa executar_fluxo_voos_async")
+    parser.add_argument("--concorrencia", type=int, default=None)
+    parser.add_argument("--prefiltro", action="store_true")
+    parser.add_argument("--adaptativo", action="store_true", help="ordem adaptativa das datas (AUTO_ADAPTATIVO)")
+    parser.add_argument("--baseline-vivo", action="store_true", help="baseline vivo por rota (AUTO_BASELINE_VIVO)")
+    parser.add_argument("--priorizar", action="store_true", help="prioridade das rotas (AUTO_PRIORIZAR)")
+    parser.add_argument("--origens", default=None, help="matriz de origens do AUTO, ex.: FOR,REC,NAT,GRU (AUTO_ORIGENS)")
+    parser.add_argument("--aquecimento", type=int, default=0,
+                        help="execuções AUTO antes da medida, para montar histórico")
+    parser.add_argument("--destinos", type=int, default=0, help="limita o AUTO às N primeiras rotas (0 = todas)")
+    parser.add_argument("--manual", default="LIS,MAD,CDG,MIA,SCL", help="destinos do cenário MANUAL")
+    parser.add_argument("--data-ida", default=None)
+    parser.add_argument("--data-volta", default=None)
+    parser.add_argument("--latencia", default="lognormal:120,0.5")
+    parser.add_argument("--taxa-429", type=float, default=0.0)
+    parser.add_argument("--taxa-5xx", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache-ttl", type=int, default=0, help="0 = sem cache de respostas")
+    parser.add_argument("--rotulo", default="", help="nome livre salvo junto do resultado")
+    parser.add_argument("--sem-salvar", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="mostra os logs da varredura")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_varredura_")
+    fake = FakeAmadeus(
+        latencia=args.latencia, taxa_429=args.taxa_429, taxa_5xx=args.taxa_5xx,
+        retry_after=args.retry_after, seed=args.seed,
+    )
+
+    with fake:
+        preparar_ambiente(args, fake.base_url, tmp)
+
+        # só o app.py liga a renovação de tokens em segundo plano: aqui ela fica desligada
+        from backend.core_milhas import orquestrador_voos as orq
+
+        if args.destinos:
+            carregar = orq.carregar_destinos_csv
+            orq.carregar_destinos_csv = lambda: carregar()[:args.destinos]
+
+        if not args.data_ida:
+            datas = orq.gerar_datas_ida_reverso()
+            args.data_ida = datas[len(datas) // 2]
+            args.data_volta = args.data_volta or orq.gerar_datas_volta(args.data_ida)[0]
+
+        print(f"✈️ Fake Amadeus em {fake.base_url} | {args.chaves} chaves | latência {args.latencia}")
+
+        for i in range(args.aquecimento):
+            print(f"🔥 Aquecimento {i + 1}/{args.aquecimento}")
+            rodar_cenario("AQUECIMENTO", orq, fake, args, "AUTO")
+
+        cenarios = [
+            rodar_cenario("AUTO", orq, fake, args, "AUTO"),
+            rodar_cenario("MANUAL", orq, fake, args, "MANUAL", args.manual.split(",")),
+        ]
+
+    resultado = {
+        "quando": datetime.now().isoformat(timespec="seconds"),
+        "rotulo": args.rotulo,
+        "config": {
+            k: getattr(args, k) for k in (
+                "chaves", "workers", "usar_async", "concorrencia", "prefiltro", "adaptativo",
+                "baseline_vivo", "priorizar", "origens", "aquecimento", "destinos",
+                "latencia", "taxa_429", "taxa_5xx", "retry_after", "seed", "cache_ttl",
+            )
+        },
+        "cenarios": cenarios,
+    }
+
+    for c in cenarios:
+        imprimir(c)
+
+    arquivo_anterior, anterior = ultimo_resultado()
+    if anterior:
+        if anterior.get("config") != resultado["config"]:
+            print(f"\n⚠️ Configuração diferente de {os.path.basename(arquivo_anterior)} — comparação só indicativa")
+        linhas = comparar(resultado, anterior)
+        if linhas:
+            print(f"\n🔁 Comparado com {os.path.basename(arquivo_anterior)}:")
+            print("\n".join(linhas))
+
+    if not args.sem_salvar:
+        os.makedirs(DIR_RESULTADOS, exist_ok=True)
+        nome = datetime.now().strftime("%Y%m%d-%H%M%S") + (f"-{args.rotulo}" if args.rotulo else "") + ".json"
+        caminho = os.path.join(DIR_RESULTADOS, nome)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultado salvo em {caminho}")
+
+
+if __name__ == "__main__":
+    main()
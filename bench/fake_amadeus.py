@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Servidor local que imita a Amadeus para medir a varredura sem gastar cota.
+
+Endpoints:
+  POST /v1/security/oauth2/token
+  GET  /v2/shopping/flight-offers
+  GET  /v1/shopping/flight-dates
+
+Preços sintéticos partem do preco_baseline de data/coletas_completo.csv e
+variam de forma determinística por (rota, datas): a mesma consulta sempre
+devolve o mesmo preço. Latência, 429 e 5xx são configuráveis.
+
+Uso avulso:
+    python -m bench.fake_amadeus --porta 8089 --latencia lognormal:120,0.5 --taxa-429 0.02
+    AMADEUS_BASE_URL=http://127.0.0.1:8089 python app.py
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_BASELINES = os.path.join(BASE_DIR, "data", "coletas_completo.csv")
+
+
+def carregar_baselines(caminho=CSV_BASELINES):
+    baselines = {}
+    try:
+        with open(caminho, encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f, delimiter=";"):
+                try:
+                    valor = float(row["preco_baseline"].replace(".", "").replace(",", "."))
+                except Exception:
+                    continue
+                baselines[(row.get("origem") or "FOR", row["destino"])] = valor
+    except FileNotFoundError:
+        pass
+    return baselines
+
+
+class Latencia:
+    """
+    Distribuição de latência em ms:
+      fixa:120 | uniforme:50,300 | lognormal:120,0.5 (mediana, sigma)
+    """
+
+    def __init__(self, spec="lognormal:120,0.5", seed=None):
+        self.spec = spec
+        tipo, _, args = spec.partition(":")
+        self.tipo = tipo
+        self.args = [float(a) for a in args.split(",") if a]
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def amostrar(self):
+        with self._lock:
+            if self.tipo == "fixa":
+                ms = self.args[0]
+            elif self.tipo == "uniforme":
+                ms = self._rng.uniform(self.args[0], self.args[1])
+            elif self.tipo == "lognormal":
+                import math
+                ms = self.args[0] * math.exp(self._rng.gauss(0, self.args[1]))
+            else:
+                raise ValueError(f"Distribuição desconhecida: {self.spec}")
+        return ms / 1000.0
+
+
+class ConfigFake:
+    def __init__(self, latencia="lognormal:120,0.5", taxa_429=0.0, taxa_5xx=0.0,
+                 retry_after=1.0, taxa_sem_voo=0.05, seed=42):
+        self.latencia = Latencia(latencia, seed)
+        self.taxa_429 = taxa_429
+        self.taxa_5xx = taxa_5xx
+        self.retry_after = retry_after
+        self.taxa_sem_voo = taxa_sem_voo
+        self.seed = seed
+        self.baselines = carregar_baselines()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.registros = []   # (endpoint, rota, inicio, fim, status)
+
+    def sortear(self):
+        with self._lock:
+            return self._rng.random()
+
+    def registrar(self, endpoint, rota, inicio, status):
+        with self._lock:
+            self.registros.append((endpoint, rota, inicio, time.time(), status))
+
+
+def _fator(seed, *partes):
+    """Número em [0, 1) estável para a mesma consulta."""
+    h = hashlib.sha256("|".join(map(str, (seed,) + partes)).encode()).digest()
+    return int.from_bytes(h[:8], "big") / 2 ** 64
+
+
+def preco_sintetico(config, origem, destino, data_ida, data_volta):
+    baseline = config.baselines.get((origem, destino), 3000.0)
+    # 0.7x a 1.6x do baseline, com viés sazonal pelo mês de ida
+    try:
+        mes = int(data_ida[5:7])
+    except ValueError:
+        mes = 1
+    sazonal = 1.0 + 0.15 * (1 if mes in (1, 7, 12) else -0.3 if mes in (4, 5, 9) else 0)
+    fator = 0.7 + 0.9 * _fator(config.seed, origem, destino, data_ida, data_volta)
+    return round(baseline * fator * sazonal, 2)
+
+
+def _oferta(origem, destino, data_ida, data_volta, preco, idx):
+    itinerarios = [{"segments": [{"departure": {"iataCode": origem, "at": f"{data_ida}T08:00:00"},
+                                  "arrival": {"iataCode": destino}, "carrierCode": "XX"}]}]
+    if data_volta:
+        itinerarios.append({"segments": [{"departure": {"iataCode": destino, "at": f"{data_volta}T10:00:00"},
+                                          "arrival": {"iataCode": origem}, "carrierCode": "XX"}]})
+    return {
+        "type": "flight-offer", "id": str(idx + 1), "source": "GDS",
+        "itineraries": itinerarios,
+        "price": {"currency": "BRL", "total": f"{preco:.2f}", "grandTotal": f"{preco:.2f}"},
+        "validatingAirlineCodes": ["XX"],
+    }
+
+
+def criar_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, como a API real
+
+        def log_message(self, *args):
+            pass
+
+        def _responder(self, status, corpo=None, headers=None):
+            dados = json.dumps(corpo or {}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(dados)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def do_POST(self):
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            self.rfile.read(tamanho)
+            if urlparse(self.path).path != "/v1/security/oauth2/token":
+                return self._responder(404)
+            self._responder(200, {
+                "type": "amadeusOAuth2Token",
+                "access_token": "fake-" + hashlib.md5(str(time.time()).encode()).hexdigest(),
+                "expires_in": 1799,
+            })
+
+        def do_GET(self):
+            inicio = time.time()
+            url = urlparse(self.path)
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+            if url.path == "/v2/shopping/flight-offers":
+                rota = (q.get("originLocationCode"), q.get("destinationLocationCode"))
+            elif url.path == "/v1/shopping/flight-dates":
+                rota = (q.get("origin"), q.get("destination"))
+            else:
+                return self._responder(404)
+
+            time.sleep(config.latencia.amostrar())
+
+            sorteio = config.sortear()
+            if sorteio < config.taxa_429:
+                config.registrar(url.path, rota, inicio, 429)
+                return self._responder(429, {"errors": [{"status": 429}]},
+                                       {"Retry-After": str(config.retry_after)})
+            if sorteio < config.taxa_429 + config.taxa_5xx:
+                config.registrar(url.path, rota, inicio, 500)
+                return self._responder(500, {"errors": [{"status": 500}]})
+
+            if url.path == "/v2/shopping/flight-offers":
+                corpo = self._flight_offers(q)
+            else:
+                corpo = self._flight_dates(q)
+            config.registrar(url.path, rota, inicio, 200)
+            self._responder(200, corpo)
+
+        def _flight_offers(self, q):
+            origem, destino = q.get("originLocationCode"), q.get("destinationLocationCode")
+            ida, volta = q.get("departureDate"), q.get("returnDate")
+            if _fator(config.seed, "sem-voo", origem, destino, ida, volta) < config.taxa_sem_voo:
+                return {"data": []}
+            preco = preco_sintetico(config, origem, destino, ida, volta)
+            maximo = int(q.get("max") or 5)
+            ofertas = [_oferta(origem, destino, ida, volta, preco * (1 + 0.07 * i), i) for i in range(maximo)]
+            return {"meta": {"count": len(ofertas)}, "data": ofertas}
+
+        def _flight_dates(self, q):
+            origem, destino = q.get("origin"), q.get("destination")
+            hoje = date.today()
+            if q.get("departureDate") and "," in q["departureDate"]:
+                inicio, fim = (datetime.strptime(d, "%Y-%m-%d").date() for d in q["departureDate"].split(","))
+            else:
+                inicio, fim = hoje + timedelta(days=30), hoje + timedelta(days=180)
+            dmin, dmax = 7, 14
+            if q.get("duration") and "," in q["duration"]:
+                dmin, dmax = (int(x) for x in q["duration"].split(","))
+
+            dados = []
+            d = inicio
+            while d <= fim:
+                duracao = dmin + int(_fator(config.seed, "dur", origem, destino, d) * (dmax - dmin + 1))
+                ida = d.isoformat()
+                volta = (d + timedelta(days=duracao)).isoformat()
+                # flight-dates é um cache: preço próximo (não igual) ao do flight-offers
+                preco = preco_sintetico(config, origem, destino, ida, volta)
+                preco *= 0.95 + 0.1 * _fator(config.seed, "cache", origem, destino, ida)
+                dados.append({
+                    "type": "flight-date", "origin": origem, "destination": destino,
+                    "departureDate": ida, "returnDate": volta,
+                    "price": {"total": f"{preco:.2f}"},
+                })
+                d += timedelta(days=3)
+            return {"data": dados, "meta": {"currency": "BRL"}}
+
+    return Handler
+
+
+class FakeAmadeus:
+    """Sobe o servidor numa thread; usar como context manager."""
+
+    def __init__(self, porta=0, **config):
+        self.config = ConfigFake(**config)
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", porta), criar_handler(self.config))
+        self.servidor.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, porta = self.servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor Amadeus falso para testes locais")
+    parser.add_argument("--porta", type=int, default=8089)
+    parser.add_argument("--latencia", default="lognormal:120,0.5")
+    parser.add_argument("--taxa-429", type=float, default=0.0)
+    parser.add_argument("--taxa-5xx", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    fake = FakeAmadeus(args.porta, latencia=args.latencia, taxa_429=args.taxa_429,
+                       taxa_5xx=args.taxa_5xx, retry_after=args.retry_after, seed=args.seed)
+    print(f"✈️ Fake Amadeus em {fake.base_url} (Ctrl+C para sair)")
+    try:
+        fake.servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import React, { useEffect, useState, useRef } from "react";
-import { getDestinos } from "../services/backendService";
+import { buscarDestinos } from "../services/backendService";
 
 interface Props {
   value: string;
@@ -7,47 +7,32 @@ interface Props {
 }
 
 export function DestinoAutocomplete({ value, onChange }: Props) {
-  const [lista, setLista] = useState<any[]>([]);
   const [filtrados, setFiltrados] = useState<any[]>([]);
   const [open, setOpen] = useState(false);
   const blurLock = useRef(false);
 
-  // ---- Carrega lista do backend uma vez
-  useEffect(() => {
-    async function load() {
-      const resp = await getDestinos();
-      const destinos = resp?.destinos || [];
-      setLista(destinos);
-    }
-    load();
-  }, []);
-
   const debounceTimer = useRef<any>(null);
+  const ultimaBusca = useRef(0);
+
+  useEffect(() => () => clearTimeout(debounceTimer.current), []);
 
-  // ---- Filtro atualizado: busca por IATA OU NOME
-  const filtrar = (texto: string) => {
-    const termo = texto.split(",").pop()?.trim().toUpperCase() || "";
+  // ---- Busca no backend (índice por cidade, IATA ou país, tolera erro de digitação)
+  const filtrar = async (texto: string) => {
+    const termo = texto.split(",").pop()?.trim() || "";
+    const busca = ++ultimaBusca.current;
 
     if (!termo) {
       setFiltrados([]);
       return;
     }
 
-    const listaFiltrada = lista
-      .map((d: any) => ({
-        iata: d.iata?.toUpperCase() || "",
-        cidade: d.cidade || "",
-        pais: d.pais || "",
-        fullName: `${d.cidade} (${d.pais})`,
-      }))
-      .filter((d) =>
-        d.iata.includes(termo) ||
-        d.cidade.toUpperCase().includes(termo) ||
-        d.fullName.toUpperCase().includes(termo)
-      )
-      .slice(0, 12);
-
-    setFiltrados(listaFiltrada);
+    try {
+      const resp = await buscarDestinos(termo, 12);
+      // ignora respostas de buscas que já foram substituídas
+      if (busca === ultimaBusca.current) setFiltrados(resp?.destinos || []);
+    } catch {
+      if (busca === ultimaBusca.current) setFiltrados([]);
+    }
   };
 
   const handleChange = (texto: string) => {
@@ -1,4 +1,4 @@
-import React, { useEffect, useMemo, useState } from "react";
+import React, { useEffect, useRef, useState } from "react";
 import { TicketIcon, MagnifyingGlassIcon } from "@heroicons/react/24/outline";
 import { getResultados } from "../services/backendService";
 import { FlightCard } from "../components/FlightCard";
@@ -44,81 +44,94 @@ function normalizePreco(valor: any): number {
   return isNaN(n) ? 0 : n;
 }
 
-/**
- * 🔵 Separa Radar (AUTO) x 🟠 Manual (MANUAL)
- */
-function processarResultados(listaBruta: Oferta[], filtro: string) {
-  const termo = filtro.trim().toUpperCase();
-
-  const listaFiltrada = termo
-    ? listaBruta.filter(o =>
-        getDestino(o).toUpperCase().includes(termo)
-      )
-    : listaBruta;
-
-  const radar: Oferta[] = [];
-  const manual: Oferta[] = [];
-
-  listaFiltrada.forEach((o) => {
-    const preco = normalizePreco(o.preco);
-    const baseline = normalizePreco(o.baseline);
-
-    const obj = {
-      ...o,
-      preco,
-      percentual_baseline:
-        baseline > 0 ? preco / baseline : null,
-    };
-
-    if (o.modo === "AUTO") {
-      if (baseline > 0 && preco <= baseline) {
-        radar.push(obj);
-      }
-    } else {
-      manual.push(obj);
-    }
-  });
+/* =================== CONSULTA =================== */
+
+const POR_PAGINA = 60;
+
+// 🔵 Radar (AUTO abaixo do baseline) x 🟠 Manual: filtro, ordem e página no servidor
+const SECOES = {
+  radar: { modo: "AUTO", abaixo_baseline: 1 },
+  manual: { modo: "MANUAL" },
+} as const;
 
+type Secao = keyof typeof SECOES;
+
+type Pagina = { lista: Oferta[]; total: number };
+
+async function buscarSecao(secao: Secao, busca: string, offset: number) {
+  const data = await getResultados({
+    ...SECOES[secao],
+    busca: busca.trim().toUpperCase(),
+    ordem: "preco",
+    limite: POR_PAGINA,
+    offset,
+  });
+  const lista = Array.isArray(data?.results) ? data.results : [];
   return {
-    radar: radar.sort((a, b) => a.preco - b.preco),
-    manual: manual.sort((a, b) => a.preco - b.preco),
+    lista: lista.map((o: Oferta) => {
+      const preco = normalizePreco(o.preco);
+      const baseline = normalizePreco(o.baseline);
+      return {
+        ...o,
+        preco,
+        percentual_baseline: baseline > 0 ? preco / baseline : null,
+      };
+    }),
+    total: Number(data?.total) || 0,
   };
 }
 
 /* =================== PAGE =================== */
 
+const VAZIA: Pagina = { lista: [], total: 0 };
+
 export function ResultsPage() {
-  const [allOfertas, setAllOfertas] = useState<Oferta[]>([]);
+  const [grupos, setGrupos] = useState<Record<Secao, Pagina>>({
+    radar: VAZIA,
+    manual: VAZIA,
+  });
   const [filter, setFilter] = useState("");
   const [loading, setLoading] = useState(true);
+  const consultaAtual = useRef(0);
 
+  // primeira página de cada seção; refeita quando o filtro muda (com debounce)
   useEffect(() => {
-    (async () => {
+    const consulta = ++consultaAtual.current;
+    const timer = setTimeout(async () => {
       try {
-        const data = await getResultados();
-        const lista =
-          data?.results ||
-          data?.resultados ||
-          data?.ofertas ||
-          data?.lista ||
-          data?.data ||
-          [];
-
-        if (Array.isArray(lista)) setAllOfertas(lista);
+        const [radar, manual] = await Promise.all([
+          buscarSecao("radar", filter, 0),
+          buscarSecao("manual", filter, 0),
+        ]);
+        // ignora respostas de filtros que já foram substituídos
+        if (consulta === consultaAtual.current) setGrupos({ radar, manual });
       } catch (e) {
         console.error("Erro ao buscar resultados:", e);
       } finally {
-        setLoading(false);
+        if (consulta === consultaAtual.current) setLoading(false);
       }
-    })();
-  }, []);
-
-  const grupos = useMemo(
-    () => processarResultados(allOfertas, filter),
-    [allOfertas, filter]
-  );
+    }, filter ? 250 : 0);
+    return () => clearTimeout(timer);
+  }, [filter]);
+
+  const carregarMais = async (secao: Secao) => {
+    const consulta = consultaAtual.current;
+    try {
+      const pagina = await buscarSecao(secao, filter, grupos[secao].lista.length);
+      if (consulta !== consultaAtual.current) return;
+      setGrupos(prev => ({
+        ...prev,
+        [secao]: {
+          lista: [...prev[secao].lista, ...pagina.lista],
+          total: pagina.total,
+        },
+      }));
+    } catch (e) {
+      console.error("Erro ao buscar resultados:", e);
+    }
+  };
 
-  const total = grupos.radar.length + grupos.manual.length;
+  const total = grupos.radar.total + grupos.manual.total;
 
   return (
     <div className="space-y-10 p-6">
@@ -141,7 +154,7 @@ export function ResultsPage() {
         <input
           value={filter}
           onChange={(e) => setFilter(e.target.value)}
-          placeholder="Filtrar por destino..."
+          placeholder="Filtrar por destino (IATA)..."
           className="w-full bg-slate-800 border border-slate-700 rounded-xl pl-12 pr-4 py-3 text-white focus:ring-2 focus:ring-orange-500 outline-none"
         />
       </div>
@@ -155,12 +168,14 @@ export function ResultsPage() {
 
           <Section
             title="🔵 Ofertas do Radar (Automático)"
-            lista={grupos.radar}
+            pagina={grupos.radar}
+            onMais={() => carregarMais("radar")}
           />
 
           <Section
             title="🟠 Ofertas Manuais"
-            lista={grupos.manual}
+            pagina={grupos.manual}
+            onMais={() => carregarMais("manual")}
           />
 
           {total === 0 && (
@@ -178,11 +193,14 @@ export function ResultsPage() {
 
 function Section({
   title,
-  lista,
+  pagina,
+  onMais,
 }: {
   title: string;
-  lista: Oferta[];
+  pagina: Pagina;
+  onMais: () => void;
 }) {
+  const { lista, total } = pagina;
   if (lista.length === 0) return null;
 
   return (
@@ -208,6 +226,17 @@ function Section({
           </div>
         ))}
       </div>
+
+      {lista.length < total && (
+        <div className="flex justify-center mt-6">
+          <button
+            onClick={onMais}
+            className="px-4 py-2 bg-slate-700 hover:bg-slate-600 rounded-md text-white text-sm"
+          >
+            Carregar mais ({lista.length} de {total})
+          </button>
+        </div>
+      )}
     </section>
   );
 }
@@ -15,6 +15,12 @@ export function SettingsPage() {
   const [logs, setLogs] = useState<string[]>([]);
   const logsRef = useRef<HTMLDivElement | null>(null);
 
+  const progressoRef = useRef(0);
+  const temProgressoReal = useRef(false);
+  useEffect(() => {
+    progressoRef.current = progresso;
+  }, [progresso]);
+
   const API_BASE = `${import.meta.env.VITE_API_URL || "http://localhost:10000"}/api`;
 
 
@@ -24,26 +30,32 @@ export function SettingsPage() {
     try {
       const res = await fetch(`${API_BASE}/status_execucao`);
       const data = await res.json();
-
-      const rodando = data.em_andamento === true;
-      setStatusExecucao(rodando);
-
-      if (rodando) {
-        setProgresso(prev => Math.min(prev + 8, 92));
-      } else {
-        setProgresso(100);
-        setFinalizou(true);
-      }
-
+      aplicarEstado(data.em_andamento === true);
+      aplicarProgresso(data.progresso);
     } catch (err) {
       console.error("Erro ao consultar status da execução:", err);
     }
   }
 
-  const iniciarPolling = () => {
-    const interval = setInterval(fetchStatusExecucao, 3000);
-    return interval;
-  };
+  function aplicarEstado(rodando: boolean) {
+    setStatusExecucao(rodando);
+    if (!rodando) {
+      setProgresso(prev => (prev > 0 ? 100 : 0));
+      setFinalizou(prev => prev || progressoRef.current > 0);
+    }
+  }
+
+  // progresso real (rotas concluídas por origem) quando a varredura AUTO informa
+  function aplicarProgresso(p: any) {
+    if (!p?.origens) return;
+    const contagens = Object.values(p.origens) as any[];
+    const total = contagens.reduce((soma, c) => soma + c.total, 0);
+    const feitas = contagens.reduce((soma, c) => soma + c.concluidas, 0);
+    if (total > 0 && feitas < total) {
+      temProgressoReal.current = true;
+      setProgresso(Math.max(5, Math.round((feitas / total) * 100)));
+    }
+  }
 
   /* ------------ LOGS AO VIVO ---------------- */
 
@@ -55,23 +67,78 @@ export function SettingsPage() {
       if (data?.logs) {
         setLogs(data.logs);
       }
-
-      // auto scroll
-      setTimeout(() => {
-        if (logsRef.current) {
-          logsRef.current.scrollTop = logsRef.current.scrollHeight;
-        }
-      }, 100);
-
     } catch (err) {
       console.error("Erro ao buscar logs:", err);
     }
   }
 
+  // auto scroll
   useEffect(() => {
-    fetchLogs();
-    const interval = setInterval(fetchLogs, 2000);
-    return () => clearInterval(interval);
+    if (logsRef.current) {
+      logsRef.current.scrollTop = logsRef.current.scrollHeight;
+    }
+  }, [logs]);
+
+  // Stream SSE: o servidor empurra logs e estado; o navegador reconecta
+  // sozinho (Last-Event-ID). Sem EventSource ou com o servidor cheio, volta ao polling.
+  useEffect(() => {
+    let intervalos: any[] = [];
+
+    const iniciarPolling = () => {
+      if (intervalos.length) return;
+      fetchLogs();
+      fetchStatusExecucao();
+      intervalos = [
+        setInterval(fetchLogs, 2000),
+        setInterval(fetchStatusExecucao, 3000),
+      ];
+    };
+
+    if (typeof EventSource === "undefined") {
+      iniciarPolling();
+      return () => intervalos.forEach(clearInterval);
+    }
+
+    const fonte = new EventSource(`${API_BASE}/eventos_execucao`);
+
+    fonte.addEventListener("retrato", (e: MessageEvent) => {
+      const d = JSON.parse(e.data);
+      setLogs(d.logs || []);
+      aplicarEstado(d.em_andamento === true);
+      aplicarProgresso(d.progresso);
+    });
+
+    fonte.addEventListener("log", (e: MessageEvent) => {
+      const linha = JSON.parse(e.data);
+      setLogs(prev => [...prev, linha].slice(-500));
+      if (!temProgressoReal.current) {
+        setProgresso(prev => (prev > 0 && prev < 92 ? prev + 2 : prev));
+      }
+    });
+
+    fonte.addEventListener("estado", (e: MessageEvent) => {
+      const d = JSON.parse(e.data);
+      if (d.em_andamento) {
+        temProgressoReal.current = false;
+        setProgresso(5);
+        setFinalizou(false);
+      }
+      aplicarEstado(d.em_andamento === true);
+    });
+
+    fonte.addEventListener("progresso", (e: MessageEvent) => {
+      aplicarProgresso(JSON.parse(e.data));
+    });
+
+    fonte.onerror = () => {
+      // CLOSED = o navegador desistiu (ex.: 503); CONNECTING = reconexão automática
+      if (fonte.readyState === EventSource.CLOSED) iniciarPolling();
+    };
+
+    return () => {
+      fonte.close();
+      intervalos.forEach(clearInterval);
+    };
   }, []);
 
   /* ------------ EXECUTAR ---------------- */
@@ -99,15 +166,8 @@ export function SettingsPage() {
         return;
       }
 
+      // o andamento chega pelo stream (eventos "estado", "progresso" e "log")
       setMensagem("🚀 Busca iniciada. Aguarde…");
-      const poll = iniciarPolling();
-
-      const stopCheck = setInterval(() => {
-        if (finalizou) {
-          clearInterval(poll);
-          clearInterval(stopCheck);
-        }
-      }, 1000);
 
     } catch (err) {
       console.error("Erro ao executar agora:", err);
@@ -117,12 +177,6 @@ export function SettingsPage() {
     }
   };
 
-  /* ------------ MONTAGEM INICIAL ---------------- */
-
-  useEffect(() => {
-    fetchStatusExecucao();
-  }, []);
-
   return (
     <div className="p-4 space-y-4">
 
@@ -72,14 +72,24 @@ export async function postProcessarTexto(texto: string, modo: "reais" | "reescre
 
 // =================== RESULTADOS ===================
 
-export async function getResultados() {
-  return request("/resultados");
+// filtros opcionais: destino, busca (prefixo do destino), origem, ida_de, ida_ate, desde, preco_max,
+// modo, abaixo_baseline, ordem ("-preco" = decrescente), limite (padrão 100), offset ou pagina
+export async function getResultados(
+  filtros: Record<string, string | number | boolean | undefined> = {}
+) {
+  const params = new URLSearchParams();
+  Object.entries(filtros).forEach(([chave, valor]) => {
+    if (valor !== undefined && valor !== "") params.set(chave, String(valor));
+  });
+  const query = params.toString();
+  return request(query ? `/resultados?${query}` : "/resultados");
 }
 
 // =================== DESTINOS ===================
 
-export async function getDestinos() {
-  return request("/destinos");
+export async function buscarDestinos(q: string, limite = 12) {
+  const params = new URLSearchParams({ q, limite: String(limite) });
+  return request(`/destinos/search?${params.toString()}`);
 }
 
 // =================== STATUS ===================
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from backend.armazenamento.arquivo_precos import (
+    ArquivoPrecos,
+    Observacao,
+    _dezigzag,
+    _ler_varint,
+    _varint,
+    _zigzag,
+)
+
+
+def test_zigzag_varint_ida_e_volta():
+    valores = [0, 1, -1, 63, -64, 64, 127, 128, -129, 300, -300, 2**31, -(2**31), 2**40 + 7]
+    saida = bytearray()
+    for valor in valores:
+        _varint(_zigzag(valor), saida)
+
+    pos = 0
+    lidos = []
+    for _ in valores:
+        n, pos = _ler_varint(saida, pos)
+        lidos.append(_dezigzag(n))
+    assert lidos == valores
+    assert pos == len(saida)
+
+
+def test_gravar_e_iterar_devolvem_as_mesmas_observacoes(tmp_path):
+    arquivo = ArquivoPrecos(str(tmp_path))
+    primeiro_lote = [
+        Observacao("2026-03-05 10:00:00", "FOR", "LIS", "2026-06-10", "2026-06-20", 2500.37),
+        # preço e datas menores que o anterior: deltas negativos
+        Observacao("2026-03-05 10:00:05", "FOR", "LIS", "2026-05-01", None, 1999.99),
+        Observacao("2026-03-06 08:30:00", "FOR", "LIS", "2026-05-01", "2026-05-08", 1999.99),
+        Observacao("2026-03-06 09:00:00", "FOR", "LIS", "2026-07-01", "2026-07-15", 310.5, "EUR"),
+    ]
+    segundo_lote = [
+        Observacao("2026-03-20 23:59:59", "FOR", "LIS", "2026-08-01", "2026-08-11", 1800.0),
+        Observacao("2026-04-01 00:00:00", "REC", "GRU", "2026-09-01", None, 450.1),
+    ]
+    arquivo.gravar(primeiro_lote)
+    arquivo.gravar(segundo_lote)   # anexado como outro membro gzip
+
+    def campos(obs):
+        return (obs.timestamp, obs.origem, obs.destino, obs.data_ida, obs.data_volta, obs.preco, obs.moeda)
+
+    lidas = sorted(campos(o) for o in arquivo.iterar())
+    assert lidas == sorted(campos(o) for o in primeiro_lote + segundo_lote)
+
+    # só a rota e a janela pedidas
+    marco = [campos(o) for o in arquivo.iterar("FOR", "LIS", "2026-03-06", "2026-03-31")]
+    assert sorted(marco) == sorted(campos(o) for o in primeiro_lote[2:] + segundo_lote[:1])
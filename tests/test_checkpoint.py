@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+from datetime import date, timedelta
+
+import pytest
+
+from backend.core_milhas import checkpoint as modulo
+from backend.core_milhas.checkpoint import CheckpointAuto, CheckpointEmUso
+
+
+def _dias(n):
+    return (date.today() + timedelta(days=n)).isoformat()
+
+
+def test_retoma_celulas_e_estado_salvos(tmp_path):
+    caminho = str(tmp_path / "checkpoint.json")
+    datas = [_dias(30), _dias(44)]
+    estado = {"entrou_zona": True, "buscas_pos_baseline": 1, "strikes_muito_caro": 0}
+
+    cp, retomado = CheckpointAuto.abrir(datas, caminho=caminho)
+    assert not retomado
+    cp.registrar_celula("FOR", "LIS", datas[0], _dias(37), estado, ofertas=1)
+    cp.concluir_rota("FOR", "MAD", estado)
+    cp.encerrar(completa=False)   # execução interrompida: o lote pendente é gravado
+
+    cp, retomado = CheckpointAuto.abrir(["ignorada"], caminho=caminho)
+    try:
+        assert retomado
+        assert cp.datas_ida == datas
+        estado_salvo, feitas = cp.progresso_rota("FOR", "LIS")
+        assert estado_salvo == estado
+        assert feitas == {(datas[0], _dias(37))}
+        destinos = [{"origem": "FOR", "destino": "LIS"}, {"origem": "FOR", "destino": "MAD"}]
+        assert cp.pendentes(destinos) == destinos[:1]
+    finally:
+        cp.encerrar(completa=True)
+    assert not os.path.exists(caminho)
+
+
+def test_grava_em_lotes(tmp_path, monkeypatch):
+    monkeypatch.setattr(modulo, "CHECKPOINT_LOTE", 3)
+    monkeypatch.setattr(modulo, "CHECKPOINT_INTERVALO", 3600)
+    caminho = str(tmp_path / "checkpoint.json")
+    estado = {"entrou_zona": False, "buscas_pos_baseline": 0, "strikes_muito_caro": 0}
+
+    def gravadas():
+        with open(caminho, encoding="utf-8") as f:
+            rota = json.load(f)["rotas"].get("FOR->LIS")
+        return len(rota["celulas"]) if rota else 0
+
+    cp, _ = CheckpointAuto.abrir([_dias(30)], caminho=caminho)
+    for i in range(4):
+        cp.registrar_celula("FOR", "LIS", _dias(30), _dias(37 + i), estado)
+    assert gravadas() == 3
+    cp.encerrar(completa=False)
+    assert gravadas() == 4
+
+
+def test_recusa_checkpoint_em_uso(tmp_path):
+    caminho = str(tmp_path / "checkpoint.json")
+    cp, _ = CheckpointAuto.abrir([_dias(30)], caminho=caminho)
+    with pytest.raises(CheckpointEmUso):
+        CheckpointAuto.abrir([_dias(30)], caminho=caminho)
+    cp.encerrar(completa=False)
+    cp, _ = CheckpointAuto.abrir([_dias(30)], caminho=caminho)
+    cp.encerrar(completa=True)
+
+
+def test_retomada_descarta_idas_passadas(tmp_path):
+    caminho = str(tmp_path / "checkpoint.json")
+    cp, _ = CheckpointAuto.abrir([_dias(-1), _dias(1)], caminho=caminho)
+    cp.encerrar(completa=False)
+
+    cp, retomado = CheckpointAuto.abrir([_dias(30)], caminho=caminho)
+    assert retomado and cp.datas_ida == [_dias(1)]
+    cp.encerrar(completa=False)
+
+    # nenhuma ida futura sobrou: começa do zero com a grade nova
+    cp, _ = CheckpointAuto.abrir([_dias(-2)], retomar=False, caminho=caminho)
+    cp.encerrar(completa=False)
+    cp, retomado = CheckpointAuto.abrir([_dias(30)], caminho=caminho)
+    assert not retomado and cp.datas_ida == [_dias(30)]
+    cp.encerrar(completa=True)
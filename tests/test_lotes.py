@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from backend.armazenamento.lotes import EscritorEmLotes
+
+
+def test_linha_ruim_vai_para_quarentena_e_o_resto_e_gravado():
+    gravadas = []
+
+    def gravar(linhas):
+        if any(linha is None for linha in linhas):
+            raise ValueError("linha inválida")
+        gravadas.extend(linhas)
+
+    escritor = EscritorEmLotes(gravar, nome="teste", lote=1000, intervalo=3600)
+    for linha in (1, None, 2, 3):
+        escritor.adicionar(linha)
+
+    assert escritor.descarregar() == 3
+    assert gravadas == [1, 2, 3]
+    assert escritor.rejeitadas == 1
+    assert list(escritor.quarentena) == [(None, "linha inválida")]
+
+    # a linha ruim não volta para o buffer nem trava a próxima descarga
+    assert escritor.pendentes() == 0
+    escritor.adicionar(4)
+    assert escritor.descarregar() == 1
+    assert gravadas == [1, 2, 3, 4]
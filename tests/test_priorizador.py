@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from backend.core_milhas.priorizador import _dividir
+
+
+def test_dividir_fecha_o_orcamento_e_respeita_o_minimo():
+    for orcamento, pesos, minimo in [
+        (100, [1.0, 1.0, 1.0], 5),
+        (97, [3.0, 0.5, 0.01, 2.2], 4),
+        (10, [5.0, 1.0, 1.0, 1.0], 4),   # mínimo não cabe para todos
+        (7, [0.3, 0.3, 0.3], 1),
+    ]:
+        limites = _dividir(orcamento, pesos, minimo)
+        assert sum(limites) == orcamento
+        assert min(limites) >= min(minimo, orcamento // len(pesos))
+
+
+def test_dividir_proporcional_ao_peso():
+    limites = _dividir(100, [3.0, 1.0], 0)
+    assert limites == [75, 25]
+    limites = _dividir(30, [2.0, 1.0, 1.0], 2)
+    assert limites[0] > limites[1] == limites[2]
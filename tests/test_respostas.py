@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+
+from flask import Flask
+
+from backend.api.respostas import responder_json
+
+app = Flask(__name__)
+montagens = []
+
+
+@app.route("/dados")
+def dados():
+    def montar():
+        montagens.append(1)
+        return {"itens": list(range(500))}
+    return responder_json("teste/dados", ("banco", 7), montar)
+
+
+def test_etag_igual_responde_304_sem_montar():
+    cliente = app.test_client()
+    montagens.clear()
+
+    primeira = cliente.get("/dados")
+    assert primeira.status_code == 200
+    etag = primeira.headers["ETag"]
+    assert json.loads(primeira.data)["itens"][-1] == 499
+
+    segunda = cliente.get("/dados", headers={"If-None-Match": etag})
+    assert segunda.status_code == 304
+    assert segunda.data == b""
+    assert segunda.headers["ETag"] == etag
+
+    outra = cliente.get("/dados", headers={"If-None-Match": '"outra-versao"'})
+    assert outra.status_code == 200
+    assert len(montagens) == 1   # o corpo da versão ficou guardado
+
+
+def test_corpo_comprimido_quando_aceito():
+    resposta = app.test_client().get("/dados", headers={"Accept-Encoding": "gzip"})
+    assert resposta.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(resposta.data))["itens"][0] == 0
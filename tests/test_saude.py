@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import time
+
+from backend.core_amadeus.saude import ABERTO, MEIO_ABERTO, MonitorSaude
+
+CRED = {"name": "Chave 1", "key": "k1", "secret": "s1"}
+
+
+def _meio_aberta(monitor):
+    saude = monitor._get(CRED["name"])
+    saude.estado = ABERTO
+    saude.aberto_ate = time.time() - 1   # cool-down vencido: próxima escolha vira sonda
+    return saude
+
+
+def test_chave_meio_aberta_pulada_pela_espera_nao_fica_sondando():
+    monitor = MonitorSaude()
+    saude = _meio_aberta(monitor)
+
+    # governador segura a chave além do máximo: não é reservada
+    assert monitor.escolher([CRED], espera=lambda nome: 120, espera_max=60) is None
+    assert saude.estado == MEIO_ABERTO
+    assert not saude.sondando
+    assert saude.em_uso == 0
+
+    # governador liberou: a chave volta como sonda
+    assert monitor.escolher([CRED], espera=lambda nome: 0, espera_max=60) is CRED
+    assert saude.sondando
+
+
+def test_sonda_unica_ate_registrar_resultado():
+    monitor = MonitorSaude()
+    _meio_aberta(monitor)
+
+    assert monitor.escolher([CRED]) is CRED
+    assert monitor.escolher([CRED]) is None   # só uma sonda por vez
+    monitor.sucesso(CRED, 0.1)
+    monitor.liberar(CRED)
+    assert monitor.escolher([CRED]) is CRED